@@ -17,6 +17,42 @@ class Settings(BaseSettings):
     HOLIDAY_API_KEY: str = ""
     OPENMETEO_API_URL: str = "https://api.open-meteo.com/v1/forecast"
 
+    # Public advisory prediction cache
+    PREDICTION_CACHE_SIZE: int = 1024
+    PREDICTION_CACHE_TTL_SECONDS: float = 300.0
+    PREDICTION_CACHE_AQI_BUCKET: float = 10.0
+    PREDICTION_CACHE_TEMP_BUCKET: float = 1.0
+
+    # Advisory rule table; empty uses the bundled app/services/ai_model/advisory_rules.json
+    ADVISORY_RULES_PATH: str = ""
+
+    # Per-hospital / per-department model cache (models/registry/hospitals/<hospital>/<department>)
+    MODEL_CACHE_MAX_MB: int = 512
+
+    # Inference executor ("thread" or "process") for predictor / decision engine work
+    INFERENCE_EXECUTOR: str = "thread"
+    INFERENCE_MAX_WORKERS: int = 4
+    INFERENCE_MAX_QUEUE: int = 64
+
+    # Incremental model updates from the daily_actuals collection
+    ONLINE_UPDATE_ENABLED: bool = False
+    ONLINE_UPDATE_INTERVAL_SECONDS: float = 86400.0
+    ONLINE_UPDATE_ALERT_INTERVAL_SECONDS: float = 3600.0
+    ONLINE_UPDATE_WINDOW_DAYS: int = 90
+    ONLINE_UPDATE_TREES: int = 10
+
+    # Lag-feature store sync interval: each worker flushes its visit counts to
+    # the feature_store_days collection and reloads everyone's
+    FEATURE_STORE_SYNC_SECONDS: float = 60.0
+
+    # Inventory depletion projection (/reports/inventory-forecast); stock is
+    # re-read from MongoDB every refresh interval, the forecast every cache TTL
+    INVENTORY_LEAD_TIME_DAYS: float = 3.0
+    INVENTORY_REFRESH_SECONDS: float = 300.0
+
+    # In-memory bed availability index, reloaded from MongoDB to pick up other workers' writes
+    BED_INDEX_REBUILD_SECONDS: float = 300.0
+
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
 
     @field_validator("BACKEND_CORS_ORIGINS", mode="before")
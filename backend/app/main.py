@@ -1,10 +1,15 @@
+import asyncio
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.core.database import db
+from app.services.ai_model.feature_store import sync_loop
+from app.services.ai_model.online_update import online_update_loop
+from app.services.bed_index import rebuild_loop
 from app.routers import (
     auth, users, patients, staff, beds, inventory, 
-    alerts, appointments, emergency, dashboard, reports, external, medical_records, public_advisory
+    alerts, appointments, emergency, dashboard, reports, external, medical_records, public_advisory,
+    forecasting
 )
 
 app = FastAPI(
@@ -29,10 +34,67 @@ app.add_middleware(
 async def startup_db_client():
     db.connect()
 
+@app.on_event("startup")
+async def start_feature_store():
+    try:
+        loaded = await public_advisory.feature_store.refresh(db.get_db())
+        print(f"Loaded {loaded} feature store days")
+    except Exception as e:
+        print(f"Could not load feature store: {e}")
+    app.state.feature_store_task = asyncio.create_task(sync_loop(
+        db.get_db, public_advisory.feature_store, settings.FEATURE_STORE_SYNC_SECONDS
+    ))
+
+@app.on_event("shutdown")
+async def stop_feature_store():
+    app.state.feature_store_task.cancel()
+    try:
+        await public_advisory.feature_store.flush(db.get_db())
+    except Exception as e:
+        print(f"Could not flush feature store: {e}")
+
+@app.on_event("startup")
+async def start_bed_index():
+    try:
+        loaded = await beds.bed_index.rebuild(db.get_db())
+        print(f"Indexed {loaded} beds")
+    except Exception as e:
+        print(f"Could not build bed index: {e}")
+    app.state.bed_index_task = asyncio.create_task(rebuild_loop(
+        db.get_db, beds.bed_index, settings.BED_INDEX_REBUILD_SECONDS
+    ))
+
+@app.on_event("shutdown")
+async def stop_bed_index():
+    app.state.bed_index_task.cancel()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     db.close()
 
+@app.on_event("startup")
+async def start_online_updates():
+    if settings.ONLINE_UPDATE_ENABLED:
+        app.state.online_update_task = asyncio.create_task(online_update_loop(
+            db.get_db,
+            public_advisory.inference_executor,
+            settings.ONLINE_UPDATE_INTERVAL_SECONDS,
+            settings.ONLINE_UPDATE_ALERT_INTERVAL_SECONDS,
+            public_advisory.model_registry.root,
+            window_days=settings.ONLINE_UPDATE_WINDOW_DAYS,
+            trees_per_update=settings.ONLINE_UPDATE_TREES
+        ))
+
+@app.on_event("shutdown")
+async def stop_online_updates():
+    task = getattr(app.state, "online_update_task", None)
+    if task is not None:
+        task.cancel()
+
+@app.on_event("shutdown")
+async def shutdown_inference_executor():
+    public_advisory.inference_executor.shutdown(wait=False)
+
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
 app.include_router(users.router, prefix=f"{settings.API_V1_STR}/users", tags=["users"])
 app.include_router(patients.router, prefix=f"{settings.API_V1_STR}/patients", tags=["patients"])
@@ -46,6 +108,7 @@ app.include_router(dashboard.router, prefix=f"{settings.API_V1_STR}/dashboard",
 app.include_router(reports.router, prefix=f"{settings.API_V1_STR}/reports", tags=["reports"])
 app.include_router(medical_records.router, prefix=f"{settings.API_V1_STR}/records", tags=["medical_records"])
 app.include_router(external.router, prefix=f"{settings.API_V1_STR}/external", tags=["external"])
+app.include_router(forecasting.router, prefix=f"{settings.API_V1_STR}/forecasting", tags=["forecasting"])
 app.include_router(public_advisory.router)
 
 # WebSocket Connection Manager
@@ -60,6 +60,64 @@ class WeeklyForecastResponse(BaseModel):
     generated_at: datetime = Field(default_factory=datetime.now, description="Forecast generation time")
 
 
+class HourlyDepartmentForecast(BaseModel):
+    """Hourly curve for one department"""
+    department: str = Field(..., description="Department name")
+    predicted_patients: List[float] = Field(..., description="Predicted arrivals per hour")
+    lower: List[float] = Field(..., description="Lower bound per hour")
+    upper: List[float] = Field(..., description="Upper bound per hour")
+
+
+class HourlyForecastResponse(BaseModel):
+    """Hourly per-department forecast response"""
+    start: datetime = Field(..., description="First forecast hour")
+    hours: int = Field(..., description="Number of forecast hours")
+    timestamps: List[datetime] = Field(..., description="Forecast hours")
+    departments: List[HourlyDepartmentForecast] = Field(..., description="Per-department curves")
+    total_patients: List[float] = Field(..., description="Predicted arrivals per hour across departments")
+    peak_hour: datetime = Field(..., description="Hour with the highest total")
+    method: str = Field(..., description="direct_hourly_model or same_hour_last_week fallback")
+    model_version: Optional[str] = Field(None, description="Hourly registry version used")
+    history_end: Optional[datetime] = Field(None, description="Last observed hour the forecast starts from")
+    generated_at: datetime = Field(default_factory=datetime.now, description="Forecast generation time")
+
+
+class ScenarioRequest(BaseModel):
+    """What-if assumptions for a Monte Carlo scenario run"""
+    AQI: int = Field(..., description="Expected Air Quality Index level", ge=0, le=500)
+    temp: float = Field(..., description="Expected temperature in Celsius")
+    rainfall: float = Field(default=0, description="Rainfall on the first day in mm", ge=0)
+    epidemic_alert_level: int = Field(default=0, description="Starting epidemic alert level (0-3)", ge=0, le=3)
+    holiday_flag: int = Field(default=0, description="Holiday on every day unless event_days is given (0 or 1)")
+    festival_flag: int = Field(default=0, description="Festival on every day unless event_days is given (0 or 1)")
+    event_days: Optional[List[int]] = Field(None, description="Day offsets that are holidays/festivals")
+    days: int = Field(default=14, description="Days to simulate", ge=1, le=14)
+    n_scenarios: int = Field(default=10000, description="Number of sampled trajectories", ge=100, le=20000)
+    aqi_volatility: float = Field(default=0.15, description="Daily AQI log-volatility", ge=0, le=1)
+    temp_volatility: float = Field(default=1.0, description="Daily temperature random-walk step (Celsius)", ge=0, le=10)
+    rain_probability: float = Field(default=0.1, description="Chance of a wet day", ge=0, le=1)
+    epidemic_escalation: float = Field(default=0.05, description="Daily chance the alert level rises", ge=0, le=1)
+    epidemic_recovery: float = Field(default=0.05, description="Daily chance the alert level falls", ge=0, le=1)
+    seed: Optional[int] = Field(None, description="Random seed for reproducible runs")
+    hospital_id: Optional[str] = Field(None, description="Hospital whose model and history to use")
+    department: Optional[str] = Field(None, description="Department whose model and history to use (e.g. ER)")
+
+
+class ScenarioResponse(BaseModel):
+    """Quantile bands across simulated scenarios (keys p5, p25, p50, p75, p95)"""
+    dates: List[str] = Field(..., description="Simulated days (YYYY-MM-DD)")
+    n_scenarios: int = Field(..., description="Number of sampled trajectories")
+    patient_load: Dict[str, List[float]] = Field(..., description="Patient load quantiles per day")
+    probability_high: List[float] = Field(..., description="Share of scenarios at HIGH load or above per day")
+    probability_critical: List[float] = Field(..., description="Share of scenarios at CRITICAL load per day")
+    aqi: Dict[str, List[float]] = Field(..., description="Sampled AQI quantiles per day")
+    staffing: Dict[str, Dict[str, List[float]]] = Field(..., description="Staff needed per role and day at each load quantile")
+    supplies_total: Dict[str, Dict[str, List[float]]] = Field(..., description="Supply needs over the whole horizon per item")
+    method: str = Field(..., description="direct or recursive forecaster")
+    model_version: Optional[str] = Field(None, description="Registry version used")
+    generated_at: datetime = Field(default_factory=datetime.now, description="Simulation time")
+
+
 class HealthRisksResponse(BaseModel):
     """Current health risks response"""
     current_risks: List[Dict[str, Any]] = Field(..., description="List of current health risks")
@@ -67,9 +125,95 @@ class HealthRisksResponse(BaseModel):
     recommendations: List[str] = Field(..., description="General recommendations")
 
 
+class LocationConditions(BaseModel):
+    """Conditions at one served location for a bulk advisory check"""
+    location: str = Field(..., description="City or site id")
+    AQI: int = Field(..., description="Air Quality Index", ge=0, le=500)
+    temp: float = Field(..., description="Temperature in Celsius")
+    epidemic_alert_level: int = Field(default=0, description="Epidemic alert level (0-3)", ge=0, le=3)
+    predicted_patients: Optional[float] = Field(None, description="Forecast load; capacity rules are skipped without it", ge=0)
+
+
+class BulkAdvisoryRequest(BaseModel):
+    """Locations checked against the advisory rules in one pass"""
+    locations: List[LocationConditions] = Field(..., description="Locations to check", min_length=1)
+
+
+class LocationAdvisory(BaseModel):
+    """Advisories, risks and tips for one location"""
+    location: str = Field(..., description="City or site id")
+    load_level: Optional[str] = Field(None, description="Load classification, if a forecast was given")
+    risk_level: str = Field(..., description="Overall risk level")
+    advisories: List[HealthAdvisory] = Field(default_factory=list, description="Patient advisories")
+    risks: List[Dict[str, Any]] = Field(default_factory=list, description="Health risks")
+    health_tips: List[str] = Field(default_factory=list, description="General health tips")
+
+
+class BulkAdvisoryResponse(BaseModel):
+    """Advisory check of many locations"""
+    results: List[LocationAdvisory] = Field(..., description="One entry per requested location, in order")
+    generated_at: datetime = Field(default_factory=datetime.now, description="Evaluation time")
+
+
+class ReconciledForecastRequest(BaseModel):
+    """Hospitals and departments whose daily forecasts are reconciled together"""
+    hospitals: List[str] = Field(..., description="Hospital ids", min_length=1)
+    departments: List[str] = Field(..., description="Departments forecast at every hospital", min_length=1)
+    days: int = Field(default=7, description="Days to forecast", ge=1, le=14)
+    method: str = Field(default="mint", description="bottom_up, ols, wls_struct or mint")
+
+
+class ReconciledSeries(BaseModel):
+    """Base and reconciled forecast of one node of the hierarchy"""
+    level: str = Field(..., description="network, hospital or department")
+    hospital_id: Optional[str] = Field(None, description="Hospital (None for the network total)")
+    department: str = Field(..., description="Department, ALL for totals")
+    base: List[float] = Field(..., description="Independent model forecast per day")
+    reconciled: List[float] = Field(..., description="Coherent forecast per day")
+    lower: List[float] = Field(..., description="Lower bound of the reconciled forecast")
+    upper: List[float] = Field(..., description="Upper bound of the reconciled forecast")
+    model_version: Optional[str] = Field(None, description="Registry version of the base model")
+
+
+class ReconciledForecastResponse(BaseModel):
+    """Forecasts that add up at every level of the hospital hierarchy"""
+    dates: List[str] = Field(..., description="Forecast days (YYYY-MM-DD)")
+    method: str = Field(..., description="Reconciliation method")
+    max_incoherence: float = Field(..., description="Largest gap between a base total and the sum of its parts")
+    series: List[ReconciledSeries] = Field(..., description="Network, hospital and department series")
+
+
+class FeatureDrift(BaseModel):
+    """Drift of one model input from its training distribution"""
+    feature: str = Field(..., description="Feature name")
+    psi: float = Field(..., description="Population stability index of the live window vs. training")
+    status: str = Field(..., description="stable, moderate or significant")
+    below_range: float = Field(..., description="Share of live values below the training minimum")
+    above_range: float = Field(..., description="Share of live values above the training maximum")
+    live_mean: float = Field(..., description="Mean live value since the model was loaded")
+    training_mean: float = Field(..., description="Mean training value")
+
+
+class DriftReportResponse(BaseModel):
+    """Drift of live prediction inputs for one served model"""
+    model_version: Optional[str] = Field(None, description="Model version being monitored")
+    status: str = Field(..., description="stable, moderate, significant, insufficient_data or unavailable")
+    observations: int = Field(default=0, description="Feature rows seen since the model was loaded")
+    window_rows: int = Field(default=0, description="Rows in the compared live window")
+    max_psi: float = Field(default=0.0, description="Largest per-feature stability index")
+    features: List[FeatureDrift] = Field(default_factory=list, description="Per-feature drift, worst first")
+
+
 class ModelInfoResponse(BaseModel):
     """Model information and status"""
     model_loaded: bool = Field(..., description="Is the ML model loaded?")
     llm_available: bool = Field(..., description="Is LLM service available?")
     last_training_date: Optional[str] = Field(None, description="Last model training date")
+    model_version: Optional[str] = Field(None, description="Registry version being served")
+    trained_at: Optional[str] = Field(None, description="When the served model was trained")
+    metrics: Dict[str, float] = Field(default_factory=dict, description="Holdout MAE/RMSE of the served model")
+    prediction_cache: Dict[str, Any] = Field(default_factory=dict, description="Prediction cache hit/miss/eviction counters")
+    model_cache: Dict[str, Any] = Field(default_factory=dict, description="Per-hospital model cache size, load and eviction counters")
+    inference_executor: Dict[str, Any] = Field(default_factory=dict, description="Inference executor queue and latency stats")
+    drift: Dict[str, Any] = Field(default_factory=dict, description="Input drift summary of the served model (empty without a training profile)")
     feature_importance: Dict[str, float] = Field(default_factory=dict, description="Feature importance scores")
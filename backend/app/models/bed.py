@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import List, Optional, Any
-from pydantic import Field
+from pydantic import BaseModel, Field
 from app.models.common import MongoBaseModel, PyObjectId
 
 class Bed(MongoBaseModel):
@@ -13,3 +13,9 @@ class Bed(MongoBaseModel):
     features: dict = {}
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class BedAllocationRequest(BaseModel):
+    department: Optional[str] = None
+    features: List[str] = [] # e.g. icu, ventilator
+    room_number: Optional[str] = None
+    patient_id: Optional[PyObjectId] = None
@@ -0,0 +1,20 @@
+from datetime import datetime
+from pydantic import BaseModel, Field
+from app.models.common import MongoBaseModel
+
+class DailyActual(MongoBaseModel):
+    date: datetime
+    patients: int = Field(..., ge=0, description="Patients seen on the day")
+    AQI: float
+    temp: float
+    rainfall: float = 0.0
+    epidemic_alert_level: int = Field(0, ge=0, le=3)
+    holiday_flag: int = 0
+    festival_flag: int = 0
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class VisitRecord(BaseModel):
+    department: str
+    hospital_id: str = "default"
+    timestamp: datetime = Field(default_factory=datetime.now)
+    count: int = Field(1, ge=1)
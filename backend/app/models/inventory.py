@@ -12,5 +12,7 @@ class InventoryItem(MongoBaseModel):
     expiry_date: Optional[datetime] = None
     storage_location: str
     cost_per_unit: float
+    # Units used per patient per day; defaults to the decision engine's supply rate
+    usage_per_patient: Optional[float] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -11,6 +11,8 @@ class Staff(MongoBaseModel):
     department: str
     specialization: Optional[str] = None
     contact: dict
+    # Shift entries: {"date": "2026-10-18", "shift": "morning" | "evening" | "night",
+    # "department": optional, defaults to the staff member's department}
     schedule: List[dict] = []
     certifications: List[str] = []
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -1,35 +1,91 @@
-from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import List, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.core.database import get_database
-from app.models.bed import Bed
+from app.models.bed import Bed, BedAllocationRequest
 from app.dependencies import get_current_user
 from app.models.user import User
 from app.models.common import PyObjectId
+from app.services.bed_index import AVAILABLE, OCCUPIED, BedIndex, normalize_status, status_filter
 
 router = APIRouter()
 
+# Attempts when the reserved bed turns out to be taken by another worker
+MAX_ALLOCATION_ATTEMPTS = 5
+
+# Availability by department, room and feature; kept current by the writes below,
+# rebuilt by main.py at startup and every BED_INDEX_REBUILD_SECONDS
+bed_index = BedIndex()
+
 @router.get("/stats")
 async def get_bed_stats(
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    # Format for frontend: [{name: 'Dept', total: 10, occupied: 5, ...}, ...]
+    return bed_index.stats()
+
+@router.get("/availability")
+async def get_bed_availability(
+    department: Optional[str] = None,
+    features: List[str] = Query(default=[], description="Features every bed must have (e.g. icu, ventilator)"),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    return {
+        "department": department,
+        "features": features,
+        "available": bed_index.available(department, features)
+    }
+
+@router.post("/allocate", response_model=Bed)
+async def allocate_bed(
+    request: BedAllocationRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> Any:
+    if request.room_number is not None and request.department is None:
+        raise HTTPException(status_code=400, detail="room_number needs a department")
+    for _ in range(MAX_ALLOCATION_ATTEMPTS):
+        bed_id = bed_index.allocate(request.department, request.features, request.room_number)
+        if bed_id is None:
+            raise HTTPException(status_code=404, detail="No available bed matches the request")
+        try:
+            # Only succeeds if the bed is still available in MongoDB
+            result = await db.beds.update_one(
+                {"_id": PyObjectId(bed_id), "status": status_filter(AVAILABLE)},
+                {"$set": {"status": OCCUPIED, "patient_id": request.patient_id, "updated_at": datetime.utcnow()}}
+            )
+        except Exception:
+            bed_index.release(bed_id)
+            raise
+        bed = await db.beds.find_one({"_id": PyObjectId(bed_id)})
+        if result.modified_count:
+            return Bed(**bed)
+        # Changed by another worker; take its current state and try the next bed
+        if bed:
+            bed_index.upsert(bed)
+        else:
+            bed_index.remove(bed_id)
+    raise HTTPException(status_code=409, detail="Beds changed during allocation, please retry")
+
+@router.post("/{bed_id}/release", response_model=Bed)
+async def release_bed(
+    bed_id: str,
     current_user: User = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ) -> Any:
-    pipeline = [
-        {
-            "$group": {
-                "_id": "$department",
-                "total": {"$sum": 1},
-                "occupied": {
-                    "$sum": {
-                        "$cond": [{"$eq": ["$status", "occupied"]}, 1, 0]
-                    }
-                }
-            }
-        }
-    ]
-    stats = await db.beds.aggregate(pipeline).to_list(length=None)
-    # Format for frontend: [{name: 'Dept', total: 10, occupied: 5}, ...]
-    return [{"name": s["_id"], "total": s["total"], "occupied": s["occupied"]} for s in stats]
+    # Only occupied beds are released; beds under maintenance stay out of service
+    result = await db.beds.update_one(
+        {"_id": PyObjectId(bed_id), "status": status_filter(OCCUPIED)},
+        {"$set": {"status": AVAILABLE, "patient_id": None, "updated_at": datetime.utcnow()}}
+    )
+    bed = await db.beds.find_one({"_id": PyObjectId(bed_id)})
+    if not bed:
+        raise HTTPException(status_code=404, detail="Bed not found")
+    bed_index.upsert(bed)
+    if result.matched_count == 0:
+        raise HTTPException(status_code=409, detail=f"Bed is {bed.get('status')}, not occupied")
+    return Bed(**bed)
 
 @router.get("/", response_model=List[Bed])
 async def read_beds(
@@ -47,8 +103,10 @@ async def create_bed(
     current_user: User = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ) -> Any:
+    bed.status = normalize_status(bed.status)
     new_bed = await db.beds.insert_one(bed.dict(by_alias=True))
     created_bed = await db.beds.find_one({"_id": new_bed.inserted_id})
+    bed_index.upsert(created_bed)
     return Bed(**created_bed)
 
 @router.get("/{bed_id}", response_model=Bed)
@@ -74,11 +132,14 @@ async def update_bed(
         raise HTTPException(status_code=404, detail="Bed not found")
     
     update_data = bed_in.dict(exclude_unset=True)
+    if "status" in update_data:
+        update_data["status"] = normalize_status(update_data["status"])
     await db.beds.update_one(
         {"_id": PyObjectId(bed_id)},
         {"$set": update_data}
     )
     updated_bed = await db.beds.find_one({"_id": PyObjectId(bed_id)})
+    bed_index.upsert(updated_bed)
     return Bed(**updated_bed)
 
 @router.delete("/{bed_id}")
@@ -90,4 +151,5 @@ async def delete_bed(
     result = await db.beds.delete_one({"_id": PyObjectId(bed_id)})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Bed not found")
+    bed_index.remove(bed_id)
     return {"status": "success"}
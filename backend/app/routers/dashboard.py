@@ -1,7 +1,15 @@
+from datetime import datetime
 from typing import Any
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.database import get_database
 from app.dependencies import get_current_user
 from app.models.user import User
+from app.routers.beds import bed_index
+from app.routers.public_advisory import STAFF_PLAN_FIELDS, _queue_full_error, compute_staffing_plan, hourly_forecast
+from app.services.ai_model.inference_executor import InferenceQueueFull
+from app.services.ai_model.decision_engine import SHIFTS
+from app.services.ai_model.staffing_optimizer import shift_of
 
 router = APIRouter()
 
@@ -22,23 +30,52 @@ async def dashboard_stats(
 
 @router.get("/predictions")
 async def dashboard_predictions(
+    hours: int = Query(default=24, ge=1, le=72),
     current_user: User = Depends(get_current_user)
 ) -> Any:
-    # Mock prediction data for graph
-    return [
-        {"timestamp": "2023-11-28T00:00:00", "time": "00:00", "patients": 45, "reason": "Normal nighttime baseline", "insight": "Standard overnight activity", "preparation": "Maintain regular staffing"},
-        {"timestamp": "2023-11-28T04:00:00", "time": "04:00", "patients": 32, "reason": "Early morning dip", "insight": "Lowest activity period", "preparation": "Minimal emergency response needed"},
-        {"timestamp": "2023-11-28T08:00:00", "time": "08:00", "patients": 78, "reason": "Morning commute accidents", "insight": "Traffic-related injuries peak", "preparation": "Extra orthopedic staff on standby"},
-        {"timestamp": "2023-11-28T12:00:00", "time": "12:00", "patients": 95, "reason": "Diwali pollution surge", "insight": "Fireworks causing respiratory issues", "preparation": "Stock up on inhalers"},
-        {"timestamp": "2023-11-28T16:00:00", "time": "16:00", "patients": 87, "reason": "Post-lunch digestive cases", "insight": "Food-related emergencies", "preparation": "Gastroenterology team ready"},
-        {"timestamp": "2023-11-28T20:00:00", "time": "20:00", "patients": 65, "reason": "Evening festivities", "insight": "Firework injuries", "preparation": "Trauma team on high alert"}
-    ]
+    # Hourly per-department forecast for the graph
+    try:
+        forecast = await hourly_forecast(hours)
+    except InferenceQueueFull as e:
+        raise _queue_full_error(e)
+    
+    mean_load = sum(forecast.total_patients) / len(forecast.total_patients)
+    points = []
+    for i, timestamp in enumerate(forecast.timestamps):
+        total = forecast.total_patients[i]
+        by_department = {d.department: d.predicted_patients[i] for d in forecast.departments}
+        busiest = max(by_department, key=by_department.get)
+        if total >= mean_load * 1.2:
+            reason = "Intraday surge expected"
+            preparation = f"Bring shift starts forward in {busiest}"
+        elif total <= mean_load * 0.8:
+            reason = "Low activity period"
+            preparation = "Maintain minimal staffing"
+        else:
+            reason = "Typical activity"
+            preparation = "Maintain regular staffing"
+        points.append({
+            "timestamp": timestamp.isoformat(),
+            "time": timestamp.strftime("%H:00"),
+            "patients": round(total),
+            "departments": {dept: round(count, 1) for dept, count in by_department.items()},
+            "lower": round(sum(d.lower[i] for d in forecast.departments)),
+            "upper": round(sum(d.upper[i] for d in forecast.departments)),
+            "reason": reason,
+            "insight": f"{busiest} expects {by_department[busiest]:.0f} of {total:.0f} arrivals",
+            "preparation": preparation
+        })
+    return points
 
 @router.get("/beds")
 async def dashboard_beds(
     current_user: User = Depends(get_current_user)
 ) -> Any:
-    return {"available": 20, "occupied": 80}
+    departments = bed_index.stats()
+    return {
+        "available": sum(d["available"] for d in departments),
+        "occupied": sum(d["occupied"] for d in departments)
+    }
 
 @router.get("/staff")
 async def dashboard_staff(
@@ -88,19 +125,76 @@ async def doctor_stats(
         "avg_consultation_time": "18m"
     }
 
+# Staff reallocation items shown on the dashboard, largest first
+MAX_STAFFING_RECOMMENDATIONS = 3
+# Moving at least this many staff at once is a high-priority recommendation
+HIGH_PRIORITY_MOVES = 5
+ROLE_NOUNS = {
+    'doctors': ('doctor', 'doctors'),
+    'nurses': ('nurse', 'nurses'),
+    'support': ('support staff member', 'support staff')
+}
+
+def _staff_count(count: int, role: str) -> str:
+    singular, plural = ROLE_NOUNS.get(role, (role, role))
+    return f"{count} {singular if count == 1 else plural}"
+
+def _staffing_recommendations(plan: dict) -> list:
+    """Dashboard items from a staffing plan: grouped moves, call-ins and remaining gaps"""
+    groups = {}
+    for change in plan["changes"]:
+        key = (change["type"], change["role"], change["from_department"], change["to_department"])
+        groups.setdefault(key, []).append(change["to_shift"])
+    items = []
+    for (kind, role, source, target), shifts in sorted(groups.items(), key=lambda group: -len(group[1])):
+        shift_names = ", ".join(shift for shift in SHIFTS if shift in shifts)
+        shift_names += " shift" if len(set(shifts)) == 1 else " shifts"
+        if kind == "move":
+            title = "Staff Reallocation Recommended"
+            description = f"Move {_staff_count(len(shifts), role)} from {source} to {target} ({shift_names}) to match the forecast load"
+        else:
+            title = "Call In Off-Duty Staff"
+            description = f"Call in {_staff_count(len(shifts), role)} for {target} ({shift_names}); no surplus staff is left to move"
+        items.append({
+            "title": title,
+            "description": description,
+            "priority": "high" if len(shifts) >= HIGH_PRIORITY_MOVES else "medium",
+            "action": "Implement Plan",
+            "category": "staffing"
+        })
+    items = items[:MAX_STAFFING_RECOMMENDATIONS]
+
+    shortfalls = {}
+    for cell in plan["coverage"]:
+        if cell["shortfall"]:
+            by_role = shortfalls.setdefault(cell["department"], {})
+            by_role[cell["role"]] = by_role.get(cell["role"], 0) + cell["shortfall"]
+    for department, by_role in shortfalls.items():
+        missing = [_staff_count(count, role) for role, count in by_role.items()]
+        items.append({
+            "title": f"{department} Understaffed",
+            "description": f"{department} is still short of {', '.join(missing)} after reassignment - arrange agency or overtime cover",
+            "priority": "high",
+            "action": "Review Schedule",
+            "category": "staffing"
+        })
+    return items
+
 @router.get("/recommendations")
 async def dashboard_recommendations(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
 ) -> Any:
-    return [
-        {
-            "_id": "rec1",
-            "title": "Staff Reallocation Recommended",
-            "description": "Move 5 nurses from Medical ward to Emergency to handle expected surge",
-            "priority": "high",
-            "action": "Implement Plan",
-            "category": "staffing"
-        },
+    # Staffing items come from today's reassignment plan over the real schedules
+    staff_members = await db.staff.find({}, STAFF_PLAN_FIELDS).to_list(length=None)
+    try:
+        plan = await compute_staffing_plan(staff_members, shift_of(datetime.now())[0])
+    except InferenceQueueFull as e:
+        raise _queue_full_error(e)
+    recommendations = [
+        {"_id": f"staffing{i + 1}", **item} for i, item in enumerate(_staffing_recommendations(plan))
+    ]
+    return recommendations + [
         {
             "_id": "rec2",
             "title": "Supply Procurement Alert",
@@ -0,0 +1,80 @@
+from datetime import datetime
+from typing import List, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.config import settings
+from app.core.database import get_database
+from app.models.daily_actual import DailyActual, VisitRecord
+from app.dependencies import get_current_user
+from app.models.user import User
+from app.routers.public_advisory import feature_store, inference_executor, model_registry, _queue_full_error
+from app.services.ai_model.feature_store import ALL_DEPARTMENTS, DEFAULT_HOSPITAL
+from app.services.ai_model.inference_executor import InferenceQueueFull
+from app.services.ai_model.online_update import ACTUALS_COLLECTION, run_online_update
+
+router = APIRouter()
+
+@router.get("/actuals", response_model=List[DailyActual])
+async def read_actuals(
+    skip: int = 0,
+    limit: int = 100,
+    current_user: User = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> Any:
+    actuals = await db[ACTUALS_COLLECTION].find().sort("date", -1).skip(skip).limit(limit).to_list(length=limit)
+    return [DailyActual(**a) for a in actuals]
+
+@router.post("/actuals", response_model=DailyActual)
+async def record_actual(
+    actual: DailyActual,
+    current_user: User = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> Any:
+    # One document per day; re-posting a day corrects it
+    data = actual.dict(exclude={"id"})
+    await db[ACTUALS_COLLECTION].update_one({"date": actual.date}, {"$set": data}, upsert=True)
+    saved = await db[ACTUALS_COLLECTION].find_one({"date": actual.date})
+    feature_store.set_daily_total(actual.date, actual.patients)
+    return DailyActual(**saved)
+
+@router.post("/visits")
+async def record_visits(
+    visit: VisitRecord,
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    accepted = feature_store.record_visit(
+        visit.department, visit.timestamp, visit.count, visit.hospital_id
+    )
+    if not accepted:
+        raise HTTPException(status_code=400, detail="Visit is older than the feature window")
+    return {"status": "recorded"}
+
+@router.get("/features")
+async def read_features(
+    hospital_id: str = DEFAULT_HOSPITAL,
+    department: str = ALL_DEPARTMENTS,
+    target_date: Optional[datetime] = Query(default=None, description="Day to build features for (default today)"),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    features = feature_store.get_features(target_date, department, hospital_id)
+    if features is None:
+        raise HTTPException(status_code=404, detail="Not enough recorded history for this series")
+    return {"hospital_id": hospital_id, "department": department, "features": features}
+
+@router.post("/model/update")
+async def update_model(
+    force: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> Any:
+    try:
+        result = await run_online_update(
+            db, inference_executor, model_registry.root, force=force,
+            window_days=settings.ONLINE_UPDATE_WINDOW_DAYS,
+            trees_per_update=settings.ONLINE_UPDATE_TREES
+        )
+    except InferenceQueueFull as e:
+        raise _queue_full_error(e)
+    if result is None:
+        return {"status": "up_to_date", "version": model_registry.current_version()}
+    return {"status": "updated", **result}
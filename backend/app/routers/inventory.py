@@ -6,6 +6,7 @@ from app.models.inventory import InventoryItem
 from app.dependencies import get_current_user
 from app.models.user import User
 from app.models.common import PyObjectId
+from app.routers.public_advisory import inventory_projection
 
 router = APIRouter()
 
@@ -27,6 +28,7 @@ async def create_inventory_item(
 ) -> Any:
     new_item = await db.inventory.insert_one(item.dict(by_alias=True))
     created_item = await db.inventory.find_one({"_id": new_item.inserted_id})
+    inventory_projection.upsert(created_item)
     return InventoryItem(**created_item)
 
 @router.get("/{item_id}", response_model=InventoryItem)
@@ -57,6 +59,7 @@ async def update_inventory_item(
         {"$set": update_data}
     )
     updated_item = await db.inventory.find_one({"_id": PyObjectId(item_id)})
+    inventory_projection.upsert(updated_item)
     return InventoryItem(**updated_item)
 
 @router.delete("/{item_id}")
@@ -68,4 +71,5 @@ async def delete_inventory_item(
     result = await db.inventory.delete_one({"_id": PyObjectId(item_id)})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Item not found")
+    inventory_projection.remove(item_id)
     return {"status": "success"}
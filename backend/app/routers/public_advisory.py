@@ -1,13 +1,28 @@
 """Public Advisory API Router"""
 from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
-from datetime import datetime, timedelta
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Optional, Tuple
+from datetime import date, datetime, timedelta
+import functools
+import numpy as np
 import os
 
+from app.core.config import settings
 from app.models.advisory import (
     CurrentAdvisoryResponse,
     WeeklyForecastResponse,
     HealthRisksResponse,
+    HourlyForecastResponse,
+    HourlyDepartmentForecast,
+    ScenarioRequest,
+    ScenarioResponse,
+    ReconciledForecastRequest,
+    ReconciledForecastResponse,
+    ReconciledSeries,
+    BulkAdvisoryRequest,
+    BulkAdvisoryResponse,
+    LocationAdvisory,
+    DriftReportResponse,
     ModelInfoResponse,
     EnvironmentalFactors,
     HealthAdvisory,
@@ -15,27 +30,143 @@ from app.models.advisory import (
     ForecastDay
 )
 from app.services.ai_model.predictor import PatientLoadPredictor
+from app.services.ai_model.feature_store import ALL_DEPARTMENTS, DEFAULT_HOSPITAL, FeatureStore
+from app.services.ai_model.hourly_forecast import HourlyLoadForecaster, load_recent_history
+from app.services.ai_model.model_cache import ModelCache
+from app.services.ai_model.model_registry import DIRECT_REGISTRY_DIR, ModelRegistry
+from app.services.ai_model.prediction_cache import PredictionCache
+from app.services.ai_model.reconciliation import METHODS, Hierarchy, interval_variances, reconcile
+from app.services.ai_model.scenario_simulation import run_scenarios
+from app.services.ai_model.advisory_rules import AdvisoryRules
 from app.services.ai_model.decision_engine import AutonomousDecisionEngine
 from app.services.ai_model.llm_service import OllamaLLMService
+from app.services.ai_model.errors import InvalidRequest
+from app.services.ai_model.inference_executor import InferenceExecutor, InferenceQueueFull
+from app.services.ai_model.inventory_projection import FORECAST_DAYS, InventoryProjection
+from app.services.ai_model.staffing_optimizer import StaffingOptimizer, shift_loads, shift_start
 
 router = APIRouter(prefix="/api/public-advisory", tags=["Public Advisory"])
 
 # Initialize services
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "../services/ai_model/models/patient_predictor.pkl")
-predictor = PatientLoadPredictor(model_path=MODEL_PATH if os.path.exists(MODEL_PATH) else None)
-decision_engine = AutonomousDecisionEngine()
+model_registry = ModelRegistry()
+prediction_cache = PredictionCache(
+    maxsize=settings.PREDICTION_CACHE_SIZE,
+    ttl=settings.PREDICTION_CACHE_TTL_SECONDS,
+    aqi_bucket=settings.PREDICTION_CACHE_AQI_BUCKET,
+    temp_bucket=settings.PREDICTION_CACHE_TEMP_BUCKET
+)
+
+# Serve the registry's live version (hot-swapped on publish), falling back to the
+# legacy pickle until one exists. The model is loaded lazily on the first request.
+predictor = PatientLoadPredictor(
+    model_path=MODEL_PATH if os.path.exists(MODEL_PATH) else None,
+    registry=model_registry,
+    cache=prediction_cache
+)
+
+# Direct multi-horizon model (train_model.py --mode direct): a whole forecast
+# is one batched call; /forecast falls back to the recursive loop without it
+direct_predictor = PatientLoadPredictor(registry=ModelRegistry(DIRECT_REGISTRY_DIR))
+
+# Models published per hospital department (registry/hospitals/<hospital>/<department>),
+# loaded on demand under a memory budget; other requests use the global model
+model_cache = ModelCache(
+    max_bytes=settings.MODEL_CACHE_MAX_MB * 1024 * 1024,
+    fallback=predictor
+)
+
+# Hourly per-department curves (train_model.py --mode hourly)
+VISITS_PATH = os.path.join(os.path.dirname(__file__), "../../notebooks/patient_visits.csv")
+hourly_forecaster = HourlyLoadForecaster()
+# Daily visit totals per hospital/department for lag features, synced with
+# the per-day counters in MongoDB by main.py
+feature_store = FeatureStore()
+# Advisory rules are re-read when the table file changes (ADVISORY_RULES_PATH
+# overrides the bundled advisory_rules.json)
+decision_engine = AutonomousDecisionEngine(
+    rules=AdvisoryRules(settings.ADVISORY_RULES_PATH) if settings.ADVISORY_RULES_PATH else None
+)
 llm_service = OllamaLLMService()
+# Stock depletion against the network forecast, kept current by the inventory
+# router's writes (/reports/inventory-forecast)
+inventory_projection = InventoryProjection(
+    decision_engine.supply_rates,
+    decision_engine.safety_stock_days,
+    lead_time_days=settings.INVENTORY_LEAD_TIME_DAYS,
+    forecast_ttl=settings.PREDICTION_CACHE_TTL_SECONDS,
+    refresh_interval=settings.INVENTORY_REFRESH_SECONDS
+)
+# Shift reassignments from Staff.schedule against the hourly department forecast
+staffing_optimizer = StaffingOptimizer(decision_engine.staffing_ratios)
+
+# CPU-bound predictor and decision-engine work runs here, never on the event loop
+inference_executor = InferenceExecutor(
+    kind=settings.INFERENCE_EXECUTOR,
+    max_workers=settings.INFERENCE_MAX_WORKERS,
+    max_queue=settings.INFERENCE_MAX_QUEUE
+)
+
+
+# Department series per /reconciled-forecast request
+MAX_RECONCILED_SERIES = 5000
+
+# Locations per /bulk-advisories request
+MAX_BULK_LOCATIONS = 10000
+
+# Staff document fields the staffing optimizer reads
+STAFF_PLAN_FIELDS = {'name': 1, 'role': 1, 'department': 1, 'schedule': 1}
+
+# Typical recent load, used until the feature store has a week of visits
+COLD_START_HISTORY = {
+    'lag1': 320,
+    'lag2': 315,
+    'lag7': 310,
+    'roll7': 318
+}
+
+
+def get_historical_data(
+    target_date: datetime,
+    hospital_id: Optional[str] = None,
+    department: Optional[str] = None
+) -> dict:
+    """Lag and rolling features for a day from the feature store (constant time)"""
+    features = feature_store.get_features(
+        target_date,
+        department or ALL_DEPARTMENTS,
+        hospital_id or DEFAULT_HOSPITAL
+    )
+    return features or dict(COLD_START_HISTORY)
+
+
+def select_predictor(hospital_id: Optional[str] = None, department: Optional[str] = None) -> PatientLoadPredictor:
+    """Model of a hospital department from the model cache, else the global model (may load from disk)"""
+    if hospital_id is None and department is None:
+        return predictor
+    return model_cache.get(hospital_id or DEFAULT_HOSPITAL, department or ALL_DEPARTMENTS)
+
 
+@functools.lru_cache(maxsize=1)
+def _load_hourly_history(path: str, modified: float) -> dict:
+    return load_recent_history(path)
 
-def get_mock_historical_data() -> dict:
-    """Get mock historical data for lag features"""
+
+def get_recent_hourly_history() -> Optional[dict]:
+    """Last week of hourly counts per department, re-read when the visits file changes"""
     # In production, this would fetch from database
-    return {
-        'lag1': 320,
-        'lag2': 315,
-        'lag7': 310,
-        'roll7': 318
-    }
+    try:
+        return _load_hourly_history(VISITS_PATH, os.path.getmtime(VISITS_PATH))
+    except OSError:
+        return None
+
+
+def latest_hourly_history() -> dict:
+    """The visits history or the hourly model's training snapshot, whichever ends later"""
+    histories = [h for h in (get_recent_hourly_history(), hourly_forecaster.default_history()) if h]
+    if not histories:
+        raise ValueError("No hourly history available")
+    return max(histories, key=lambda history: datetime.fromisoformat(history['end']))
 
 
 def get_current_environmental_factors() -> dict:
@@ -54,8 +185,433 @@ def get_current_environmental_factors() -> dict:
     }
 
 
+def _compute_current_advisory(
+    current_date: datetime,
+    env_factors: dict,
+    historical_data: dict,
+    hospital_id: Optional[str] = None,
+    department: Optional[str] = None
+) -> dict:
+    """Prediction, load level, advisories and tips for one day (runs on the inference executor)"""
+    prediction_result = select_predictor(hospital_id, department).predict_patient_load(
+        current_date,
+        env_factors,
+        historical_data
+    )
+    
+    # Classify load
+    load_level = decision_engine.classify_load(prediction_result['prediction'])
+    
+    # Generate advisories
+    advisories = decision_engine.generate_patient_advisory(
+        prediction_result['prediction'],
+        env_factors
+    )
+    
+    # Get health tips
+    health_tips = decision_engine.get_health_tips(load_level, env_factors)
+    
+    return {
+        'prediction_result': prediction_result,
+        'load_level': load_level,
+        'advisories': advisories,
+        'health_tips': health_tips
+    }
+
+
+def _simulate_forecast_env(base_env: dict, days: int) -> list:
+    """Environmental factors per forecast day"""
+    env_rows = []
+    for day_offset in range(days):
+        # Simulate environmental changes (in production, use weather forecast API)
+        env_factors = base_env.copy()
+        env_factors['AQI'] = base_env['AQI'] + (day_offset * 5) % 100  # Simulated variation
+        env_factors['temp'] = base_env['temp'] + (day_offset % 3) - 1  # Small variation
+        env_rows.append(env_factors)
+    return env_rows
+
+
+def _select_forecaster(hospital_id: Optional[str], department: Optional[str]) -> PatientLoadPredictor:
+    """Department model if published; globally the direct model when trained, else the recursive one"""
+    forecaster = select_predictor(hospital_id, department)
+    if forecaster is predictor and direct_predictor.is_trained() and direct_predictor.is_direct():
+        return direct_predictor
+    return forecaster
+
+
+def _forecast_series(
+    forecaster: PatientLoadPredictor,
+    current_date: datetime,
+    env_rows: list,
+    histories: list
+) -> list:
+    """
+    Daily forecasts for several series served by the same model, one list per history
+    
+    A direct model scores every (series, day) in one batch; a recursive model
+    takes one batch per day, feeding each series its own predictions as lags.
+    """
+    days = len(env_rows)
+    dates = [current_date + timedelta(days=offset) for offset in range(days)]
+    
+    if forecaster.is_trained() and forecaster.is_direct():
+        flat = forecaster.predict_batch(
+            dates * len(histories),
+            list(env_rows) * len(histories),
+            [history for history in histories for _ in range(days)],
+            horizons=list(range(1, days + 1)) * len(histories)
+        )
+        return [flat[i * days:(i + 1) * days] for i in range(len(histories))]
+    
+    histories = [dict(history) for history in histories]
+    results = [[] for _ in histories]
+    for day_offset, (forecast_date, env_factors) in enumerate(zip(dates, env_rows)):
+        # Recursive fallback: one-step model fed with its own predictions
+        step = forecaster.predict_batch(
+            [forecast_date] * len(histories),
+            [env_factors] * len(histories),
+            histories,
+            horizons=[day_offset + 1] * len(histories)
+        )
+        for history, result, prediction in zip(histories, results, step):
+            result.append(prediction)
+            # Update historical data for next prediction
+            history['lag7'] = history['lag2']
+            history['lag2'] = history['lag1']
+            history['lag1'] = prediction['prediction']
+            history['roll7'] = (history['roll7'] * 6 + prediction['prediction']) / 7
+    return results
+
+
+def _compute_weekly_forecast(
+    current_date: datetime,
+    days: int,
+    base_env: dict,
+    historical_data: dict,
+    hospital_id: Optional[str] = None,
+    department: Optional[str] = None
+) -> list:
+    """Multi-day forecast (runs on the inference executor)"""
+    forecast_days = []
+    env_rows = _simulate_forecast_env(base_env, days)
+    forecaster = _select_forecaster(hospital_id, department)
+    predictions = _forecast_series(forecaster, current_date, env_rows, [historical_data])[0]
+    
+    # Load levels and advisories for the whole horizon in one pass
+    patients = np.array([prediction['prediction'] for prediction in predictions])
+    load_levels = decision_engine.classify_loads(patients)
+    advisories = decision_engine.generate_patient_advisories(patients, {
+        name: [env_factors[name] for env_factors in env_rows]
+        for name in ('AQI', 'temp', 'epidemic_alert_level')
+    })
+    
+    for day_offset, env_factors in enumerate(env_rows):
+        forecast_date = current_date + timedelta(days=day_offset)
+        day_advisories = advisories[day_offset]
+        
+        forecast_days.append(ForecastDay(
+            date=forecast_date.strftime('%Y-%m-%d'),
+            predicted_patients=predictions[day_offset]['prediction'],
+            load_level=str(load_levels[day_offset]),
+            aqi=env_factors['AQI'],
+            temp=env_factors['temp'],
+            epidemic_alert=env_factors['epidemic_alert_level'],
+            key_advisory=day_advisories[0]['message'] if day_advisories else None
+        ))
+    
+    return forecast_days
+
+
+def _compute_daily_patients(current_date: datetime, base_env: dict, historical_data: dict) -> list:
+    """Network patient forecast for the inventory projection (runs on the inference executor)"""
+    env_rows = _simulate_forecast_env(base_env, FORECAST_DAYS)
+    forecaster = _select_forecaster(None, None)
+    predictions = _forecast_series(forecaster, current_date, env_rows, [historical_data])[0]
+    return [prediction['prediction'] for prediction in predictions]
+
+
+async def refresh_inventory_projection(db) -> InventoryProjection:
+    """Re-read stock and the forecast when they are due; unchanged rows stay cached"""
+    if inventory_projection.needs_items():
+        inventory_projection.sync(await db.inventory.find().to_list(length=None))
+    if inventory_projection.needs_forecast():
+        current_date = datetime.now()
+        daily_patients = await inference_executor.run(
+            _compute_daily_patients,
+            current_date,
+            get_current_environmental_factors(),
+            get_historical_data(current_date)
+        )
+        inventory_projection.set_forecast(current_date.date(), daily_patients)
+    return inventory_projection
+
+
+def _compute_staffing_plan(staff: list, day: date) -> dict:
+    """Shift loads per department and the reassignment plan for a day (runs on the inference executor)"""
+    forecast = _compute_hourly_forecast(shift_start(day), 24, None)
+    loads = {
+        dept.department: shift_loads(dept.predicted_patients).tolist()
+        for dept in forecast.departments
+    }
+    plan = staffing_optimizer.plan(staff, day, loads)
+    plan['forecast_method'] = forecast.method
+    return plan
+
+
+async def compute_staffing_plan(staff: list, day: date) -> dict:
+    """Reassignment plan for a schedule date; staff are documents read with STAFF_PLAN_FIELDS"""
+    return await inference_executor.run(_compute_staffing_plan, staff, day)
+
+
+def _compute_health_risks(
+    current_date: datetime,
+    env_factors: dict,
+    historical_data: dict,
+    hospital_id: Optional[str] = None,
+    department: Optional[str] = None
+) -> HealthRisksResponse:
+    """Risk assessment for the current day (runs on the inference executor)"""
+    # Make prediction
+    prediction = select_predictor(hospital_id, department).predict_patient_load(
+        current_date, env_factors, historical_data
+    )
+    load_level = decision_engine.classify_load(prediction['prediction'])
+    
+    # Capacity, air quality and epidemic risks from the advisory rule table
+    risks, risk_levels = decision_engine.assess_health_risks(prediction['prediction'], env_factors)
+    
+    # Get recommendations
+    recommendations = decision_engine.get_health_tips(load_level, env_factors)
+    
+    return HealthRisksResponse(
+        current_risks=risks[0],
+        risk_level=str(risk_levels[0]),
+        recommendations=recommendations
+    )
+
+
+def _compute_bulk_advisories(request: BulkAdvisoryRequest) -> BulkAdvisoryResponse:
+    """Advisory rules for every location at once (runs on the inference executor)"""
+    locations = request.locations
+    if len(locations) > MAX_BULK_LOCATIONS:
+        raise InvalidRequest(f"At most {MAX_BULK_LOCATIONS} locations per request")
+    
+    patients = np.array([
+        np.nan if loc.predicted_patients is None else loc.predicted_patients for loc in locations
+    ])
+    conditions = {
+        name: np.array([getattr(loc, name) for loc in locations])
+        for name in ('AQI', 'temp', 'epidemic_alert_level')
+    }
+    load_levels = np.where(np.isnan(patients), None, decision_engine.classify_loads(np.nan_to_num(patients)))
+    
+    advisories = decision_engine.generate_patient_advisories(patients, conditions)
+    risks, risk_levels = decision_engine.assess_health_risks(patients, conditions)
+    tips = decision_engine.get_health_tips_array(load_levels, conditions)
+    
+    return BulkAdvisoryResponse(results=[
+        LocationAdvisory(
+            location=loc.location,
+            load_level=load_levels[i],
+            risk_level=str(risk_levels[i]),
+            advisories=[HealthAdvisory(**adv) for adv in advisories[i]],
+            risks=risks[i],
+            health_tips=tips[i]
+        )
+        for i, loc in enumerate(locations)
+    ])
+
+
+def _compute_hourly_forecast(start: datetime, hours: int, department: Optional[str]) -> HourlyForecastResponse:
+    """Hourly per-department curve in one vectorized call (runs on the inference executor)"""
+    days = (start + timedelta(hours=hours - 1)).date().toordinal() - start.date().toordinal() + 1
+    env_rows = _simulate_forecast_env(get_current_environmental_factors(), days)
+    history = latest_hourly_history()
+    
+    result = hourly_forecaster.forecast(
+        start,
+        hours,
+        lambda offset: env_rows[offset],
+        history=history,
+        departments=[department] if department else None
+    )
+    
+    total = result['predictions'].sum(axis=0)
+    return HourlyForecastResponse(
+        start=result['timestamps'][0],
+        hours=hours,
+        timestamps=result['timestamps'],
+        departments=[
+            HourlyDepartmentForecast(
+                department=dept,
+                predicted_patients=result['predictions'][i].round(2).tolist(),
+                lower=result['lower'][i].round(2).tolist(),
+                upper=result['upper'][i].round(2).tolist()
+            )
+            for i, dept in enumerate(result['departments'])
+        ],
+        total_patients=total.round(2).tolist(),
+        peak_hour=result['timestamps'][int(total.argmax())],
+        method=result['method'],
+        model_version=result['model_version'],
+        history_end=datetime.fromisoformat(history['end'])
+    )
+
+
+async def hourly_forecast(hours: int = 24, department: Optional[str] = None) -> HourlyForecastResponse:
+    """Hourly forecast starting at the next full hour (shared with the staff dashboard)"""
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    return await inference_executor.run(_compute_hourly_forecast, start, hours, department)
+
+
+def _compute_scenarios(current_date: datetime, request: ScenarioRequest, historical_data: dict) -> ScenarioResponse:
+    """Monte Carlo what-if run (runs on the inference executor)"""
+    # Same forecaster choice as /forecast
+    forecaster = _select_forecaster(request.hospital_id, request.department)
+    method = 'direct' if forecaster.is_direct() else 'recursive'
+    
+    base_env = request.dict(include={
+        'AQI', 'temp', 'rainfall', 'epidemic_alert_level', 'holiday_flag', 'festival_flag'
+    })
+    sampling = request.dict(include={
+        'aqi_volatility', 'temp_volatility', 'rain_probability',
+        'epidemic_escalation', 'epidemic_recovery', 'event_days'
+    })
+    summary = run_scenarios(
+        forecaster,
+        decision_engine,
+        current_date,
+        base_env,
+        historical_data,
+        n_scenarios=request.n_scenarios,
+        days=request.days,
+        seed=request.seed,
+        **sampling
+    )
+    return ScenarioResponse(**summary, method=method, model_version=forecaster.version)
+
+
+def _reconciled_histories(current_date: datetime, request: ReconciledForecastRequest) -> Dict[Tuple[str, str], dict]:
+    """Lag features of every hospital total and department series of a request"""
+    hospitals, departments = set(request.hospitals), set(request.departments)
+    if len(hospitals) * len(departments) > MAX_RECONCILED_SERIES:
+        raise InvalidRequest(f"At most {MAX_RECONCILED_SERIES} department series can be reconciled per request")
+    if request.method not in METHODS:
+        raise InvalidRequest(f"Unknown reconciliation method '{request.method}', expected one of {METHODS}")
+    return {
+        (hospital_id, department): get_historical_data(current_date, hospital_id, department)
+        for hospital_id in hospitals
+        for department in departments | {ALL_DEPARTMENTS}
+    }
+
+
+def _compute_reconciled_forecast(
+    current_date: datetime,
+    request: ReconciledForecastRequest,
+    histories: Dict[Tuple[str, str], dict]
+) -> ReconciledForecastResponse:
+    """Department, hospital and network forecasts that add up (runs on the inference executor)"""
+    hierarchy = Hierarchy([(hospital, dept) for hospital in request.hospitals for dept in request.departments])
+    if hierarchy.n_bottom > MAX_RECONCILED_SERIES:
+        raise InvalidRequest(f"At most {MAX_RECONCILED_SERIES} department series can be reconciled per request")
+    env_rows = _simulate_forecast_env(get_current_environmental_factors(), request.days)
+    
+    # Group series by serving model so each model forecasts all of its series in one pass
+    groups = {}
+    for path in hierarchy.series[1:]:
+        hospital_id, department = path[0], path[1] if len(path) == 2 else ALL_DEPARTMENTS
+        if len(path) == 2:
+            forecaster = select_predictor(hospital_id, department)
+            if forecaster is predictor:
+                raise InvalidRequest(f"No model published for department {department} of hospital {hospital_id}")
+        else:
+            forecaster = _select_forecaster(hospital_id, department)
+        groups.setdefault(id(forecaster), (forecaster, []))[1].append((path, hospital_id, department))
+    
+    shape = (len(hierarchy.series), request.days)
+    base, lower, upper = np.zeros(shape), np.zeros(shape), np.zeros(shape)
+    versions = {}
+    for forecaster, members in groups.values():
+        group_histories = [histories[(hospital_id, dept)] for _, hospital_id, dept in members]
+        for (path, _, _), predictions in zip(members, _forecast_series(forecaster, current_date, env_rows, group_histories)):
+            row = hierarchy.index[path]
+            base[row] = [p['prediction'] for p in predictions]
+            lower[row] = [p['confidence_interval']['lower'] for p in predictions]
+            upper[row] = [p['confidence_interval']['upper'] for p in predictions]
+            versions[row] = forecaster.version
+    
+    variances = interval_variances(lower, upper)
+    # No model forecasts the whole network: its base is the sum of the hospital totals
+    hospitals = [hierarchy.index[(hospital,)] for hospital in sorted(set(request.hospitals))]
+    base[0], variances[0] = base[hospitals].sum(axis=0), variances[hospitals].sum(axis=0)
+    lower[0] = np.maximum(0, base[0] - 1.96 * np.sqrt(variances[0]))
+    upper[0] = base[0] + 1.96 * np.sqrt(variances[0])
+    
+    reconciled = reconcile(hierarchy, base, request.method, variances)
+    shift = reconciled - base
+    levels = ['network', 'hospital', 'department']
+    return ReconciledForecastResponse(
+        dates=[(current_date + timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(request.days)],
+        method=request.method,
+        max_incoherence=float(np.abs(hierarchy.incoherence(base)).max()),
+        series=[
+            ReconciledSeries(
+                level=levels[len(path)],
+                hospital_id=path[0] if path else None,
+                department=path[1] if len(path) == 2 else ALL_DEPARTMENTS,
+                base=base[row].round(2).tolist(),
+                reconciled=reconciled[row].round(2).tolist(),
+                lower=np.maximum(0, lower[row] + shift[row]).round(2).tolist(),
+                upper=(upper[row] + shift[row]).round(2).tolist(),
+                model_version=versions.get(row)
+            )
+            for row, path in enumerate(hierarchy.series)
+        ]
+    )
+
+
+# Served models whose live inputs /drift can report on
+DRIFT_MODELS = ("daily", "direct", "hourly")
+
+
+def _compute_drift_report(model: str, hospital_id: Optional[str], department: Optional[str]) -> DriftReportResponse:
+    if model not in DRIFT_MODELS:
+        raise InvalidRequest(f"Unknown model '{model}', expected one of {DRIFT_MODELS}")
+    if model == "daily":
+        forecaster = select_predictor(hospital_id, department)
+    elif hospital_id is not None or department is not None:
+        raise InvalidRequest(f"The {model} model is not published per hospital department")
+    else:
+        forecaster = direct_predictor if model == "direct" else hourly_forecaster.predictor
+    report = forecaster.drift_report()
+    if report is None:
+        # Models saved before training profiles existed (e.g. the legacy pickle)
+        return DriftReportResponse(model_version=forecaster.version, status="unavailable")
+    return DriftReportResponse(model_version=forecaster.version, **report)
+
+
+def _compute_model_info() -> dict:
+    """Model status fields that may trigger a lazy load (runs on the inference executor)"""
+    metadata = predictor.metadata
+    drift = predictor.drift_report()
+    return {
+        'model_loaded': predictor.is_trained(),
+        'metadata': metadata,
+        'version': predictor.version,
+        'feature_importance': predictor.get_feature_importance(),
+        'drift': {key: value for key, value in drift.items() if key != 'features'} if drift else {}
+    }
+
+
+def _queue_full_error(e: InferenceQueueFull) -> HTTPException:
+    return HTTPException(status_code=503, detail=f"Inference service busy: {str(e)}", headers={"Retry-After": "1"})
+
+
 @router.get("/current", response_model=CurrentAdvisoryResponse)
-async def get_current_advisory():
+async def get_current_advisory(
+    hospital_id: Optional[str] = Query(default=None, description="Hospital whose model and history to use"),
+    department: Optional[str] = Query(default=None, description="Department whose model and history to use (e.g. ER)")
+):
     """Get current day health advisory with AI predictions"""
     try:
         current_date = datetime.now()
@@ -64,31 +620,27 @@ async def get_current_advisory():
         env_factors = get_current_environmental_factors()
         
         # Get historical data for lag features
-        historical_data = get_mock_historical_data()
+        historical_data = get_historical_data(current_date, hospital_id, department)
         
-        # Make prediction
-        prediction_result = predictor.predict_patient_load(
+        # Prediction and decision engine work runs off the event loop
+        result = await inference_executor.run(
+            _compute_current_advisory,
             current_date,
             env_factors,
-            historical_data
+            historical_data,
+            hospital_id,
+            department
         )
+        prediction_result = result['prediction_result']
+        load_level = result['load_level']
+        advisories = result['advisories']
+        health_tips = result['health_tips']
         
-        # Classify load
-        load_level = decision_engine.classify_load(prediction_result['prediction'])
-        
-        # Generate advisories
-        advisories = decision_engine.generate_patient_advisory(
-            prediction_result['prediction'],
-            env_factors
-        )
-        
-        # Get health tips
-        health_tips = decision_engine.get_health_tips(load_level, env_factors)
-        
-        # Try to get LLM reasoning (optional)
+        # Try to get LLM reasoning (optional); blocking HTTP calls go to a worker thread
         llm_reasoning = None
-        if llm_service.is_available():
-            llm_reasoning = llm_service.generate_advisory_reasoning(
+        if await run_in_threadpool(llm_service.is_available):
+            llm_reasoning = await run_in_threadpool(
+                llm_service.generate_advisory_reasoning,
                 prediction_result['prediction'],
                 load_level,
                 env_factors,
@@ -96,7 +648,7 @@ async def get_current_advisory():
             )
             
             # Get enhanced health tips from LLM
-            llm_tips = llm_service.generate_health_tips(env_factors)
+            llm_tips = await run_in_threadpool(llm_service.generate_health_tips, env_factors)
             if llm_tips:
                 health_tips.extend(llm_tips)
         
@@ -114,61 +666,38 @@ async def get_current_advisory():
             health_tips=health_tips[:8],  # Limit to 8 tips
             llm_reasoning=llm_reasoning
         )
-        
+    
+    except InferenceQueueFull as e:
+        raise _queue_full_error(e)
+    except InvalidRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating advisory: {str(e)}")
 
 
 @router.get("/forecast", response_model=WeeklyForecastResponse)
-async def get_weekly_forecast(days: int = Query(default=7, ge=1, le=14)):
+async def get_weekly_forecast(
+    days: int = Query(default=7, ge=1, le=14),
+    hospital_id: Optional[str] = Query(default=None, description="Hospital whose model and history to use"),
+    department: Optional[str] = Query(default=None, description="Department whose model and history to use (e.g. ER)")
+):
     """Get multi-day forecast"""
     try:
-        forecast_days = []
         current_date = datetime.now()
         
         # Get base environmental factors
         base_env = get_current_environmental_factors()
-        historical_data = get_mock_historical_data()
+        historical_data = get_historical_data(current_date, hospital_id, department)
         
-        for day_offset in range(days):
-            forecast_date = current_date + timedelta(days=day_offset)
-            
-            # Simulate environmental changes (in production, use weather forecast API)
-            env_factors = base_env.copy()
-            env_factors['AQI'] = base_env['AQI'] + (day_offset * 5) % 100  # Simulated variation
-            env_factors['temp'] = base_env['temp'] + (day_offset % 3) - 1  # Small variation
-            
-            # Make prediction
-            prediction = predictor.predict_patient_load(
-                forecast_date,
-                env_factors,
-                historical_data
-            )
-            
-            load_level = decision_engine.classify_load(prediction['prediction'])
-            
-            # Generate key advisory
-            advisories = decision_engine.generate_patient_advisory(
-                prediction['prediction'],
-                env_factors
-            )
-            key_advisory = advisories[0]['message'] if advisories else None
-            
-            forecast_days.append(ForecastDay(
-                date=forecast_date.strftime('%Y-%m-%d'),
-                predicted_patients=prediction['prediction'],
-                load_level=load_level,
-                aqi=env_factors['AQI'],
-                temp=env_factors['temp'],
-                epidemic_alert=env_factors['epidemic_alert_level'],
-                key_advisory=key_advisory
-            ))
-            
-            # Update historical data for next prediction
-            historical_data['lag7'] = historical_data['lag2']
-            historical_data['lag2'] = historical_data['lag1']
-            historical_data['lag1'] = prediction['prediction']
-            historical_data['roll7'] = (historical_data['roll7'] * 6 + prediction['prediction']) / 7
+        forecast_days = await inference_executor.run(
+            _compute_weekly_forecast,
+            current_date,
+            days,
+            base_env,
+            historical_data,
+            hospital_id,
+            department
+        )
         
         # Calculate trends
         trends = {
@@ -182,74 +711,104 @@ async def get_weekly_forecast(days: int = Query(default=7, ge=1, le=14)):
             forecast=forecast_days,
             trends=trends
         )
-        
+    
+    except InferenceQueueFull as e:
+        raise _queue_full_error(e)
+    except InvalidRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating forecast: {str(e)}")
 
 
+@router.get("/hourly-forecast", response_model=HourlyForecastResponse)
+async def get_hourly_forecast(
+    hours: int = Query(default=24, ge=1, le=72),
+    department: Optional[str] = Query(default=None, description="Limit to one department (e.g. ER)")
+):
+    """Get hourly per-department patient arrival forecast"""
+    try:
+        return await hourly_forecast(hours, department)
+    except InferenceQueueFull as e:
+        raise _queue_full_error(e)
+    except InvalidRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating hourly forecast: {str(e)}")
+
+
+@router.post("/scenarios", response_model=ScenarioResponse)
+async def simulate_scenarios(request: ScenarioRequest):
+    """Monte Carlo what-if simulation: quantile bands for load, staffing and supplies"""
+    try:
+        current_date = datetime.now()
+        historical_data = get_historical_data(current_date, request.hospital_id, request.department)
+        return await inference_executor.run(
+            _compute_scenarios,
+            current_date,
+            request,
+            historical_data
+        )
+    except InferenceQueueFull as e:
+        raise _queue_full_error(e)
+    except InvalidRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error simulating scenarios: {str(e)}")
+
+
+@router.post("/reconciled-forecast", response_model=ReconciledForecastResponse)
+async def get_reconciled_forecast(request: ReconciledForecastRequest):
+    """Daily forecasts for departments, hospitals and the network that add up at every level"""
+    try:
+        current_date = datetime.now()
+        # Feature store reads stay on the event loop, off the executor
+        histories = _reconciled_histories(current_date, request)
+        return await inference_executor.run(_compute_reconciled_forecast, current_date, request, histories)
+    except InferenceQueueFull as e:
+        raise _queue_full_error(e)
+    except InvalidRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reconciling forecasts: {str(e)}")
+
+
+@router.post("/bulk-advisories", response_model=BulkAdvisoryResponse)
+async def check_bulk_advisories(request: BulkAdvisoryRequest):
+    """Advisories, risks and tips for many locations in one rule-table pass"""
+    try:
+        return await inference_executor.run(_compute_bulk_advisories, request)
+    except InferenceQueueFull as e:
+        raise _queue_full_error(e)
+    except InvalidRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error checking advisories: {str(e)}")
+
+
 @router.get("/health-risks", response_model=HealthRisksResponse)
-async def get_current_health_risks():
+async def get_current_health_risks(
+    hospital_id: Optional[str] = Query(default=None, description="Hospital whose model and history to use"),
+    department: Optional[str] = Query(default=None, description="Department whose model and history to use (e.g. ER)")
+):
     """Get current health risks and recommendations"""
     try:
         env_factors = get_current_environmental_factors()
-        historical_data = get_mock_historical_data()
         current_date = datetime.now()
+        historical_data = get_historical_data(current_date, hospital_id, department)
         
-        # Make prediction
-        prediction = predictor.predict_patient_load(current_date, env_factors, historical_data)
-        load_level = decision_engine.classify_load(prediction['prediction'])
-        
-        # Build risk assessment
-        risks = []
-        
-        # Hospital capacity risk
-        if load_level in ['HIGH', 'CRITICAL']:
-            risks.append({
-                'title': 'High Hospital Capacity',
-                'severity': load_level,
-                'description': f'Expected {int(prediction["prediction"])} patients. Longer wait times anticipated.',
-                'icon': '🏥'
-            })
-        
-        # Air quality risk
-        aqi = env_factors['AQI']
-        if aqi > 200:
-            severity = 'CRITICAL' if aqi > 300 else 'HIGH'
-            risks.append({
-                'title': 'Poor Air Quality',
-                'severity': severity,
-                'description': f'AQI at {aqi}. Respiratory issues may increase.',
-                'icon': '🏭'
-            })
-        
-        # Epidemic risk
-        if env_factors['epidemic_alert_level'] > 0:
-            risks.append({
-                'title': 'Epidemic Alert',
-                'severity': 'CRITICAL' if env_factors['epidemic_alert_level'] >= 2 else 'MEDIUM',
-                'description': f'Alert level {env_factors["epidemic_alert_level"]}. Follow safety protocols.',
-                'icon': '🦠'
-            })
-        
-        # Determine overall risk level
-        if any(r['severity'] == 'CRITICAL' for r in risks):
-            overall_risk = 'CRITICAL'
-        elif any(r['severity'] == 'HIGH' for r in risks):
-            overall_risk = 'HIGH'
-        elif risks:
-            overall_risk = 'MEDIUM'
-        else:
-            overall_risk = 'LOW'
-        
-        # Get recommendations
-        recommendations = decision_engine.get_health_tips(load_level, env_factors)
-        
-        return HealthRisksResponse(
-            current_risks=risks,
-            risk_level=overall_risk,
-            recommendations=recommendations
+        return await inference_executor.run(
+            _compute_health_risks,
+            current_date,
+            env_factors,
+            historical_data,
+            hospital_id,
+            department
         )
-        
+    
+    except InferenceQueueFull as e:
+        raise _queue_full_error(e)
+    except InvalidRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error assessing health risks: {str(e)}")
 
@@ -258,16 +817,45 @@ async def get_current_health_risks():
 async def get_model_info():
     """Get AI model information and status"""
     try:
+        info = await inference_executor.run(_compute_model_info)
+        metadata = info['metadata']
+        training_window = metadata.get('training_window', {})
         return ModelInfoResponse(
-            model_loaded=predictor.model is not None,
-            llm_available=llm_service.is_available(),
-            last_training_date="2024-12-31",  # Would come from model metadata
-            feature_importance=predictor.get_feature_importance()
+            model_loaded=info['model_loaded'],
+            llm_available=await run_in_threadpool(llm_service.is_available),
+            last_training_date=training_window.get('end'),
+            model_version=info['version'],
+            trained_at=metadata.get('trained_at'),
+            metrics=metadata.get('metrics', {}),
+            prediction_cache=prediction_cache.stats(),
+            model_cache=model_cache.stats(),
+            inference_executor=inference_executor.stats(),
+            drift=info['drift'],
+            feature_importance=info['feature_importance']
         )
+    except InferenceQueueFull as e:
+        raise _queue_full_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting model info: {str(e)}")
 
 
+@router.get("/drift", response_model=DriftReportResponse)
+async def get_drift_report(
+    model: str = Query(default="daily", description="daily (one-step), direct (multi-horizon) or hourly"),
+    hospital_id: Optional[str] = Query(default=None, description="Hospital whose model to inspect"),
+    department: Optional[str] = Query(default=None, description="Department whose model to inspect (e.g. ER)")
+):
+    """Drift of live prediction inputs from the served model's training data"""
+    try:
+        return await inference_executor.run(_compute_drift_report, model, hospital_id, department)
+    except InferenceQueueFull as e:
+        raise _queue_full_error(e)
+    except InvalidRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing drift report: {str(e)}")
+
+
 @router.get("/environmental-factors", response_model=EnvironmentalFactors)
 async def get_environmental_factors():
     """Get current environmental factors"""
@@ -1,7 +1,16 @@
-from typing import Any
-from fastapi import APIRouter, Depends
+from datetime import date, datetime
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.database import get_database
 from app.dependencies import get_current_user
 from app.models.user import User
+from app.routers.public_advisory import (
+    STAFF_PLAN_FIELDS, compute_staffing_plan, refresh_inventory_projection, _queue_full_error
+)
+from app.services.ai_model.inference_executor import InferenceQueueFull
+from app.services.ai_model.inventory_projection import STATUSES
+from app.services.ai_model.staffing_optimizer import shift_of
 
 router = APIRouter()
 
@@ -13,9 +22,17 @@ async def department_performance(
 
 @router.get("/staff-readiness")
 async def staff_readiness(
-    current_user: User = Depends(get_current_user)
+    day: Optional[date] = Query(default=None, description="Schedule date to plan (default: the current shift's)"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
 ) -> Any:
-    return {"status": "success", "data": "Staff readiness breakdown"}
+    # Coverage per department, shift and role, and the reassignments that close the gaps
+    staff_members = await db.staff.find({}, STAFF_PLAN_FIELDS).to_list(length=None)
+    try:
+        plan = await compute_staffing_plan(staff_members, day or shift_of(datetime.now())[0])
+    except InferenceQueueFull as e:
+        raise _queue_full_error(e)
+    return {"status": "success", "data": plan}
 
 @router.get("/surge-analysis")
 async def surge_analysis(
@@ -25,9 +42,20 @@ async def surge_analysis(
 
 @router.get("/inventory-forecast")
 async def inventory_forecast(
-    current_user: User = Depends(get_current_user)
+    status: Optional[str] = Query(default=None, description=f"Only items with this status ({', '.join(STATUSES)})"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
 ) -> Any:
-    return {"status": "success", "data": "Inventory forecast"}
+    if status is not None and status not in STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of {STATUSES}")
+    try:
+        projection = await refresh_inventory_projection(db)
+        report = projection.report()
+    except InferenceQueueFull as e:
+        raise _queue_full_error(e)
+    if status is not None:
+        report['items'] = [item for item in report['items'] if item['status'] == status]
+    return {"status": "success", "data": report}
 
 @router.get("/export/{report_type}")
 async def export_report(
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import List, Any
 from fastapi import APIRouter, Depends, HTTPException
 from motor.motor_asyncio import AsyncIOMotorDatabase
@@ -6,6 +7,9 @@ from app.models.staff import Staff
 from app.dependencies import get_current_user
 from app.models.user import User
 from app.models.common import PyObjectId
+from app.routers.public_advisory import STAFF_PLAN_FIELDS, compute_staffing_plan, _queue_full_error
+from app.services.ai_model.inference_executor import InferenceQueueFull
+from app.services.ai_model.staffing_optimizer import engine_role, shift_of, staff_readiness
 
 router = APIRouter()
 
@@ -14,28 +18,23 @@ async def get_staff_readiness(
     current_user: User = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ) -> Any:
-    pipeline = [
-        {
-            "$group": {
-                "_id": "$role",
-                "total": {"$sum": 1}
-            }
-        }
-    ]
-    stats = await db.staff.aggregate(pipeline).to_list(length=None)
-    # Mocking onDuty and available for now as they depend on complex scheduling logic
+    # Readiness for the shift running now, with what the forecast requires of it
+    day, shift = shift_of(datetime.now())
+    staff_members = await db.staff.find({}, STAFF_PLAN_FIELDS).to_list(length=None)
+    try:
+        plan = await compute_staffing_plan(staff_members, day)
+    except InferenceQueueFull as e:
+        raise _queue_full_error(e)
+    required = {}
+    for cell in plan["coverage"]:
+        if cell["shift"] == shift:
+            required[cell["role"]] = required.get(cell["role"], 0) + cell["required"]
     result = []
-    for s in stats:
-        total = s["total"]
-        # Mock percentages
-        on_duty = int(total * 0.8)
-        available = int(total * 0.6)
-        result.append({
-            "name": s["_id"].title(), # Capitalize role
-            "total": total,
-            "onDuty": on_duty,
-            "available": available
-        })
+    for entry in staff_readiness(staff_members, day, shift):
+        role = engine_role(entry["name"])
+        entry["shift"] = shift
+        entry["required"] = required.get(role) if role else None
+        result.append(entry)
     return result
 
 @router.get("/", response_model=List[Staff])
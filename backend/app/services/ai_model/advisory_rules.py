@@ -0,0 +1,261 @@
+"""
+Declarative Advisory Rules
+
+Patient advisories, /health-risks entries and health tips are rows of one
+table (advisory_rules.json), one section each:
+
+    {"id": "air_quality_poor",
+     "when": {"AQI": {"gt": 250, "lte": 350}},      all conditions must hold
+     "severity": "HIGH",
+     "type": "AIR_QUALITY",
+     "message": "Poor air quality (AQI: {AQI}). ...",
+     "icon": "🏭"}
+
+Conditions compare an input with bounds (gt, gte, lt, lte, eq) or a set of
+values (in); `load_level` takes LOW/NORMAL/HIGH/CRITICAL names. Text fields
+are str.format templates over the inputs. Tip rules list their tips under
+"tips". Inputs missing from a request take the table's "defaults".
+
+A table compiles into bound arrays per section and input, so a section is
+checked for many locations or days with one masked comparison per input.
+Templates are formatted only for the rules that fire. AdvisoryRules
+re-reads the file when it changes, so edits apply without a restart; a
+table that fails to compile is reported and the previous one stays live.
+"""
+import json
+import os
+import string
+import threading
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RULES_PATH = os.path.join(SCRIPT_DIR, "advisory_rules.json")
+
+SECTIONS = ("advisories", "risks", "tips")
+SEVERITY_LEVELS = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+# Load levels in increasing order; load_level conditions name them and are
+# compared as indices
+LOAD_LEVELS = ("LOW", "NORMAL", "HIGH", "CRITICAL")
+
+_BOUND_OPERATORS = {
+    # operator: (lower or upper bound, inclusive)
+    'gt': ('lower', False),
+    'gte': ('lower', True),
+    'lt': ('upper', False),
+    'lte': ('upper', True)
+}
+_OPERATORS = tuple(_BOUND_OPERATORS) + ('eq', 'in')
+_RESERVED_FIELDS = ('id', 'when')
+
+
+def _template_fields(text: str) -> List[str]:
+    return [field for _, field, _, _ in string.Formatter().parse(text) if field]
+
+
+class CompiledSection:
+    """Rules of one section as arrays, evaluated for many rows at once"""
+
+    def __init__(self, name: str, rules: Sequence[Dict[str, Any]]):
+        self.name = name
+        self.ids = [rule['id'] for rule in rules]
+        if len(set(self.ids)) != len(self.ids):
+            raise ValueError(f"Duplicate rule ids in section '{name}'")
+        self.outputs: List[Dict[str, Any]] = []
+        self._fields: List[list] = []
+        # input -> (rule indices, lower, upper, lower inclusive, upper inclusive)
+        self.ranges: Dict[str, tuple] = {}
+        # (rule index, input, allowed values)
+        self.sets: List[tuple] = []
+        # Inputs compared by conditions, and all inputs the section reads
+        self.conditions = set()
+        self.variables = set()
+
+        bounds: Dict[str, list] = {}
+        for r, rule in enumerate(rules):
+            for variable, condition in rule.get('when', {}).items():
+                self.conditions.add(variable)
+                unknown = set(condition) - set(_OPERATORS)
+                if unknown:
+                    raise ValueError(f"Rule '{rule['id']}': unknown operators {sorted(unknown)}")
+                if 'in' in condition:
+                    self.sets.append((r, variable, self._set_values(rule['id'], variable, condition['in'])))
+                if not set(condition) - {'in'}:
+                    continue
+                lower, upper = [-np.inf, True], [np.inf, True]
+                if 'eq' in condition:
+                    lower = [float(condition['eq']), True]
+                    upper = [float(condition['eq']), True]
+                for operator, (side, inclusive) in _BOUND_OPERATORS.items():
+                    if operator in condition:
+                        bound = lower if side == 'lower' else upper
+                        bound[:] = [float(condition[operator]), inclusive]
+                bounds.setdefault(variable, []).append((r, *lower, *upper))
+
+            fields = {key: value for key, value in rule.items() if key not in _RESERVED_FIELDS}
+            if name == "tips" and not isinstance(fields.get('tips'), list):
+                raise ValueError(f"Tip rule '{rule['id']}' needs a 'tips' list")
+            texts = fields['tips'] if name == "tips" else [v for v in fields.values() if isinstance(v, str)]
+            for text in texts:
+                self.variables.update(_template_fields(text))
+            self.outputs.append(fields)
+            self.variables |= self.conditions
+            # (key, value, is a template) in table order, so rendering skips static fields
+            self._fields.append([
+                (key, value, isinstance(value, str) and bool(_template_fields(value)))
+                for key, value in fields.items()
+            ])
+
+        for variable, rows in bounds.items():
+            index, lower, lower_inclusive, upper, upper_inclusive = (np.array(column) for column in zip(*rows))
+            self.ranges[variable] = (
+                index.astype(np.int64),
+                lower.astype(np.float64)[:, None],
+                upper.astype(np.float64)[:, None],
+                lower_inclusive.astype(bool)[:, None],
+                upper_inclusive.astype(bool)[:, None]
+            )
+
+        severities = [fields.get('severity') for fields in self.outputs]
+        for rule_id, severity in zip(self.ids, severities):
+            if severity is not None and severity not in SEVERITY_LEVELS:
+                raise ValueError(f"Rule '{rule_id}': severity must be one of {SEVERITY_LEVELS}")
+        self.severity_rank = np.array(
+            [SEVERITY_LEVELS.index(s) if s is not None else -1 for s in severities], dtype=np.int64
+        )
+
+    @staticmethod
+    def _set_values(rule_id: str, variable: str, values) -> np.ndarray:
+        if variable == 'load_level':
+            unknown = [v for v in values if v not in LOAD_LEVELS]
+            if unknown:
+                raise ValueError(f"Rule '{rule_id}': unknown load levels {unknown}")
+            values = [LOAD_LEVELS.index(v) for v in values]
+        return np.asarray(values, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def fire(self, columns: Dict[str, np.ndarray], n: int) -> np.ndarray:
+        """Boolean (n_rules, n) matrix of the rules whose conditions hold for each row"""
+        fired = np.ones((len(self), n), dtype=bool)
+        for variable, (index, lower, upper, lower_inclusive, upper_inclusive) in self.ranges.items():
+            x = columns[variable][None, :]
+            fired[index] &= (
+                np.where(lower_inclusive, x >= lower, x > lower)
+                & np.where(upper_inclusive, x <= upper, x < upper)
+            )
+        for r, variable, values in self.sets:
+            fired[r] &= np.isin(columns[variable], values)
+        return fired
+
+    def render(self, fired: np.ndarray, values: Dict[str, np.ndarray]) -> List[list]:
+        """Per row, the fired rules' outputs in table order (tips flattened into one list)"""
+        results: List[list] = [[] for _ in range(fired.shape[1])]
+        rows, rules = np.nonzero(fired.T)
+        context: Dict[str, Any] = {}
+        current = -1
+        for i, r in zip(rows.tolist(), rules.tolist()):
+            if i != current:
+                context = {name: column.item(i) for name, column in values.items()}
+                current = i
+            if self.name == "tips":
+                results[i].extend(tip.format_map(context) for tip in self.outputs[r]['tips'])
+            else:
+                results[i].append({
+                    key: value.format_map(context) if template else value
+                    for key, value, template in self._fields[r]
+                })
+        return results
+
+    def max_severity(self, fired: np.ndarray) -> np.ndarray:
+        """Highest severity index of the fired rules per row (-1 where none fired)"""
+        ranks = np.where(fired, self.severity_rank[:, None], -1)
+        return ranks.max(axis=0) if len(self) else np.full(fired.shape[1], -1)
+
+
+class CompiledRules:
+    """A whole rule table, ready to evaluate"""
+
+    def __init__(self, table: Dict[str, Any]):
+        unknown = set(table) - set(SECTIONS) - {'defaults'}
+        if unknown:
+            raise ValueError(f"Unknown rule table sections {sorted(unknown)}")
+        self.defaults: Dict[str, Any] = dict(table.get('defaults', {}))
+        self.sections = {name: CompiledSection(name, table.get(name, [])) for name in SECTIONS}
+
+    def __getitem__(self, section: str) -> CompiledSection:
+        return self.sections[section]
+
+
+def load_rules(path: str) -> CompiledRules:
+    """Read and compile a rule table; raises ValueError if it is malformed"""
+    with open(path, encoding='utf-8') as f:
+        try:
+            table = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid advisory rule file {path}: {e}") from e
+    try:
+        return CompiledRules(table)
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Malformed advisory rule in {path}: {e!r}") from e
+
+
+class AdvisoryRules:
+    """The live rule table, recompiled when its file changes"""
+
+    def __init__(self, path: str = DEFAULT_RULES_PATH, reload_interval: float = 2.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._mtime = self._file_mtime()
+        self._rules = load_rules(path)
+        self._next_check = time.monotonic() + reload_interval
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.reload_errors = 0
+        self.last_error: Optional[str] = None
+
+    def _file_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def current(self) -> CompiledRules:
+        """The compiled table, re-reading the file at most every reload_interval"""
+        if time.monotonic() >= self._next_check:
+            self._check()
+        return self._rules
+
+    def _check(self):
+        if not self._lock.acquire(blocking=False):
+            # Another thread is already checking; serve the current rules
+            return
+        try:
+            self._next_check = time.monotonic() + self.reload_interval
+            mtime = self._file_mtime()
+            if mtime is None or mtime == self._mtime:
+                return
+            self._mtime = mtime
+            try:
+                self._rules = load_rules(self.path)
+                self.reloads += 1
+                self.last_error = None
+                print(f"✓ Advisory rules reloaded from {self.path}")
+            except (OSError, ValueError) as e:
+                self.reload_errors += 1
+                self.last_error = str(e)
+                print(f"⚠️ Keeping previous advisory rules: {e}")
+        finally:
+            self._lock.release()
+
+    def stats(self) -> Dict[str, Any]:
+        rules = self._rules
+        return {
+            'path': self.path,
+            'rules': {name: len(section) for name, section in rules.sections.items()},
+            'reloads': self.reloads,
+            'reload_errors': self.reload_errors,
+            'last_error': self.last_error
+        }
@@ -0,0 +1,360 @@
+"""
+Rolling-Origin Backtesting for the Patient Load Predictor
+Run from the backend directory:
+
+    python -m app.services.ai_model.backtest --horizons 14 --refit-every 28
+    python -m app.services.ai_model.backtest --generate-hospitals 10 --generate-years 5
+
+History is replayed as it would have been served: the data is split into
+folds of `refit_every` days per hospital, a model is fitted on everything
+before the fold, and every day of the fold is used as a forecast origin.
+PatientLoadPredictor then forecasts `horizons` days recursively from each
+origin, with all origins of a fold advancing together as one batch per step.
+
+As in train_model.py, fold models are fitted on all but the last
+`calibration_days` days before the fold, and those days calibrate the
+split-conformal intervals (conformal.py); 0 reports tree-spread intervals.
+
+Folds run in parallel on a process pool. Fitted fold models are saved as
+artifacts keyed by a hash of their training data and parameters, so
+re-running a backtest only refits folds whose inputs changed.
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from sklearn.ensemble import RandomForestRegressor
+
+from app.services.ai_model.conformal import calibrate
+from app.services.ai_model.forest_engine import CompiledForest
+from app.services.ai_model.model_artifact import export_sklearn_model, is_artifact
+from app.services.ai_model.predictor import PatientLoadPredictor
+from app.services.ai_model.train_model import (
+    EXOGENOUS_COLS,
+    FEATURE_COLS,
+    MODEL_PARAMS,
+    TEST_SIZE,
+    forecast_with_spread,
+    prepare_modeling_data,
+    recursive_forecast
+)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+FOLD_CACHE_DIR = os.path.join(SCRIPT_DIR, "models", "cache", "backtest_folds")
+
+HORIZONS = 14
+REFIT_EVERY_DAYS = 28
+MIN_TRAIN_DAYS = 180
+CALIBRATION_DAYS = TEST_SIZE
+
+# Target-day conditions reported separately (past surges)
+EVENT_SLICES = {
+    'epidemic_alert': lambda df: df["epidemic_alert_level"] > 0,
+    'high_aqi': lambda df: df["AQI"] >= 300,
+    'festival': lambda df: df["festival_flag"] == 1,
+}
+
+
+def prepare_hospital_frames(df_visits: pd.DataFrame, df_ext: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Daily modeling frame per hospital (a single 'default' hospital without hospital_id)"""
+    if "hospital_id" not in df_visits.columns:
+        return {'default': prepare_modeling_data(df_visits, df_ext)}
+
+    ext_by_hospital = dict(tuple(df_ext.groupby("hospital_id", observed=True)))
+    return {
+        str(hospital): prepare_modeling_data(
+            visits.drop(columns="hospital_id"),
+            ext_by_hospital[hospital].drop(columns="hospital_id")
+        )
+        for hospital, visits in df_visits.groupby("hospital_id", observed=True)
+    }
+
+
+def make_folds(n_rows: int, refit_every: int = REFIT_EVERY_DAYS, min_train: int = MIN_TRAIN_DAYS) -> List[Tuple[int, int]]:
+    """(train_end, fold_end) row ranges; origins of a fold are rows [train_end, fold_end)"""
+    return [
+        (start, min(start + refit_every, n_rows))
+        for start in range(min_train, n_rows, refit_every)
+    ]
+
+
+def fold_key(X_train: np.ndarray, y_train: np.ndarray, params: Dict[str, Any]) -> str:
+    """Content hash identifying a fitted fold model"""
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(X_train, dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(y_train, dtype=np.float64).tobytes())
+    digest.update(json.dumps({'params': params, 'features': FEATURE_COLS}, sort_keys=True).encode())
+    return digest.hexdigest()[:24]
+
+
+def replay_origins(
+    predictor: PatientLoadPredictor,
+    df_model: pd.DataFrame,
+    starts: np.ndarray,
+    horizons: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Recursive forecasts with intervals from every origin, batched across origins
+
+    Forecasts past the end of the data are NaN.
+
+    Returns:
+        (predictions, lower, upper), each of shape (len(starts), horizons)
+    """
+    n_rows = len(df_model)
+    y = df_model["patients"].to_numpy(dtype=np.float64)
+    exogenous = df_model[EXOGENOUS_COLS].to_numpy(dtype=np.float64)
+
+    history = np.stack([y[s - 7:s] for s in starts])
+    out = np.full((3, len(starts), horizons), np.nan)
+
+    for h in range(horizons):
+        active = starts + h < n_rows
+        if not active.any():
+            break
+        X = np.column_stack([
+            exogenous[starts[active] + h],
+            history[active, -1],
+            history[active, -2],
+            history[active, -7],
+            history[active, -7:].mean(axis=1)
+        ])
+        predictions, lower, upper = predictor.predict_matrix(X, horizons=np.full(len(X), h + 1))
+        out[0, active, h] = predictions
+        out[1, active, h] = lower
+        out[2, active, h] = upper
+        step = np.full(len(starts), np.nan)
+        step[active] = predictions
+        history = np.column_stack([history, step])
+
+    return out[0], out[1], out[2]
+
+
+def run_fold(
+    hospital: str,
+    df_model: pd.DataFrame,
+    fold: Tuple[int, int],
+    horizons: int,
+    params: Dict[str, Any],
+    cache_dir: Optional[str],
+    calibration_days: int = CALIBRATION_DAYS
+) -> Dict[str, Any]:
+    """Fit (or load) one fold's model and replay its origins (runs in a worker process)"""
+    train_end, fold_end = fold
+    fit_end = train_end - calibration_days
+    X = df_model[FEATURE_COLS].to_numpy(dtype=np.float64)
+    y = df_model["patients"].to_numpy(dtype=np.float64)
+
+    starts = np.arange(train_end, fold_end)
+    with contextlib.ExitStack() as stack:
+        # Fold models always go through an artifact; a temporary one when caching is off
+        if cache_dir:
+            artifact_dir = os.path.join(
+                cache_dir,
+                fold_key(X[:train_end], y[:train_end], {**params, 'calibration_days': calibration_days})
+            )
+        else:
+            artifact_dir = os.path.join(stack.enter_context(tempfile.TemporaryDirectory()), "model")
+        cached = is_artifact(artifact_dir)
+
+        # Silence per-fold model load messages
+        stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+        if not cached:
+            model = RandomForestRegressor(random_state=42, n_jobs=1, **params)
+            model.fit(X[:fit_end], y[:fit_end])
+            metadata = {'feature_cols': FEATURE_COLS, 'params': params}
+            if calibration_days:
+                calibration_starts = np.arange(fit_end, train_end - horizons + 1)
+                actual = np.stack([y[s:s + horizons] for s in calibration_starts])
+                forecasts, spreads = forecast_with_spread(
+                    recursive_forecast, CompiledForest.from_sklearn(model), df_model, calibration_starts, horizons
+                )
+                metadata['conformal'] = calibrate(actual - forecasts, spreads)
+            export_sklearn_model(model, artifact_dir, metadata)
+
+        predictor = PatientLoadPredictor(model_path=artifact_dir)
+        predictions, lower, upper = replay_origins(predictor, df_model, starts, horizons)
+
+    targets = starts[:, None] + np.arange(horizons)[None, :]
+    valid = targets < len(df_model)
+    actual = np.where(valid, y[np.minimum(targets, len(df_model) - 1)], np.nan)
+
+    return {
+        'hospital': hospital,
+        'origins': df_model["date"].to_numpy()[starts],
+        'targets': np.minimum(targets, len(df_model) - 1),
+        'valid': valid,
+        'actual': actual,
+        'prediction': predictions,
+        'lower': lower,
+        'upper': upper,
+        'cached': cached
+    }
+
+
+def collect_results(fold_results: List[Dict[str, Any]], frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """One row per (hospital, origin, horizon) with error and coverage columns"""
+    parts = []
+    for r in fold_results:
+        n_origins, horizons = r['actual'].shape
+        valid = r['valid'].ravel()
+        targets = r['targets'].ravel()[valid]
+        df_target = frames[r['hospital']].iloc[targets]
+        part = pd.DataFrame({
+            'hospital': r['hospital'],
+            'origin': np.repeat(r['origins'], horizons)[valid],
+            'target_date': df_target["date"].to_numpy(),
+            'horizon': np.tile(np.arange(1, horizons + 1), n_origins)[valid],
+            'actual': r['actual'].ravel()[valid],
+            'prediction': r['prediction'].ravel()[valid],
+            'lower': r['lower'].ravel()[valid],
+            'upper': r['upper'].ravel()[valid],
+        })
+        for name, condition in EVENT_SLICES.items():
+            part[name] = condition(df_target).to_numpy()
+        parts.append(part)
+
+    results = pd.concat(parts, ignore_index=True)
+    results['error'] = results['prediction'] - results['actual']
+    results['covered'] = (results['actual'] >= results['lower']) & (results['actual'] <= results['upper'])
+    return results
+
+
+def summarize(results: pd.DataFrame, by: str = 'horizon') -> pd.DataFrame:
+    """MAE, RMSE, bias, interval coverage and width grouped by a column"""
+    grouped = results.assign(
+        abs_error=results['error'].abs(),
+        sq_error=results['error'] ** 2,
+        width=results['upper'] - results['lower']
+    ).groupby(by, observed=True)
+    return pd.DataFrame({
+        'n': grouped.size(),
+        'mae': grouped['abs_error'].mean(),
+        'rmse': np.sqrt(grouped['sq_error'].mean()),
+        'bias': grouped['error'].mean(),
+        'coverage': grouped['covered'].mean(),
+        'interval_width': grouped['width'].mean(),
+    })
+
+
+def run_backtest(
+    frames: Dict[str, pd.DataFrame],
+    horizons: int = HORIZONS,
+    refit_every: int = REFIT_EVERY_DAYS,
+    min_train: int = MIN_TRAIN_DAYS,
+    params: Optional[Dict[str, Any]] = None,
+    max_workers: Optional[int] = None,
+    cache_dir: Optional[str] = FOLD_CACHE_DIR,
+    calibration_days: int = CALIBRATION_DAYS
+) -> pd.DataFrame:
+    """
+    Backtest every hospital frame and return per-(origin, horizon) results
+
+    Args:
+        frames: daily modeling frame per hospital (see prepare_hospital_frames)
+        horizons: forecast days per origin
+        refit_every: days between model refits (fold length)
+        min_train: days of history before the first origin
+        params: RandomForestRegressor parameters (default: train_model.MODEL_PARAMS)
+        max_workers: process pool size
+        cache_dir: fold model cache (None disables caching)
+        calibration_days: days before each fold held out to calibrate
+            conformal intervals (0: fit on everything, tree-spread intervals)
+    """
+    if calibration_days and calibration_days < horizons:
+        raise ValueError(f"calibration_days must be 0 or at least horizons ({horizons})")
+    params = {**MODEL_PARAMS, **(params or {})}
+    tasks = [
+        (hospital, df_model, fold)
+        for hospital, df_model in frames.items()
+        for fold in make_folds(len(df_model), refit_every, min_train)
+    ]
+    if not tasks:
+        raise ValueError(f"Not enough history: need more than {min_train} days per hospital")
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(run_fold, hospital, df_model, fold, horizons, params, cache_dir, calibration_days)
+            for hospital, df_model, fold in tasks
+        ]
+        fold_results = [future.result() for future in futures]
+
+    cached = sum(r['cached'] for r in fold_results)
+    print(f"  ✓ {len(fold_results)} folds ({cached} fold models reused from cache)")
+    return collect_results(fold_results, frames)
+
+
+def main():
+    """Main execution function"""
+    from app.services.ai_model.data_cache import DataCache
+    from app.services.ai_model.train_model import EXT_PATH, VISITS_PATH, load_raw_data
+
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the patient load predictor")
+    parser.add_argument("--horizons", type=int, default=HORIZONS, help="forecast days per origin")
+    parser.add_argument("--refit-every", type=int, default=REFIT_EVERY_DAYS, help="days between refits")
+    parser.add_argument("--min-train", type=int, default=MIN_TRAIN_DAYS, help="history before the first origin")
+    parser.add_argument("--calibration-days", type=int, default=CALIBRATION_DAYS,
+                        help="days held out before each fold to calibrate intervals (0: tree-spread intervals)")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--no-fold-cache", action="store_true", help="refit every fold model")
+    parser.add_argument("--generate-hospitals", type=int, default=None,
+                        help="backtest on synthetic data for this many hospitals instead of the CSVs")
+    parser.add_argument("--generate-years", type=int, default=5, help="years of synthetic data")
+    parser.add_argument("--visits", default=None, help="patient visits CSV (default: the training CSV)")
+    parser.add_argument("--external", default=None, help="external factors CSV (default: the training CSV)")
+    parser.add_argument("--output", default=None, help="write per-(origin, horizon) results to this CSV")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BACKTESTING PATIENT LOAD PREDICTOR")
+    print("=" * 70)
+
+    if args.generate_hospitals:
+        from app.services.ai_model.generate_data_and_train import generate_dataset
+        df_ext, df_visits = generate_dataset(args.generate_hospitals, args.generate_years)
+    else:
+        df_visits, df_ext = load_raw_data(DataCache(), args.visits or VISITS_PATH, args.external or EXT_PATH)
+    frames = prepare_hospital_frames(df_visits, df_ext)
+    print(f"\n{len(frames)} hospital(s), {sum(len(f) for f in frames.values())} hospital-days")
+
+    started = time.perf_counter()
+    results = run_backtest(
+        frames,
+        horizons=args.horizons,
+        refit_every=args.refit_every,
+        min_train=args.min_train,
+        max_workers=args.workers,
+        cache_dir=None if args.no_fold_cache else FOLD_CACHE_DIR,
+        calibration_days=args.calibration_days
+    )
+    print(f"  ✓ Backtest finished in {time.perf_counter() - started:.1f}s "
+          f"({len(results)} forecasts from {results[['hospital', 'origin']].drop_duplicates().shape[0]} origins)")
+
+    print("\nBy horizon (coverage = share of actuals inside the 95% interval):")
+    print(summarize(results, 'horizon').round(3).to_string())
+
+    print("\nBy target-day condition:")
+    for name in EVENT_SLICES:
+        print(f"\n  {name}:")
+        print(summarize(results, name).round(3).to_string())
+
+    if len(frames) > 1:
+        print("\nBy hospital:")
+        print(summarize(results, 'hospital').round(3).to_string())
+
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"\n✓ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark sklearn vs compiled inference engines for PatientLoadPredictor
+Run from the backend directory:
+
+    python -m app.services.ai_model.benchmark_engines
+"""
+import os
+import time
+import numpy as np
+from typing import Callable, Dict
+
+from app.services.ai_model.predictor import PatientLoadPredictor
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(SCRIPT_DIR, "models", "patient_predictor.pkl")
+
+BATCH_SIZES = [1, 14, 1000]
+
+
+def sample_feature_matrix(n_rows: int, seed: int = 0) -> np.ndarray:
+    """Draw plausible feature rows in PatientLoadPredictor.feature_cols order"""
+    rng = np.random.default_rng(seed)
+    aqi = rng.integers(50, 500, n_rows)
+    lags = rng.normal(320, 40, size=(n_rows, 4))
+    return np.column_stack([
+        rng.integers(0, 2, n_rows),          # holiday_flag
+        rng.integers(0, 2, n_rows),          # festival_flag
+        aqi,                                 # AQI
+        (aqi >= 250).astype(int),            # high_AQI_flag
+        rng.normal(25, 7, n_rows).round(1),  # temp
+        rng.gamma(1.0, 4.0, n_rows).round(1),  # rainfall
+        rng.integers(0, 4, n_rows),          # epidemic_alert_level
+        rng.integers(1, 13, n_rows),         # month
+        rng.integers(0, 2, n_rows),          # is_weekend
+        lags
+    ]).astype(np.float64)
+
+
+def time_calls(fn: Callable[[], object], repeats: int) -> Dict[str, float]:
+    """Return p50/p99 latency in milliseconds over repeated calls"""
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'p50': float(np.percentile(timings, 50)),
+        'p99': float(np.percentile(timings, 99))
+    }
+
+
+def main():
+    """Main execution function"""
+    print("=" * 70)
+    print("BENCHMARKING PATIENT LOAD INFERENCE ENGINES")
+    print("=" * 70)
+
+    if not os.path.exists(MODEL_PATH):
+        print(f"❌ No trained model at {MODEL_PATH}. Run train_model.py first.")
+        return
+
+    sklearn_predictor = PatientLoadPredictor(model_path=MODEL_PATH, engine="sklearn")
+    compiled_predictor = PatientLoadPredictor(model_path=MODEL_PATH, engine="compiled")
+    model = sklearn_predictor.model
+
+    # Correctness: compiled engine must match sklearn within float tolerance
+    X_check = sample_feature_matrix(5000, seed=1)
+    expected = model.predict(X_check)
+    actual = compiled_predictor.compiled.predict(X_check)
+    max_diff = float(np.max(np.abs(expected - actual)))
+    print(f"\nMax |sklearn - compiled| over {len(X_check)} rows: {max_diff:.2e}")
+    if not np.allclose(expected, actual, rtol=1e-9, atol=1e-6):
+        print("❌ Compiled engine does not match sklearn predictions")
+        return
+    print("✓ Compiled engine matches sklearn")
+
+    print(f"\n{'path':32s} {'rows':>6s} {'p50 ms':>10s} {'p99 ms':>10s}")
+    for n_rows in BATCH_SIZES:
+        X = sample_feature_matrix(n_rows)
+        repeats = 200 if n_rows < 1000 else 30
+        paths = {
+            'sklearn model.predict': lambda: model.predict(X),
+            'predictor (sklearn engine)': lambda: sklearn_predictor._predict_matrix(X),
+            'predictor (compiled engine)': lambda: compiled_predictor._predict_matrix(X),
+        }
+        for name, fn in paths.items():
+            stats = time_calls(fn, repeats)
+            print(f"{name:32s} {n_rows:6d} {stats['p50']:10.3f} {stats['p99']:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
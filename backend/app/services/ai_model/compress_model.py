@@ -0,0 +1,454 @@
+"""
+Model Compression for Size- and Latency-Budgeted Serving
+Run from the backend directory:
+
+    python -m app.services.ai_model.compress_model --max-kb 256 --latency-ms 0.5
+
+Shrinks a trained forest for edge kiosks and per-hospital workers that
+cannot hold a full-size model per department:
+
+    depth cap      trees are cut at each candidate depth; cut nodes predict
+                   the mean target of the samples that reached them
+    selection      greedy forward ensemble selection: repeatedly add the tree
+                   that most lowers the selection MAE of the running mean,
+                   and keep the longest prefix that fits the budget
+    quantization   float32 thresholds (lossless for float32 inputs) and int16
+                   or float32 node values
+
+Selection, interval recalibration and the accuracy report use the held-out
+test window, split by every third day so all three span the same season.
+That window is only a few dozen days, so the budget rather than the
+selection MAE decides how many trees are kept (the MAE curve flattens early
+and its minimum overfits); the selection MAE only ranks the depth caps.
+
+The compressed artifact keeps the source metadata plus a 'compression'
+report of the accuracy lost, and loads like any other artifact
+(PatientLoadPredictor(model_path=...)). With --hospital/--department it is
+published to that department's registry instead, where the per-hospital
+ModelCache (model_cache.py) serves it.
+"""
+import argparse
+import json
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Optional, Tuple
+
+from app.services.ai_model.benchmark_engines import time_calls
+from app.services.ai_model.conformal import conformal_bounds
+from app.services.ai_model.feature_store import ALL_DEPARTMENTS
+from app.services.ai_model.forest_engine import CompiledForest
+from app.services.ai_model.model_artifact import is_artifact, load_artifact, save_artifact
+from app.services.ai_model.model_cache import hospital_registry
+from app.services.ai_model.model_registry import DEFAULT_REGISTRY_DIR, MODELS_DIR, ModelRegistry
+from app.services.ai_model.train_model import (
+    DIRECT_FEATURE_COLS,
+    DIRECT_HORIZONS,
+    FEATURE_COLS,
+    TEST_SIZE,
+    build_direct_frame,
+    calibrate_forest,
+    calibration_origins,
+    direct_forecast,
+    recursive_forecast
+)
+
+DEFAULT_OUTPUT_DIR = os.path.join(MODELS_DIR, "compressed", "patient_load")
+LEGACY_MODEL_PATH = os.path.join(MODELS_DIR, "patient_predictor.pkl")
+
+# Depth caps tried when none is given; deeper than the model means uncapped
+DEPTH_CANDIDATES = (None, 8, 6, 4)
+VALUE_DTYPES = ("int16", "float32")
+LATENCY_ROWS = 1
+LATENCY_REPEATS = 200
+
+
+def load_forest(model_path: str) -> Tuple[CompiledForest, Dict[str, Any]]:
+    """Compiled forest and metadata from an artifact directory or a pickled model"""
+    if is_artifact(model_path):
+        return load_artifact(model_path, mmap=False)
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+    return CompiledForest.from_sklearn(model), {'feature_cols': FEATURE_COLS}
+
+
+def holdout_data(df_model: pd.DataFrame, metadata: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Rows of the model's held-out test window in its feature layout
+
+    Falls back to the last TEST_SIZE days, the window train_model.py holds
+    out, when the metadata does not record one.
+    """
+    feature_cols = metadata.get('feature_cols', FEATURE_COLS)
+    if not set(feature_cols) <= set(DIRECT_FEATURE_COLS):
+        raise ValueError("Only daily patient load models can be compressed with held-out daily data")
+
+    test_window = metadata.get('test_window')
+    if test_window:
+        start, end = pd.Timestamp(test_window['start']), pd.Timestamp(test_window['end'])
+    else:
+        start, end = df_model["date"].iloc[-TEST_SIZE], df_model["date"].iloc[-1]
+
+    if 'horizon' in feature_cols:
+        df_model = build_direct_frame(df_model, metadata.get('horizons', DIRECT_HORIZONS))
+    rows = df_model[(df_model["date"] >= start) & (df_model["date"] <= end)]
+    if rows.empty:
+        raise ValueError(f"No prepared data in the test window {start:%Y-%m-%d} to {end:%Y-%m-%d}")
+    return rows.reset_index(drop=True)
+
+
+def recalibrate(
+    forest: CompiledForest,
+    df_model: pd.DataFrame,
+    metadata: Dict[str, Any],
+    days: pd.Series
+) -> Optional[Dict[str, Any]]:
+    """
+    Interval multipliers of a compressed forest from forecasts made on the given days
+
+    The source model's multipliers were fitted to its full set of trees.
+    Returns None when the source has none or no day leaves a full horizon.
+    """
+    if metadata.get('conformal') is None:
+        return None
+    horizons = len(metadata['conformal']['lower'])
+    forecast_fn = direct_forecast if 'horizon' in metadata.get('feature_cols', FEATURE_COLS) else recursive_forecast
+    starts = calibration_origins(df_model, df_model["date"].isin(days), horizons)
+    if len(starts) == 0:
+        return None
+    return calibrate_forest(forecast_fn, forest, df_model, starts, horizons)
+
+
+def split_by_day(dates: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Selection, calibration and evaluation row masks from every third day"""
+    day_index = (dates - dates.min()).dt.days.to_numpy() % 3
+    return day_index == 0, day_index == 1, day_index == 2
+
+
+def greedy_selection(
+    tree_predictions: np.ndarray,
+    y: np.ndarray,
+    max_trees: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Order trees by greedy forward selection on MAE
+
+    Args:
+        tree_predictions: per-tree predictions, shape (n_trees, n_rows)
+        y: targets of the rows
+        max_trees: stop after this many trees
+
+    Returns:
+        (tree ids in selection order, MAE of the mean of each prefix)
+    """
+    n_trees = len(tree_predictions)
+    max_trees = min(max_trees or n_trees, n_trees)
+    available = np.ones(n_trees, dtype=bool)
+    total = np.zeros(tree_predictions.shape[1])
+    order, curve = [], []
+
+    for k in range(1, max_trees + 1):
+        # MAE of the running mean after adding each candidate, all at once
+        errors = np.abs((total + tree_predictions) / k - y).mean(axis=1)
+        errors[~available] = np.inf
+        best = int(np.argmin(errors))
+        available[best] = False
+        total += tree_predictions[best]
+        order.append(best)
+        curve.append(errors[best])
+
+    return np.array(order, dtype=np.int64), np.array(curve)
+
+
+def measure_latency(forest: CompiledForest, X: np.ndarray, n_rows: int = LATENCY_ROWS) -> float:
+    """p99 serving latency (ms) of mean and spread for an n_rows batch"""
+    batch = np.resize(X, (n_rows, X.shape[1]))
+    return time_calls(lambda: forest.predict_with_std(batch), LATENCY_REPEATS)['p99']
+
+
+def _largest_fitting(n_trees: int, fits) -> int:
+    """Largest prefix size k in [1, n_trees] with fits(k), or 0 (fits is monotone)"""
+    low, high = 0, n_trees
+    while low < high:
+        middle = (low + high + 1) // 2
+        if fits(middle):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def compress_forest(
+    forest: CompiledForest,
+    X_select: np.ndarray,
+    y_select: np.ndarray,
+    max_trees: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    latency_ms: Optional[float] = None,
+    latency_rows: int = LATENCY_ROWS,
+    max_depth: Optional[int] = None,
+    value_dtype: str = "int16"
+) -> Tuple[CompiledForest, Dict[str, Any]]:
+    """
+    Most accurate depth cap and tree subset that meets every given budget
+
+    Args:
+        forest: compiled source forest
+        X_select, y_select: rows the tree selection is scored on
+        max_trees: tree count budget
+        max_bytes: in-memory size budget of the compressed node arrays
+        latency_ms: p99 budget for predicting a latency_rows batch
+        max_depth: fixed depth cap (default: search DEPTH_CANDIDATES)
+        value_dtype: "int16" or "float32" node values
+
+    Returns:
+        (compressed forest, {'max_depth', 'n_trees', 'selection_mae', 'candidates'})
+    """
+    if value_dtype not in VALUE_DTYPES:
+        raise ValueError(f"Unknown value dtype '{value_dtype}', expected one of {VALUE_DTYPES}")
+    depths = [max_depth] if max_depth else DEPTH_CANDIDATES
+    depths = sorted({min(d or forest.max_depth, forest.max_depth) for d in depths}, reverse=True)
+
+    best = None
+    candidates = []
+    for depth in depths:
+        truncated = forest.truncate(depth)
+        order, curve = greedy_selection(truncated.predict_trees(X_select), y_select, max_trees)
+
+        def build(k: int) -> CompiledForest:
+            return truncated.select_trees(order[:k]).quantize(value_dtype)
+
+        def fits(k: int) -> bool:
+            candidate = build(k)
+            if max_bytes is not None and candidate.nbytes > max_bytes:
+                return False
+            return latency_ms is None or measure_latency(candidate, X_select, latency_rows) <= latency_ms
+
+        limit = _largest_fitting(len(order), fits)
+        if limit == 0:
+            candidates.append({'max_depth': depth, 'fits_budget': False})
+            continue
+
+        compressed = build(limit)
+        result = {
+            'max_depth': depth,
+            'fits_budget': True,
+            'n_trees': limit,
+            'selection_mae': float(curve[limit - 1]),
+            'nbytes': compressed.nbytes
+        }
+        candidates.append(result)
+        if best is None or (result['selection_mae'], result['nbytes']) < (best[1]['selection_mae'], best[1]['nbytes']):
+            best = (compressed, result)
+
+    if best is None:
+        raise ValueError("No depth cap and tree subset fits the budget; relax it or use a coarser model")
+    compressed, result = best
+    return compressed, {
+        'max_depth': result['max_depth'],
+        'n_trees': result['n_trees'],
+        'selection_mae': result['selection_mae'],
+        'candidates': candidates
+    }
+
+
+def _accuracy(
+    forest: CompiledForest,
+    X: np.ndarray,
+    y: np.ndarray,
+    conformal: Optional[Dict[str, Any]],
+    horizons: Optional[np.ndarray]
+) -> Dict[str, float]:
+    predictions, spreads = forest.predict_with_std(X)
+    errors = predictions - y
+    metrics = {
+        'mae': float(np.abs(errors).mean()),
+        'rmse': float(np.sqrt((errors ** 2).mean()))
+    }
+    if conformal is not None:
+        lower, upper = conformal_bounds(predictions, spreads, conformal, horizons)
+        metrics['interval_coverage'] = float(((y >= lower) & (y <= upper)).mean())
+    return metrics
+
+
+def accuracy_report(
+    original: CompiledForest,
+    compressed: CompiledForest,
+    X: np.ndarray,
+    y: np.ndarray,
+    conformal: Optional[Dict[str, Any]] = None,
+    horizons: Optional[np.ndarray] = None,
+    latency_rows: int = LATENCY_ROWS,
+    compressed_conformal: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Accuracy, size and latency of the original and compressed forests on the same rows
+
+    Interval coverage uses each forest's own multipliers (conformal and
+    compressed_conformal).
+    """
+    report = {}
+    for name, forest, intervals in (
+        ('original', original, conformal),
+        ('compressed', compressed, compressed_conformal)
+    ):
+        report[name] = {
+            'n_trees': forest.n_trees,
+            'n_nodes': forest.n_nodes,
+            'max_depth': forest.max_depth,
+            'nbytes': forest.nbytes,
+            f'latency_{latency_rows}_p99_ms': measure_latency(forest, X, latency_rows),
+            **_accuracy(forest, X, y, intervals, horizons)
+        }
+    report['mae_increase'] = report['compressed']['mae'] - report['original']['mae']
+    report['size_ratio'] = compressed.nbytes / original.nbytes
+    report['max_prediction_change'] = float(np.max(np.abs(compressed.predict(X) - original.predict(X))))
+    return report
+
+
+def compress_model(
+    model_path: str,
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    df_model: Optional[pd.DataFrame] = None,
+    registry: Optional[ModelRegistry] = None,
+    **budget
+) -> Dict[str, Any]:
+    """
+    Compress a trained daily model and save it as an artifact
+
+    Args:
+        model_path: artifact directory or pickled model
+        output_dir: artifact directory to write
+        df_model: prepared modeling frame (default: train_model's data)
+        registry: publish to this registry instead of writing output_dir
+        **budget: compress_forest budget and quantization arguments
+
+    Returns:
+        the compression report stored in the artifact metadata
+    """
+    if df_model is None:
+        from app.services.ai_model.data_cache import DataCache
+        from app.services.ai_model.train_model import load_modeling_data
+        df_model = load_modeling_data(DataCache())
+
+    forest, metadata = load_forest(model_path)
+    feature_cols = metadata.get('feature_cols', FEATURE_COLS)
+    rows = holdout_data(df_model, metadata)
+    X = rows[feature_cols].to_numpy(dtype=np.float64)
+    y = rows["patients"].to_numpy(dtype=np.float64)
+    selection, calibration, evaluation = split_by_day(rows["date"])
+
+    compressed, choice = compress_forest(forest, X[selection], y[selection], **budget)
+
+    horizons = X[evaluation, feature_cols.index('horizon')] if 'horizon' in feature_cols else None
+    # Multipliers come from their own days so coverage on the evaluation days is out of sample
+    conformal = recalibrate(compressed, df_model, metadata, rows["date"][calibration])
+    report = {
+        'source': os.path.abspath(model_path),
+        'value_dtype': budget.get('value_dtype', 'int16'),
+        'budget': {
+            key: budget.get(key) for key in ('max_trees', 'max_bytes', 'latency_ms', 'max_depth')
+        },
+        'selection_rows': int(selection.sum()),
+        'calibration_rows': int(calibration.sum()),
+        'evaluation_rows': int(evaluation.sum()),
+        **choice,
+        'evaluation': accuracy_report(
+            forest, compressed, X[evaluation], y[evaluation],
+            metadata.get('conformal'), horizons, budget.get('latency_rows', LATENCY_ROWS), conformal
+        ),
+        'recalibrated': conformal is not None
+    }
+
+    meta = {key: value for key, value in metadata.items() if key not in ('version', 'conformal')}
+    if conformal is not None:
+        meta['conformal'] = conformal
+    if metadata.get('version'):
+        meta['compressed_from'] = metadata['version']
+    meta['compression'] = report
+    if registry is not None:
+        report['version'] = registry.publish_forest(compressed, meta)
+        registry.prune(keep=5)
+    else:
+        save_artifact(compressed, output_dir, meta)
+    return report
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="Compress a patient load model to a size or latency budget")
+    parser.add_argument("--model", default=None,
+                        help="artifact directory or pickle (default: live registry version, else the legacy pickle)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_DIR, help="compressed artifact directory")
+    parser.add_argument("--max-trees", type=int, default=None, help="tree count budget")
+    parser.add_argument("--max-kb", type=float, default=None, help="model size budget in KiB")
+    parser.add_argument("--latency-ms", type=float, default=None, help="p99 latency budget per batch")
+    parser.add_argument("--latency-rows", type=int, default=LATENCY_ROWS, help="batch size the latency budget applies to")
+    parser.add_argument("--max-depth", type=int, default=None,
+                        help=f"fixed depth cap (default: best of {[d for d in DEPTH_CANDIDATES if d]} and uncapped)")
+    parser.add_argument("--values", choices=VALUE_DTYPES, default="int16", help="node value precision")
+    parser.add_argument("--report", default=None, help="also write the report as JSON to this path")
+    parser.add_argument("--hospital", default=None, help="publish to this hospital's model registry")
+    parser.add_argument("--department", default=ALL_DEPARTMENTS, help="department registry used with --hospital")
+    args = parser.parse_args()
+
+    model_path = args.model
+    if model_path is None:
+        registry = ModelRegistry(DEFAULT_REGISTRY_DIR)
+        version = registry.current_version()
+        model_path = registry.version_path(version) if version else LEGACY_MODEL_PATH
+    if not os.path.exists(model_path):
+        print(f"❌ No trained model at {model_path}. Run train_model.py first.")
+        return
+
+    print("=" * 70)
+    print("COMPRESSING PATIENT LOAD PREDICTION MODEL")
+    print("=" * 70)
+
+    registry = hospital_registry(args.hospital, args.department) if args.hospital else None
+    report = compress_model(
+        model_path,
+        args.output,
+        registry=registry,
+        max_trees=args.max_trees,
+        max_bytes=int(args.max_kb * 1024) if args.max_kb else None,
+        latency_ms=args.latency_ms,
+        latency_rows=args.latency_rows,
+        max_depth=args.max_depth,
+        value_dtype=args.values
+    )
+
+    evaluation = report['evaluation']
+    latency_key = f"latency_{args.latency_rows}_p99_ms"
+    print(f"\n{'depth':>7s} {'trees':>6s} {'KiB':>9s} {'selection MAE':>14s}")
+    for candidate in report['candidates']:
+        if candidate['fits_budget']:
+            print(f"{candidate['max_depth']:7d} {candidate['n_trees']:6d} {candidate['nbytes'] / 1024:9.1f} "
+                  f"{candidate['selection_mae']:14.2f}")
+        else:
+            print(f"{candidate['max_depth']:7d} {'over budget':>31s}")
+    print(f"\nSelected depth {report['max_depth']} with {report['n_trees']} trees ({args.values} values)")
+    print(f"\nEvaluation on {report['evaluation_rows']} held-out rows:")
+    print(f"  {'':12s} {'trees':>6s} {'depth':>6s} {'KiB':>9s} {'p99 ms':>8s} {'MAE':>8s} {'RMSE':>8s}")
+    for name in ('original', 'compressed'):
+        row = evaluation[name]
+        print(f"  {name:12s} {row['n_trees']:6d} {row['max_depth']:6d} {row['nbytes'] / 1024:9.1f} "
+              f"{row[latency_key]:8.3f} {row['mae']:8.2f} {row['rmse']:8.2f}")
+    print(f"\n  MAE change: {evaluation['mae_increase']:+.2f} patients, size {evaluation['size_ratio']:.1%} "
+          f"of the original, largest prediction change {evaluation['max_prediction_change']:.1f}")
+    if 'interval_coverage' in evaluation['original']:
+        print(f"  95% interval coverage: {evaluation['original']['interval_coverage']:.1%} -> "
+              f"{evaluation['compressed']['interval_coverage']:.1%}")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+    if registry is not None:
+        print(f"\n✓ Published compressed version {report['version']} to: {registry.root}")
+    else:
+        print(f"\n✓ Compressed model saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
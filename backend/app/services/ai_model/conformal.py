@@ -0,0 +1,109 @@
+"""
+Split-Conformal Prediction Intervals
+
+Intervals from the spread of per-tree predictions are too narrow: the
+rolling-origin backtest measured ~84% coverage for the nominal 95% band on
+the bundled data and ~72% on generated multi-hospital data. Normalized split
+conformal keeps the tree spread as the local scale, but calibrates how many
+spreads wide the band must be on held-out residuals:
+
+    score    = (actual - prediction) / (spread + floor)   (calibration window)
+    lower    = prediction + q(alpha / 2)     * (spread + floor)
+    upper    = prediction + q(1 - alpha / 2) * (spread + floor)
+
+The multipliers are stored in the artifact metadata under 'conformal' and
+indexed by forecast horizon (days ahead for daily models, hours ahead for
+the hourly model), because errors grow with the horizon. Serving needs only
+the forest mean and spread from the usual single stacked pass; the bounds
+are then one gather and a multiply-add for the whole batch.
+"""
+import numpy as np
+from typing import Any, Dict, Optional
+
+DEFAULT_ALPHA = 0.05
+# Scale floor as a share of the mean calibration spread. Adding it blends a
+# constant width into the per-row spread, so rows where the trees happen to
+# agree (common for the direct model) do not get near-zero bands
+SCALE_FLOOR_SHARE = 1.0
+
+
+def _conformal_quantile(scores: np.ndarray, level: float) -> float:
+    """Finite-sample corrected empirical quantile"""
+    n = len(scores)
+    rank = np.clip(np.ceil((n + 1) * level), 1, n)
+    return float(np.sort(scores)[int(rank) - 1])
+
+
+def calibrate(
+    residuals: np.ndarray,
+    spreads: np.ndarray,
+    alpha: float = DEFAULT_ALPHA
+) -> Dict[str, Any]:
+    """
+    Interval multipliers per horizon from held-out residuals
+
+    Args:
+        residuals: actual - prediction, shape (n_samples,) for a single
+            horizon or (n_samples, n_horizons); NaN entries are ignored
+        spreads: per-tree standard deviation of each prediction, same shape
+        alpha: miscoverage rate (0.05 for 95% intervals)
+
+    Returns:
+        metadata dict for the 'conformal' key of a model artifact
+    """
+    residuals = np.asarray(residuals, dtype=np.float64)
+    spreads = np.asarray(spreads, dtype=np.float64)
+    if residuals.ndim == 1:
+        residuals, spreads = residuals[:, None], spreads[:, None]
+
+    scale_floor = max(SCALE_FLOOR_SHARE * float(np.nanmean(spreads)), 1e-6)
+    scores = residuals / (spreads + scale_floor)
+
+    lower, upper, counts = [], [], []
+    for column in scores.T:
+        column = column[~np.isnan(column)]
+        if len(column) == 0:
+            raise ValueError("Every horizon needs at least one calibration residual")
+        lower.append(min(0.0, -_conformal_quantile(-column, 1 - alpha / 2)))
+        upper.append(max(0.0, _conformal_quantile(column, 1 - alpha / 2)))
+        counts.append(len(column))
+
+    # Few residuals per horizon make the raw multipliers noisy; uncertainty
+    # does not shrink with the horizon, so the band is only allowed to widen
+    return {
+        'method': 'normalized_split_conformal',
+        'alpha': alpha,
+        'scale_floor': scale_floor,
+        'lower': np.minimum.accumulate(lower).tolist(),
+        'upper': np.maximum.accumulate(upper).tolist(),
+        'n_calibration': counts
+    }
+
+
+def conformal_bounds(
+    predictions: np.ndarray,
+    spreads: np.ndarray,
+    conformal: Dict[str, Any],
+    horizons: Optional[np.ndarray] = None
+):
+    """
+    Lower and upper interval bounds for a batch of predictions
+
+    Args:
+        predictions: point predictions, any shape
+        spreads: per-tree standard deviation of each prediction
+        conformal: the 'conformal' metadata written by calibrate()
+        horizons: horizon (1-based) per prediction, broadcastable to
+            predictions; horizons past the calibrated range use the last one
+    """
+    lower_multipliers = np.asarray(conformal['lower'], dtype=np.float64)
+    upper_multipliers = np.asarray(conformal['upper'], dtype=np.float64)
+    if horizons is None:
+        index = 0
+    else:
+        index = np.clip(np.asarray(horizons, dtype=np.int64) - 1, 0, len(lower_multipliers) - 1)
+    scale = spreads + conformal['scale_floor']
+    return (
+        np.maximum(0, predictions + lower_multipliers[index] * scale),
+        predictions + upper_multipliers[index] * scale
+    )
@@ -0,0 +1,184 @@
+"""
+Content-Hashed Columnar Cache for Training Data
+
+Parsing `patient_visits.csv` / `external_factors.csv` and re-deriving lag
+features dominates retraining time. Frames are stored once per content hash
+of their source files:
+
+    models/cache/
+    ├── visits-3f2a...e1.parquet      # raw inputs with pinned compact dtypes
+    ├── external-9b0c...77.parquet
+    └── daily_features-51d4...0a.parquet
+
+Parquet is used when pyarrow is installed, pickle otherwise (both keep the
+pinned dtypes, including categories). A cache entry is reused only if every
+source file hashes to the same digest, so edited CSVs are re-parsed
+automatically; bump CACHE_VERSION when a builder's output changes.
+"""
+import hashlib
+import importlib.util
+import os
+import tempfile
+import pandas as pd
+from typing import Callable, Dict, Optional, Sequence
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(SCRIPT_DIR, "models", "cache")
+
+CACHE_VERSION = 1
+
+# Compact dtypes pinned on every cached frame
+VISITS_DTYPES = {
+    "hour": "int8",
+    "department": "category",
+    "patient_count": "int16",
+}
+EXTERNAL_DTYPES = {
+    "day_of_week": "category",
+    "holiday_flag": "int8",
+    "festival_name": "category",
+    "AQI": "int16",
+    "temp": "float32",
+    "rainfall": "float32",
+    "epidemic_alert_level": "int8",
+}
+DAILY_FEATURE_DTYPES = {
+    **EXTERNAL_DTYPES,
+    "patients": "int32",
+    "month": "int8",
+    "is_weekend": "int8",
+    "festival_flag": "int8",
+    "high_AQI_flag": "int8",
+    "patients_lag1": "float32",
+    "patients_lag2": "float32",
+    "patients_lag7": "float32",
+    "patients_roll7": "float32",
+}
+
+_HASH_CHUNK = 1 << 20
+
+
+def single_hospital(df: pd.DataFrame, source: str) -> pd.DataFrame:
+    """
+    A frame of one hospital without its hospital_id column
+
+    Daily and hourly features are built per date, so rows from several
+    hospitals would give duplicated dates and lags that leak the target.
+    Split multi-hospital frames on hospital_id first (as backtest does).
+    """
+    if "hospital_id" not in df.columns:
+        return df
+    hospitals = df["hospital_id"].nunique()
+    if hospitals > 1:
+        raise ValueError(f"{source} holds {hospitals} hospitals; split it on hospital_id first")
+    return df.drop(columns="hospital_id")
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def pin_dtypes(df: pd.DataFrame, dtypes: Dict[str, str]) -> pd.DataFrame:
+    """Cast the columns present in df to their pinned dtypes"""
+    return df.astype({col: dtype for col, dtype in dtypes.items() if col in df.columns})
+
+
+class DataCache:
+    """Caches DataFrames keyed by name plus the content hash of their sources"""
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR, use_parquet: Optional[bool] = None):
+        self.root = root
+        if use_parquet is None:
+            use_parquet = importlib.util.find_spec("pyarrow") is not None
+        self.use_parquet = use_parquet
+        self.extension = "parquet" if use_parquet else "pkl"
+        self.hits = 0
+        self.misses = 0
+        self._digests: Dict[str, tuple] = {}
+
+    def source_digest(self, path: str) -> str:
+        """Content hash of a source file, re-hashed only when size or mtime change"""
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        cached = self._digests.get(path)
+        if cached is None or cached[0] != signature:
+            cached = (signature, file_digest(path))
+            self._digests[path] = cached
+        return cached[1]
+
+    def key(self, name: str, sources: Sequence[str]) -> str:
+        digest = hashlib.sha256(f"v{CACHE_VERSION}:{name}".encode())
+        for path in sources:
+            digest.update(self.source_digest(path).encode())
+        return f"{name}-{digest.hexdigest()[:16]}"
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.{self.extension}")
+
+    def _read(self, path: str) -> pd.DataFrame:
+        if self.use_parquet:
+            return pd.read_parquet(path)
+        return pd.read_pickle(path)
+
+    def _write(self, df: pd.DataFrame, path: str):
+        # Write to a temporary file and move it into place so concurrent
+        # readers never see a partial file
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-cache-", dir=self.root)
+        os.close(fd)
+        try:
+            if self.use_parquet:
+                df.to_parquet(tmp_path, index=False)
+            else:
+                df.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get_or_build(
+        self,
+        name: str,
+        sources: Sequence[str],
+        builder: Callable[[], pd.DataFrame],
+        dtypes: Optional[Dict[str, str]] = None
+    ) -> pd.DataFrame:
+        """
+        Return the cached frame for (name, source contents), building it on a miss
+
+        Args:
+            name: frame name, part of the cache key
+            sources: files the frame is derived from
+            builder: produces the frame on a cache miss
+            dtypes: compact dtypes pinned before the frame is stored
+        """
+        path = self.path_for(self.key(name, sources))
+        if os.path.exists(path):
+            try:
+                df = self._read(path)
+                self.hits += 1
+                return df
+            except Exception as e:
+                print(f"⚠️  Ignoring unreadable cache file {path}: {e}")
+
+        self.misses += 1
+        df = builder()
+        if dtypes:
+            df = pin_dtypes(df, dtypes)
+        self._write(df.reset_index(drop=True), path)
+        self._remove_stale(name, path)
+        return df
+
+    def _remove_stale(self, name: str, current_path: str):
+        """Drop entries of the same frame built from older source contents"""
+        prefix, suffix = f"{name}-", f".{self.extension}"
+        for filename in os.listdir(self.root):
+            path = os.path.join(self.root, filename)
+            if filename.startswith(prefix) and filename.endswith(suffix) and path != current_path:
+                os.remove(path)
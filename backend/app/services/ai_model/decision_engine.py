@@ -1,13 +1,38 @@
-"""Decision Engine for Healthcare Advisories"""
+"""
+Decision Engine for Healthcare Advisories
+
+Every rule has an array form that takes whole forecast arrays (days,
+scenarios x days, ...) and a scalar form built on it for single predictions:
+    
+    load levels    one searchsorted against the sorted thresholds
+    staffing       ceil(load / ratio) per role, split over shifts by broadcasting
+    supplies       load x supply_rates as one matrix product
+    advisories     the declarative rule table (advisory_rules.py) checked
+                   with vectorized masks; only rules that fire build a message
+"""
 import numpy as np
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 
+from app.services.ai_model.advisory_rules import (
+    LOAD_LEVELS,
+    SEVERITY_LEVELS,
+    AdvisoryRules,
+    CompiledSection
+)
+
+# Share of each day's staff per shift; night takes the remainder
+SHIFT_SPLITS = {
+    'morning': 0.4,
+    'evening': 0.35
+}
+SHIFTS = tuple(SHIFT_SPLITS) + ('night',)
+
 
 class AutonomousDecisionEngine:
     """Makes decisions based on predictions and thresholds"""
     
-    def __init__(self):
+    def __init__(self, rules: Optional[AdvisoryRules] = None):
         # Thresholds for different alert levels
         self.thresholds = {
             'low': 300,
@@ -23,6 +48,13 @@ class AutonomousDecisionEngine:
             'support': 40       # 1 support staff per 40 patients
         }
         
+        # Minimum staff on duty regardless of load
+        self.staffing_minimums = {
+            'doctors': 4,
+            'nurses': 8,
+            'support': 4
+        }
+        
         # Supply usage rates (per patient per day)
         self.supply_rates = {
             'oxygen_cylinder': 0.08,
@@ -36,144 +68,181 @@ class AutonomousDecisionEngine:
         
         # Safety stock days
         self.safety_stock_days = 7
+        
+        # Advisory, risk and tip rules (advisory_rules.json), reloaded when the file changes
+        self.rules = rules or AdvisoryRules()
+    
+    @property
+    def roles(self) -> List[str]:
+        return list(self.staffing_ratios)
+    
+    @property
+    def supply_items(self) -> List[str]:
+        return list(self.supply_rates)
+    
+    def load_level_index(self, predicted_patients) -> np.ndarray:
+        """Index into LOAD_LEVELS for every prediction (any shape)"""
+        edges = [self.thresholds['low'], self.thresholds['normal'], self.thresholds['high']]
+        return np.searchsorted(edges, np.asarray(predicted_patients, dtype=np.float64), side='right')
+    
+    def classify_loads(self, predicted_patients) -> np.ndarray:
+        """Load level names for an array of predictions"""
+        return np.array(LOAD_LEVELS)[self.load_level_index(predicted_patients)]
     
     def classify_load(self, predicted_patients: float) -> str:
         """Classify predicted patient load"""
-        if predicted_patients < self.thresholds['low']:
-            return 'LOW'
-        elif predicted_patients < self.thresholds['normal']:
-            return 'NORMAL'
-        elif predicted_patients < self.thresholds['high']:
-            return 'HIGH'
-        else:
-            return 'CRITICAL'
+        return LOAD_LEVELS[int(self.load_level_index(predicted_patients))]
+    
+    def _staff_by_role(self, predicted_patients) -> np.ndarray:
+        """Staff needed, roles on the leading axis (long contiguous inner loops)"""
+        patients = np.asarray(predicted_patients, dtype=np.float64)
+        shape = (-1,) + (1,) * patients.ndim
+        ratios = np.array([self.staffing_ratios[role] for role in self.roles], dtype=np.float64)
+        minimums = np.array([self.staffing_minimums[role] for role in self.roles], dtype=np.float64)
+        needed = np.ceil(patients / ratios.reshape(shape))
+        return np.maximum(needed, minimums.reshape(shape), out=needed)
+    
+    def required_staff(self, predicted_patients) -> np.ndarray:
+        """Staff needed per role, shape predicted_patients.shape + (n_roles,) in `roles` order"""
+        return np.moveaxis(self._staff_by_role(predicted_patients).astype(np.int64), 0, -1)
+    
+    def recommend_staffing_array(self, predicted_patients) -> np.ndarray:
+        """
+        Staff per shift and role, shape predicted_patients.shape + (n_shifts, n_roles)
+        
+        Shifts follow SHIFTS; morning and evening get their share rounded
+        down and night takes the rest, so shifts add up to required_staff.
+        """
+        needed = self._staff_by_role(predicted_patients)
+        splits = np.array(list(SHIFT_SPLITS.values())).reshape((-1,) + (1,) * needed.ndim)
+        staffing = np.empty((len(SHIFTS),) + needed.shape, dtype=np.int64)
+        # Assigning to the integer array truncates, i.e. rounds the positive shares down
+        staffing[:-1] = splits * needed
+        staffing[-1] = needed - staffing[:-1].sum(axis=0)
+        return np.moveaxis(staffing, (0, 1), (-2, -1))
     
     def recommend_staffing(self, predicted_patients: float) -> Dict[str, Dict[str, int]]:
         """Calculate recommended staffing levels"""
-        recommendations = {}
-        
-        # Calculate required staff
-        doctors_needed = max(4, int(np.ceil(predicted_patients / self.staffing_ratios['doctors'])))
-        nurses_needed = max(8, int(np.ceil(predicted_patients / self.staffing_ratios['nurses'])))
-        support_needed = max(4, int(np.ceil(predicted_patients / self.staffing_ratios['support'])))
-        
-        # Distribute across shifts (rough distribution)
-        recommendations['morning'] = {
-            'doctors': int(doctors_needed * 0.4),
-            'nurses': int(nurses_needed * 0.4),
-            'support': int(support_needed * 0.4)
-        }
-        recommendations['evening'] = {
-            'doctors': int(doctors_needed * 0.35),
-            'nurses': int(nurses_needed * 0.35),
-            'support': int(support_needed * 0.35)
-        }
-        recommendations['night'] = {
-            'doctors': doctors_needed - recommendations['morning']['doctors'] - recommendations['evening']['doctors'],
-            'nurses': nurses_needed - recommendations['morning']['nurses'] - recommendations['evening']['nurses'],
-            'support': support_needed - recommendations['morning']['support'] - recommendations['evening']['support']
+        staffing = self.recommend_staffing_array(predicted_patients).tolist()
+        return {
+            shift: dict(zip(self.roles, counts))
+            for shift, counts in zip(SHIFTS, staffing)
         }
-        
-        return recommendations
+    
+    def supply_needs(self, predicted_patients) -> np.ndarray:
+        """Supplies used per item, shape predicted_patients.shape + (n_items,) in `supply_items` order"""
+        patients = np.asarray(predicted_patients, dtype=np.float64)
+        rates = np.array([self.supply_rates[item] for item in self.supply_items], dtype=np.float64)
+        return (patients.reshape(-1, 1) @ rates[None, :]).reshape(patients.shape + rates.shape)
+    
+    def _rule_inputs(
+        self,
+        section: CompiledSection,
+        defaults: Dict[str, Any],
+        n: int,
+        external_factors: Dict[str, Any],
+        predicted_patients=None,
+        load_levels=None
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """
+        Condition columns and template values of a rule section for n rows
+        
+        external_factors maps inputs to arrays of shape (n,) or scalars shared
+        by every row. Load levels are derived from the predictions unless
+        given as names; rows without a prediction match no load rule.
+        """
+        columns, values = {}, {}
+        for name in section.variables:
+            if name == 'patients':
+                patients = np.broadcast_to(np.asarray(
+                    np.nan if predicted_patients is None else predicted_patients, dtype=np.float64
+                ), (n,))
+                columns[name] = patients
+                finite = np.isfinite(patients)
+                values[name] = patients.astype(np.int64) if finite.all() else np.where(
+                    finite, np.nan_to_num(patients).astype(np.int64).astype(object), None
+                )
+            elif name == 'load_level':
+                if load_levels is not None:
+                    index = np.array([
+                        LOAD_LEVELS.index(level) if level in LOAD_LEVELS else -1
+                        for level in np.broadcast_to(np.asarray(load_levels, dtype=object), (n,))
+                    ], dtype=np.int64)
+                elif predicted_patients is not None:
+                    patients = np.broadcast_to(np.asarray(predicted_patients, dtype=np.float64), (n,))
+                    index = np.where(np.isnan(patients), -1, self.load_level_index(patients))
+                else:
+                    index = np.full(n, -1)
+                columns[name] = index
+                values[name] = np.array(LOAD_LEVELS + ('UNKNOWN',))[index]
+            else:
+                raw = external_factors.get(name, defaults.get(name))
+                values[name] = np.broadcast_to(np.asarray(np.nan if raw is None else raw), (n,))
+                if name in section.conditions:
+                    columns[name] = values[name].astype(np.float64)
+        return columns, values
+    
+    def _evaluate(
+        self,
+        section_name: str,
+        n: int,
+        external_factors: Dict[str, Any],
+        predicted_patients=None,
+        load_levels=None
+    ) -> Tuple[CompiledSection, np.ndarray, Dict[str, np.ndarray]]:
+        rules = self.rules.current()
+        section = rules[section_name]
+        columns, values = self._rule_inputs(
+            section, rules.defaults, n, external_factors, predicted_patients, load_levels
+        )
+        return section, section.fire(columns, n), values
+    
+    def generate_patient_advisories(
+        self,
+        predicted_patients,
+        external_factors: Dict[str, Any]
+    ) -> List[List[Dict[str, str]]]:
+        """
+        Patient advisory messages for every prediction of a 1-D array
+        
+        Args:
+            predicted_patients: predictions, shape (n,); NaN where unknown
+            external_factors: AQI, temp, epidemic_alert_level, ... as arrays
+                of shape (n,) or scalars shared by every row
+        """
+        patients = np.atleast_1d(np.asarray(predicted_patients, dtype=np.float64))
+        section, fired, values = self._evaluate("advisories", len(patients), external_factors, patients)
+        return section.render(fired, values)
     
     def generate_patient_advisory(self, predicted_patients: float, external_factors: Dict[str, Any]) -> List[Dict[str, str]]:
         """Generate patient advisory messages"""
-        advisories = []
-        
-        load_level = self.classify_load(predicted_patients)
-        
-        # High load advisory
-        if load_level in ['HIGH', 'CRITICAL']:
-            advisories.append({
-                'type': 'CAPACITY_WARNING',
-                'severity': 'HIGH' if load_level == 'CRITICAL' else 'MEDIUM',
-                'message': f"Expected high patient volume ({int(predicted_patients)} patients). Non-emergency cases may experience longer wait times.",
-                'recommendation': "Defer non-urgent visits if possible. Call ahead to schedule appointments.",
-                'icon': '⚠️'
-            })
-        
-        # AQI advisory
-        aqi = external_factors.get('AQI', 0)
-        if aqi > 250:
-            severity = 'CRITICAL' if aqi > 350 else 'HIGH'
-            advisories.append({
-                'type': 'AIR_QUALITY',
-                'severity': severity,
-                'message': f"Poor air quality (AQI: {aqi}). Increased respiratory cases expected.",
-                'recommendation': "Avoid outdoor activities. Wear N95 masks. Vulnerable populations should stay indoors.",
-                'icon': '🏭'
-            })
-        elif aqi > 150:
-            advisories.append({
-                'type': 'AIR_QUALITY',
-                'severity': 'MEDIUM',
-                'message': f"Moderate air quality (AQI: {aqi}). Sensitive groups may be affected.",
-                'recommendation': "Limit prolonged outdoor exertion. Consider wearing masks if sensitive to air pollution.",
-                'icon': '🌫️'
-            })
-        
-        # Epidemic advisory
-        epidemic_level = external_factors.get('epidemic_alert_level', 0)
-        if epidemic_level >= 2:
-            advisories.append({
-                'type': 'EPIDEMIC_ALERT',
-                'severity': 'CRITICAL',
-                'message': f"Epidemic alert level {epidemic_level}. Follow safety protocols.",
-                'recommendation': "Maintain social distancing. Wear masks. Get vaccinated. Seek medical attention if symptomatic.",
-                'icon': '🦠'
-            })
-        elif epidemic_level == 1:
-            advisories.append({
-                'type': 'EPIDEMIC_ALERT',
-                'severity': 'MEDIUM',
-                'message': f"Epidemic alert level {epidemic_level}. Increased vigilance recommended.",
-                'recommendation': "Practice good hygiene. Monitor for symptoms. Consider vaccination if eligible.",
-                'icon': '🦠'
-            })
-        
-        # Temperature advisory
-        temp = external_factors.get('temp', 25)
-        if temp > 35:
-            advisories.append({
-                'type': 'HEAT_WARNING',
-                'severity': 'HIGH',
-                'message': f"Extreme heat warning (Temperature: {temp}°C). Risk of heat-related illnesses.",
-                'recommendation': "Stay hydrated. Avoid outdoor activities during peak hours. Seek cool environments.",
-                'icon': '🌡️'
-            })
-        elif temp < 10:
-            advisories.append({
-                'type': 'COLD_WARNING',
-                'severity': 'MEDIUM',
-                'message': f"Cold weather alert (Temperature: {temp}°C). Risk of cold-related illnesses.",
-                'recommendation': "Dress warmly. Protect extremities. Be aware of hypothermia symptoms.",
-                'icon': '❄️'
-            })
-        
-        return advisories
+        return self.generate_patient_advisories([predicted_patients], external_factors)[0]
+    
+    def assess_health_risks(
+        self,
+        predicted_patients,
+        external_factors: Dict[str, Any]
+    ) -> Tuple[List[List[Dict[str, str]]], np.ndarray]:
+        """
+        Health risks and the overall risk level for every prediction of a 1-D array
+        
+        The overall level is the highest risk severity, at least MEDIUM when
+        any risk applies and LOW otherwise.
+        """
+        patients = np.atleast_1d(np.asarray(predicted_patients, dtype=np.float64))
+        section, fired, values = self._evaluate("risks", len(patients), external_factors, patients)
+        rank = section.max_severity(fired)
+        rank = np.where(rank < 0, SEVERITY_LEVELS.index('LOW'), np.maximum(rank, SEVERITY_LEVELS.index('MEDIUM')))
+        return section.render(fired, values), np.array(SEVERITY_LEVELS)[rank]
+    
+    def get_health_tips_array(self, load_levels, external_factors: Dict[str, Any]) -> List[List[str]]:
+        """Health tips for every row of a 1-D array of load level names (None where unknown)"""
+        load_levels = np.atleast_1d(np.asarray(load_levels, dtype=object))
+        section, fired, values = self._evaluate(
+            "tips", len(load_levels), external_factors, load_levels=load_levels
+        )
+        return section.render(fired, values)
     
     def get_health_tips(self, load_level: str, external_factors: Dict[str, Any]) -> List[str]:
         """Generate general health tips based on conditions"""
-        tips = []
-        
-        # General tips based on load
-        if load_level in ['HIGH', 'CRITICAL']:
-            tips.append("Consider telemedicine consultations for non-urgent issues")
-            tips.append("Have your medical records ready if visiting the hospital")
-        
-        # AQI-based tips
-        aqi = external_factors.get('AQI', 0)
-        if aqi > 200:
-            tips.append("Keep windows closed and use air purifiers if available")
-            tips.append("Monitor children and elderly for respiratory symptoms")
-        
-        # Epidemic tips
-        if external_factors.get('epidemic_alert_level', 0) > 0:
-            tips.append("Wash hands frequently with soap and water")
-            tips.append("Avoid crowded places when possible")
-        
-        # General wellness
-        tips.append("Maintain a healthy diet and regular exercise routine")
-        tips.append("Ensure adequate sleep and stress management")
-        
-        return tips
+        return self.get_health_tips_array([load_level], external_factors)[0]
@@ -0,0 +1,234 @@
+"""
+Streaming Drift Monitor for Live Prediction Inputs
+
+Training stores a compact profile of every feature in the artifact metadata
+under 'training_profile': quantile bin edges over the training rows plus
+the training count of each bin. Serving feeds each feature matrix built by
+PatientLoadPredictor into a DriftMonitor, which bins the whole batch with
+one broadcast comparison and one bincount:
+
+    bins     below min | quantile bins of the training data | above max
+    memory   two fixed integer histograms per feature (current and previous
+             window), independent of traffic
+    window   when the current histogram reaches `window` rows it becomes the
+             previous one, so reports cover the last window..2 x window rows
+
+Drift per feature is the population stability index between the live and
+training bin shares, the usual reading being < 0.1 stable, 0.1-0.25
+moderate and > 0.25 significant. Counts are per process; with the process
+inference executor each worker monitors the requests it served.
+"""
+import threading
+import numpy as np
+from typing import Any, Dict, Optional, Sequence
+
+DEFAULT_BINS = 10
+DEFAULT_WINDOW = 5000
+# Fewer live rows than this give a noisy index; report no status yet
+MIN_OBSERVATIONS = 200
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+# Bin share floor so empty bins keep the index finite
+_SHARE_FLOOR = 1e-4
+# Calendar and request-shape columns follow the requested dates, not the
+# patient population; any short live window covers only a few of their values
+UNPROFILED_FEATURES = frozenset({"month", "is_weekend", "hour", "horizon", "department_code"})
+
+
+def _bin_indices(X: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Bin of every value, shape (n_rows, n_features); edges are padded with +inf"""
+    return (X[:, :, None] >= edges[None, :, :]).sum(axis=2)
+
+
+def _feature_edges(column: np.ndarray, bins: int) -> np.ndarray:
+    """Training min, interior quantiles and just past the training max, deduplicated"""
+    low, high = float(column.min()), float(column.max())
+    inner = np.quantile(column, np.linspace(0, 1, bins + 1)[1:-1])
+    # The upper edge sits just above the max so the max itself is in range
+    return np.unique(np.concatenate([[low], inner, [np.nextafter(high, np.inf)]]))
+
+
+def training_profile(
+    X: np.ndarray,
+    feature_cols: Sequence[str],
+    bins: int = DEFAULT_BINS
+) -> Dict[str, Any]:
+    """
+    Per-feature training histograms for the 'training_profile' metadata key
+
+    Args:
+        X: training feature matrix, columns in feature_cols order
+        feature_cols: column names
+        bins: quantile bins per feature (fewer for discrete features)
+
+    Columns in UNPROFILED_FEATURES are left out and never monitored.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    if X.ndim != 2 or X.shape[1] != len(feature_cols) or len(X) == 0:
+        raise ValueError(f"Expected a non-empty matrix with {len(feature_cols)} columns, got shape {X.shape}")
+
+    features = {}
+    for i, name in enumerate(feature_cols):
+        column = X[:, i][~np.isnan(X[:, i])]
+        if name in UNPROFILED_FEATURES or len(column) == 0:
+            continue
+        edges = _feature_edges(column, bins)
+        counts = np.bincount(np.searchsorted(edges, column, side='right'), minlength=len(edges) + 1)
+        features[name] = {
+            'edges': edges.tolist(),
+            'counts': counts.tolist(),
+            'mean': float(column.mean()),
+            'std': float(column.std())
+        }
+
+    return {'bins': bins, 'n_samples': int(len(X)), 'features': features}
+
+
+def drift_status(psi: float) -> str:
+    if psi >= PSI_SIGNIFICANT:
+        return "significant"
+    if psi >= PSI_MODERATE:
+        return "moderate"
+    return "stable"
+
+
+class DriftMonitor:
+    """Fixed-memory live histograms of the monitored features of one model"""
+
+    def __init__(
+        self,
+        profile: Dict[str, Any],
+        feature_cols: Sequence[str],
+        window: int = DEFAULT_WINDOW
+    ):
+        if window <= 0:
+            raise ValueError("window must be positive")
+        features = profile.get('features', {})
+        self.columns = [i for i, name in enumerate(feature_cols) if name in features]
+        if not self.columns:
+            raise ValueError("The training profile covers none of the model's features")
+        self.names = [feature_cols[i] for i in self.columns]
+        self.window = window
+        # Every column is monitored in the usual case; skip the gather then
+        self._all_columns = len(self.columns) == len(feature_cols)
+
+        edges = [np.asarray(features[name]['edges'], dtype=np.float64) for name in self.names]
+        n_bins = max(len(e) for e in edges) + 1
+        self._edges = np.full((len(edges), n_bins - 1), np.inf)
+        self._reference = np.zeros((len(edges), n_bins))
+        for i, (name, feature_edges) in enumerate(zip(self.names, edges)):
+            self._edges[i, :len(feature_edges)] = feature_edges
+            counts = np.asarray(features[name]['counts'], dtype=np.float64)
+            self._reference[i, :len(counts)] = counts / max(counts.sum(), 1.0)
+        # Index of the above-max bin of every feature (padding bins stay empty)
+        self._above = np.array([len(e) for e in edges])
+        self._means = np.array([features[name].get('mean', np.nan) for name in self.names])
+        self._n_bins = n_bins
+        self._offsets = np.arange(len(edges)) * n_bins
+        self._size = len(edges) * n_bins
+
+        self._lock = threading.Lock()
+        self._current = np.zeros(self._size, dtype=np.int64)
+        self._previous = np.zeros(self._size, dtype=np.int64)
+        self._current_rows = 0
+        self._previous_rows = 0
+        self._sums = np.zeros(len(edges))
+        self.observations = 0
+        self.rotations = 0
+
+    @classmethod
+    def from_metadata(
+        cls,
+        metadata: Dict[str, Any],
+        feature_cols: Sequence[str],
+        window: int = DEFAULT_WINDOW
+    ) -> Optional["DriftMonitor"]:
+        """Monitor for a model artifact, or None if it was saved without a training profile"""
+        profile = metadata.get('training_profile')
+        if not profile or not any(name in profile.get('features', {}) for name in feature_cols):
+            return None
+        return cls(profile, feature_cols, window)
+
+    def observe(self, X: np.ndarray):
+        """Add a batch of feature rows (columns in the model's feature order)"""
+        if len(X) == 0:
+            return
+        values = X if self._all_columns else X[:, self.columns]
+        bins = _bin_indices(values, self._edges)
+        counts = np.bincount((bins + self._offsets).ravel(), minlength=self._size)
+        sums = values.sum(axis=0)
+        with self._lock:
+            self._current += counts
+            self._current_rows += len(values)
+            self._sums += sums
+            self.observations += len(values)
+            if self._current_rows >= self.window:
+                self._previous, self._current = self._current, self._previous
+                self._current[:] = 0
+                self._previous_rows, self._current_rows = self._current_rows, 0
+                self.rotations += 1
+
+    def _live(self):
+        with self._lock:
+            counts = (self._current + self._previous).reshape(-1, self._n_bins)
+            rows = self._current_rows + self._previous_rows
+            return counts, rows, self._sums / max(self.observations, 1)
+
+    def _psi(self, shares: np.ndarray) -> np.ndarray:
+        live = np.maximum(shares, _SHARE_FLOOR)
+        reference = np.maximum(self._reference, _SHARE_FLOOR)
+        return ((live - reference) * np.log(live / reference)).sum(axis=1)
+
+    def report(self) -> Dict[str, Any]:
+        """Per-feature drift over the live window, worst features first"""
+        counts, rows, means = self._live()
+        shares = counts / max(rows, 1)
+        psi = self._psi(shares) if rows else np.zeros(len(self.names))
+        index = np.arange(len(self.names))
+        features = [
+            {
+                'feature': self.names[i],
+                'psi': float(psi[i]),
+                'status': drift_status(psi[i]),
+                'below_range': float(shares[i, 0]),
+                'above_range': float(shares[i, self._above[i]]),
+                'live_mean': float(means[i]),
+                'training_mean': float(self._means[i])
+            }
+            for i in index[np.argsort(-psi, kind='stable')]
+        ]
+        return {
+            'status': self._overall(psi, rows),
+            'observations': self.observations,
+            'window_rows': rows,
+            'window': self.window,
+            'max_psi': float(psi.max()),
+            'features': features
+        }
+
+    def _overall(self, psi: np.ndarray, rows: int) -> str:
+        if rows < MIN_OBSERVATIONS:
+            return "insufficient_data"
+        return drift_status(float(psi.max()))
+
+    def stats(self) -> Dict[str, Any]:
+        """Compact summary for /model-info"""
+        counts, rows, _ = self._live()
+        psi = self._psi(counts / max(rows, 1)) if rows else np.zeros(len(self.names))
+        worst = int(np.argmax(psi))
+        return {
+            'status': self._overall(psi, rows),
+            'observations': self.observations,
+            'window_rows': rows,
+            'max_psi': float(psi[worst]),
+            'worst_feature': self.names[worst]
+        }
+
+    def reset(self):
+        with self._lock:
+            self._current[:] = 0
+            self._previous[:] = 0
+            self._current_rows = self._previous_rows = 0
+            self._sums[:] = 0
+            self.observations = 0
+            self.rotations = 0
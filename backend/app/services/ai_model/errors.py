@@ -0,0 +1,5 @@
+"""Exceptions the model services raise for the routers to map to HTTP errors"""
+
+
+class InvalidRequest(ValueError):
+    """A caller-supplied parameter (hospital or department id, horizon, batch size) is invalid; served as 400"""
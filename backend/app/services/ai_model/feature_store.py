@@ -0,0 +1,281 @@
+"""
+Online Feature Store for Lag and Rolling Features
+
+Keeps the last WINDOW_DAYS daily visit totals per (hospital, department) in
+fixed-size ring buffers indexed by day ordinal:
+
+    slot = day.toordinal() % WINDOW_DAYS
+
+Recording a visit and looking up patients_lag1/lag2/lag7/roll7 touch a fixed
+number of slots, so both stay constant-time however much history exists.
+Every visit also counts towards the hospital-wide ALL_DEPARTMENTS series the
+daily model is trained on.
+
+Every uvicorn/gunicorn worker has its own buffers, so they are not the
+source of truth. Each worker periodically flushes what it recorded as atomic
+per-day counters in the `feature_store_days` collection, one document per
+(hospital, department, day):
+
+    visits          $inc by the visits recorded since the last flush
+    daily actuals   $set to the reported total
+
+and then rebuilds its buffers from the counters of the last WINDOW_DAYS days
+plus what it has not flushed yet. Workers never overwrite each other's
+visits, and lag features (which never include today) agree across workers
+after one sync interval. The counters cover every day up to the last
+refresh, so a day after a series' last visit and up to then counts as 0.
+"""
+import asyncio
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+DAYS_COLLECTION = "feature_store_days"
+
+DEFAULT_HOSPITAL = "default"
+ALL_DEPARTMENTS = "ALL"
+
+# Today plus the seven days the lag7 / roll7 features look back over
+WINDOW_DAYS = 8
+# roll7 needs this many observed days, as in train_model.build_daily_features
+MIN_ROLL_DAYS = 3
+
+
+def _ordinal(day) -> int:
+    if isinstance(day, datetime):
+        day = day.date()
+    return day.toordinal()
+
+
+class DailyRingBuffer:
+    """Daily totals for the last WINDOW_DAYS days of one series"""
+
+    __slots__ = ('counts', 'days', 'first_day', 'last_day')
+
+    def __init__(self):
+        self.counts = [0.0] * WINDOW_DAYS
+        self.days = [-1] * WINDOW_DAYS
+        self.first_day: Optional[int] = None
+        self.last_day: Optional[int] = None
+
+    def _slot(self, day: int) -> Optional[int]:
+        """Slot holding `day`, claiming it if it held an older day; None if evicted"""
+        if self.last_day is not None and day <= self.last_day - WINDOW_DAYS:
+            return None
+        slot = day % WINDOW_DAYS
+        if self.days[slot] != day:
+            self.days[slot] = day
+            self.counts[slot] = 0.0
+        if self.first_day is None or day < self.first_day:
+            self.first_day = day
+        if self.last_day is None or day > self.last_day:
+            self.last_day = day
+        return slot
+
+    def add(self, day: int, count: float = 1.0) -> bool:
+        """Add visits to a day; False if the day has already left the window"""
+        slot = self._slot(day)
+        if slot is None:
+            return False
+        self.counts[slot] += count
+        return True
+
+    def set(self, day: int, total: float) -> bool:
+        """Overwrite a day's total (e.g. from a reported daily actual)"""
+        slot = self._slot(day)
+        if slot is None:
+            return False
+        self.counts[slot] = float(total)
+        return True
+
+    def value(self, day: int, synced_through: Optional[int] = None) -> Optional[float]:
+        """
+        Total for a day, 0 for tracked days without visits, None if unknown
+
+        Days after the last recorded one are known to be quiet (0) up to
+        `synced_through`, the last day the store has complete counters for.
+        """
+        if self.last_day is None or day < self.first_day:
+            return None
+        if day > self.last_day:
+            return 0.0 if synced_through is not None and day <= synced_through else None
+        if day <= self.last_day - WINDOW_DAYS:
+            return None
+        slot = day % WINDOW_DAYS
+        return self.counts[slot] if self.days[slot] == day else 0.0
+
+
+class FeatureStore:
+    """Ring buffers of daily visit totals keyed by (hospital, department)"""
+
+    def __init__(self):
+        self._series: Dict[Tuple[str, str], DailyRingBuffer] = {}
+        # Not yet flushed: visits to add and reported totals per (hospital, department, day)
+        self._pending: Dict[Tuple[str, str, int], float] = {}
+        self._totals: Dict[Tuple[str, str, int], float] = {}
+        self._lock = threading.Lock()
+        # Last day the shared counters were loaded through (None before the first refresh)
+        self._synced_through: Optional[int] = None
+        self.recorded = 0
+        self.late_dropped = 0
+
+    def _buffer(self, key: Tuple[str, str]) -> DailyRingBuffer:
+        buffer = self._series.get(key)
+        if buffer is None:
+            buffer = self._series[key] = DailyRingBuffer()
+        return buffer
+
+    def record_visit(
+        self,
+        department: str,
+        when: Optional[datetime] = None,
+        count: int = 1,
+        hospital_id: str = DEFAULT_HOSPITAL
+    ) -> bool:
+        """Count visits towards the department's and the hospital's daily totals"""
+        day = _ordinal(when or datetime.now())
+        keys = [(hospital_id, department)]
+        if department != ALL_DEPARTMENTS:
+            keys.append((hospital_id, ALL_DEPARTMENTS))
+
+        with self._lock:
+            accepted = True
+            for key in keys:
+                if self._buffer(key).add(day, count):
+                    self._pending[key + (day,)] = self._pending.get(key + (day,), 0.0) + count
+                else:
+                    accepted = False
+            if accepted:
+                self.recorded += count
+            else:
+                self.late_dropped += count
+        return accepted
+
+    def set_daily_total(
+        self,
+        day,
+        total: float,
+        department: str = ALL_DEPARTMENTS,
+        hospital_id: str = DEFAULT_HOSPITAL
+    ) -> bool:
+        """Replace one day's total for a series with a reported figure"""
+        key = (hospital_id, department)
+        day = _ordinal(day)
+        with self._lock:
+            if not self._buffer(key).set(day, total):
+                return False
+            # The reported total replaces the visits counted so far
+            self._pending.pop(key + (day,), None)
+            self._totals[key + (day,)] = float(total)
+            return True
+
+    def get_features(
+        self,
+        target_day=None,
+        department: str = ALL_DEPARTMENTS,
+        hospital_id: str = DEFAULT_HOSPITAL
+    ) -> Optional[Dict[str, float]]:
+        """
+        lag1, lag2, lag7 and roll7 for a target day (default today)
+
+        Returns None when a lag falls outside the recorded history.
+        """
+        day = _ordinal(target_day or date.today())
+        with self._lock:
+            buffer = self._series.get((hospital_id, department))
+            if buffer is None:
+                return None
+            previous = [buffer.value(day - k, self._synced_through) for k in range(1, 8)]
+
+        lag1, lag2, lag7 = previous[0], previous[1], previous[6]
+        observed = [v for v in previous if v is not None]
+        if lag1 is None or lag2 is None or lag7 is None or len(observed) < MIN_ROLL_DAYS:
+            return None
+        return {
+            'lag1': lag1,
+            'lag2': lag2,
+            'lag7': lag7,
+            'roll7': sum(observed) / len(observed)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'series': len(self._series),
+                'synced_through': (
+                    date.fromordinal(self._synced_through).isoformat() if self._synced_through else None
+                ),
+                'recorded': self.recorded,
+                'late_dropped': self.late_dropped,
+                'unflushed': len(self._pending) + len(self._totals)
+            }
+
+    async def flush(self, database) -> int:
+        """Write the visits and totals recorded since the last flush; returns how many days"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            totals, self._totals = self._totals, {}
+
+        def fields(hospital_id, department, day):
+            return {'hospital_id': hospital_id, 'department': department, 'day': day, 'updated_at': datetime.utcnow()}
+
+        # Totals first: visits recorded after a reported total add to it
+        writes = [
+            (key, {'$set': {**fields(*key), 'count': total}}) for key, total in totals.items()
+        ] + [
+            (key, {'$inc': {'count': count}, '$set': fields(*key)}) for key, count in pending.items()
+        ]
+        collection = database[DAYS_COLLECTION]
+        written = 0
+        try:
+            for (hospital_id, department, day), update in writes:
+                await collection.update_one({'_id': f"{hospital_id}|{department}|{day}"}, update, upsert=True)
+                written += 1
+        except Exception:
+            # Retry the rest on the next flush; a newer reported total supersedes them
+            with self._lock:
+                for key, update in writes[written:]:
+                    if key in self._totals:
+                        continue
+                    if '$inc' in update:
+                        self._pending[key] = self._pending.get(key, 0.0) + update['$inc']['count']
+                    else:
+                        self._totals[key] = update['$set']['count']
+            raise
+        return len(writes)
+
+    async def refresh(self, database, today=None) -> int:
+        """Rebuild the buffers from the last WINDOW_DAYS days of counters; returns how many days"""
+        last_day = _ordinal(today or date.today())
+        first_day = last_day - WINDOW_DAYS + 1
+        documents: List[Dict[str, Any]] = await database[DAYS_COLLECTION].find(
+            {'day': {'$gte': first_day}}
+        ).sort('day', 1).to_list(length=None)
+
+        series: Dict[Tuple[str, str], DailyRingBuffer] = {}
+        for document in documents:
+            key = (document['hospital_id'], document['department'])
+            series.setdefault(key, DailyRingBuffer()).set(int(document['day']), document['count'])
+        with self._lock:
+            # Keep what this worker recorded but has not flushed yet
+            for (hospital_id, department, day), total in self._totals.items():
+                series.setdefault((hospital_id, department), DailyRingBuffer()).set(day, total)
+            for (hospital_id, department, day), count in self._pending.items():
+                series.setdefault((hospital_id, department), DailyRingBuffer()).add(day, count)
+            self._series = series
+            self._synced_through = last_day
+        return len(documents)
+
+
+async def sync_loop(get_db, store: FeatureStore, interval_seconds: float):
+    """Flush the store's counts and reload everyone's every `interval_seconds`"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            database = get_db()
+            await store.flush(database)
+            await store.refresh(database)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️  Feature store sync failed: {e}")
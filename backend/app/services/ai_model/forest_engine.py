@@ -0,0 +1,312 @@
+"""Array-backed Tree Ensemble for Fast Patient Load Inference"""
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+
+class CompiledForest:
+    """
+    Random forest flattened into contiguous node arrays
+
+    Every tree of a fitted sklearn forest is concatenated into one set of
+    arrays indexed by a global node id. Leaves point to themselves on both
+    sides, so a batch of rows can be walked through all trees at once with a
+    fixed number of vectorized steps (the maximum tree depth) and no
+    per-tree or per-row Python loop.
+    """
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        n_features: int,
+        children: Optional[np.ndarray] = None,
+        value_scale: Optional[float] = None,
+        value_offset: float = 0.0
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        # Interleaved [right, left] children so one gather picks the next node.
+        # Artifacts store it precomputed so memory-mapped forests stay copy-free.
+        if children is None:
+            children = np.stack([right, left], axis=1).ravel().astype(np.int32)
+        self.children = children
+        # Integer-quantized values decode as value_offset + value_scale * value
+        self.value_scale = None if value_scale is None else float(value_scale)
+        self.value_offset = float(value_offset)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            arr.nbytes for arr in
+            (self.feature, self.threshold, self.left, self.right, self.value, self.roots, self.children)
+        )
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Return the node arrays keyed by their artifact file names"""
+        return {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'left': self.left,
+            'right': self.right,
+            'value': self.value,
+            'roots': self.roots,
+            'children': self.children
+        }
+
+    def node_values(self, nodes: Optional[np.ndarray] = None) -> np.ndarray:
+        """Decoded float64 values of the given nodes (all nodes by default)"""
+        values = self.value if nodes is None else self.value[nodes]
+        if self.value_scale is None:
+            return values.astype(np.float64, copy=False)
+        return self.value_offset + self.value_scale * values
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledForest":
+        """Flatten a fitted RandomForestRegressor (or single-output tree ensemble)"""
+        if not hasattr(model, 'estimators_'):
+            raise ValueError("Model is not a fitted tree ensemble")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            node_ids = np.arange(n, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+
+            # Leaves loop back to themselves so traversal can run a fixed number of steps
+            left = np.where(is_leaf, node_ids, tree.children_left).astype(np.int32) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right).astype(np.int32) + offset
+            feature = np.where(is_leaf, 0, tree.feature).astype(np.int32)
+
+            features.append(feature)
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(left)
+            rights.append(right)
+            values.append(tree.value.reshape(n, -1)[:, 0].astype(np.float64))
+            roots.append(offset)
+
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=np.int32),
+            max_depth=max_depth,
+            n_features=model.n_features_in_
+        )
+
+    def tree_sizes(self) -> np.ndarray:
+        """Number of nodes in each tree (trees are stored contiguously, in root order)"""
+        return np.diff(np.append(self.roots, self.n_nodes))
+
+    def select_trees(self, tree_ids) -> "CompiledForest":
+        """Return a new forest holding only the given trees, in the given order"""
+        tree_ids = np.asarray(tree_ids, dtype=np.int64)
+        starts = self.roots[tree_ids].astype(np.int64)
+        sizes = self.tree_sizes()[tree_ids]
+        new_roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+
+        # Old global node ids of the kept trees, and the shift to their new ids
+        nodes = np.repeat(starts - new_roots, sizes)
+        old_ids = np.arange(int(sizes.sum()), dtype=np.int64) + nodes
+        shift = -nodes
+
+        return CompiledForest(
+            feature=np.asarray(self.feature[old_ids]),
+            threshold=np.asarray(self.threshold[old_ids]),
+            left=(self.left[old_ids] + shift).astype(np.int32),
+            right=(self.right[old_ids] + shift).astype(np.int32),
+            value=np.asarray(self.value[old_ids]),
+            roots=new_roots.astype(np.int32),
+            max_depth=self.max_depth,
+            n_features=self.n_features,
+            value_scale=self.value_scale,
+            value_offset=self.value_offset
+        )
+
+    def node_depths(self) -> np.ndarray:
+        """Depth of every node below its tree's root (roots are depth 0)"""
+        depths = np.zeros(self.n_nodes, dtype=np.int32)
+        frontier = self.roots.astype(np.int64)
+        depth = 0
+        while len(frontier):
+            depths[frontier] = depth
+            internal = frontier[self.left[frontier] != frontier]
+            frontier = np.concatenate([self.left[internal], self.right[internal]])
+            depth += 1
+        return depths
+
+    def truncate(self, max_depth: int) -> "CompiledForest":
+        """
+        Return a forest whose trees stop at max_depth
+
+        Nodes at the cap become leaves predicting their own value, which for
+        fitted regression trees is the mean target of the samples reaching
+        them; everything below is dropped.
+        """
+        if max_depth < 1:
+            raise ValueError(f"max_depth must be at least 1, got {max_depth}")
+        if max_depth >= self.max_depth:
+            return self
+
+        depths = self.node_depths()
+        old_ids = np.flatnonzero(depths <= max_depth)
+        new_ids = np.full(self.n_nodes, -1, dtype=np.int64)
+        new_ids[old_ids] = np.arange(len(old_ids))
+        is_cut = depths[old_ids] == max_depth
+        own_ids = np.arange(len(old_ids))
+
+        return CompiledForest(
+            feature=np.where(is_cut, 0, self.feature[old_ids]).astype(self.feature.dtype),
+            threshold=np.asarray(self.threshold[old_ids]),
+            left=np.where(is_cut, own_ids, new_ids[self.left[old_ids]]).astype(np.int32),
+            right=np.where(is_cut, own_ids, new_ids[self.right[old_ids]]).astype(np.int32),
+            value=np.asarray(self.value[old_ids]),
+            roots=new_ids[self.roots].astype(np.int32),
+            max_depth=max_depth,
+            n_features=self.n_features,
+            value_scale=self.value_scale,
+            value_offset=self.value_offset
+        )
+
+    def quantize(self, value_dtype: str = "int16") -> "CompiledForest":
+        """
+        Return a forest with float32 thresholds and compact node values
+
+        Inputs are compared as float32 values, so rounding each threshold down
+        to the nearest float32 leaves every split decision unchanged. Values
+        become float32, or int16 codes on an affine grid spanning the value
+        range (error at most half a grid step).
+        """
+        threshold = self.threshold.astype(np.float32)
+        rounded_up = threshold.astype(np.float64) > self.threshold
+        threshold[rounded_up] = np.nextafter(threshold[rounded_up], np.float32(-np.inf))
+        values = self.node_values()
+
+        if value_dtype == "float32":
+            value, scale, offset = values.astype(np.float32), None, 0.0
+        elif value_dtype == "int16":
+            info = np.iinfo(np.int16)
+            low, high = float(values.min()), float(values.max())
+            scale = (high - low) / (info.max - info.min) if high > low else 1.0
+            codes = np.rint((values - low) / scale) + info.min
+            value = codes.astype(np.int16)
+            offset = low - info.min * scale
+        else:
+            raise ValueError(f"Unknown value dtype '{value_dtype}', expected 'int16' or 'float32'")
+
+        return CompiledForest(
+            feature=self.feature.astype(np.int16),
+            threshold=threshold,
+            left=self.left,
+            right=self.right,
+            value=value,
+            roots=self.roots,
+            max_depth=self.max_depth,
+            n_features=self.n_features,
+            children=self.children,
+            value_scale=scale,
+            value_offset=offset
+        )
+
+    @classmethod
+    def concat(cls, forests) -> "CompiledForest":
+        """Join forests into one; trees keep their order, first forest first"""
+        forests = list(forests)
+        n_features = {forest.n_features for forest in forests}
+        if len(n_features) != 1:
+            raise ValueError(f"Cannot join forests with different feature counts: {sorted(n_features)}")
+
+        offsets = np.cumsum([0] + [forest.n_nodes for forest in forests[:-1]])
+        if all(forest.value_scale is None for forest in forests):
+            values = np.concatenate([forest.value for forest in forests])
+        else:
+            # Quantization grids differ between forests, so join decoded values
+            values = np.concatenate([forest.node_values() for forest in forests])
+        return cls(
+            feature=np.concatenate([forest.feature for forest in forests]),
+            threshold=np.concatenate([forest.threshold for forest in forests]),
+            left=np.concatenate([forest.left + offset for forest, offset in zip(forests, offsets)]).astype(np.int32),
+            right=np.concatenate([forest.right + offset for forest, offset in zip(forests, offsets)]).astype(np.int32),
+            value=values,
+            roots=np.concatenate([forest.roots + offset for forest, offset in zip(forests, offsets)]).astype(np.int32),
+            max_depth=max(forest.max_depth for forest in forests),
+            n_features=n_features.pop()
+        )
+
+    def _validate(self, X: np.ndarray) -> np.ndarray:
+        # sklearn compares float32-cast inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected input of shape (n, {self.n_features}), got {X.shape}")
+        return X
+
+    def _walk(self, flat_X: np.ndarray, row_offsets: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+        """Advance every (row offset, node) pair to its leaf"""
+        for _ in range(self.max_depth):
+            x = np.take(flat_X, row_offsets + np.take(self.feature, nodes))
+            go_left = x <= np.take(self.threshold, nodes)
+            nodes = np.take(self.children, (nodes << 1) + go_left)
+        return nodes
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Return the (n_rows, n_trees) matrix of global leaf ids reached by each row"""
+        X = self._validate(X)
+        n_rows = X.shape[0]
+        row_offsets = np.repeat(np.arange(n_rows, dtype=np.int32) * self.n_features, self.n_trees)
+        nodes = self._walk(X.ravel(), row_offsets, np.tile(self.roots, n_rows))
+        return nodes.reshape(n_rows, self.n_trees)
+
+    def predict_selected(self, X: np.ndarray, tree_ids: np.ndarray) -> np.ndarray:
+        """
+        Prediction of tree tree_ids[i] for row i
+
+        Walks one tree per row instead of the whole forest, e.g. to draw
+        Monte Carlo samples from the ensemble.
+        """
+        X = self._validate(X)
+        tree_ids = np.asarray(tree_ids)
+        if tree_ids.shape != (X.shape[0],):
+            raise ValueError(f"Expected {X.shape[0]} tree ids, got shape {tree_ids.shape}")
+        row_offsets = np.arange(X.shape[0], dtype=np.int32) * self.n_features
+        nodes = self._walk(X.ravel(), row_offsets, np.take(self.roots, tree_ids))
+        return self.node_values(nodes)
+
+    def predict_trees(self, X: np.ndarray) -> np.ndarray:
+        """Return per-tree predictions with shape (n_trees, n_rows)"""
+        return self.node_values(self.apply(X)).T
+
+    def predict_with_std(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return forest mean and per-tree standard deviation for every row"""
+        tree_predictions = self.predict_trees(X)
+        return tree_predictions.mean(axis=0), tree_predictions.std(axis=0)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Return the forest mean prediction for every row"""
+        return self.predict_trees(X).mean(axis=0)
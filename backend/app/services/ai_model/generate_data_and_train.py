@@ -1,7 +1,14 @@
 """
 Generate synthetic healthcare data and train the prediction model
 Extracted from data.ipynb notebook
+
+Run from the backend directory; larger multi-hospital datasets are
+generated in one vectorized pass:
+    
+    python -m app.services.ai_model.generate_data_and_train --hospitals 10 --years 5
 """
+import argparse
+import time
 import numpy as np
 import pandas as pd
 import pickle
@@ -10,6 +17,8 @@ from datetime import datetime
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 
+from app.services.ai_model.data_cache import single_hospital
+
 # For reproducibility
 RANDOM_SEED = 42
 np.random.seed(RANDOM_SEED)
@@ -25,163 +34,273 @@ DEPARTMENTS = ["ER", "Resp_OPD"]
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(SCRIPT_DIR, "data")
 MODELS_DIR = os.path.join(SCRIPT_DIR, "models")
+# File name suffix of --hospitals N>1 datasets (patient_visits_hospitals.csv)
+MULTI_HOSPITAL_SUFFIX = "_hospitals"
 
 # Create directories if they don't exist
 os.makedirs(DATA_DIR, exist_ok=True)
 os.makedirs(MODELS_DIR, exist_ok=True)
 
 
+# Festivals / holidays (month-day, repeated every year)
+FESTIVAL_INFO = {
+    "01-26": "Republic_Day",
+    "03-25": "Holi",
+    "08-15": "Independence_Day",
+    "11-01": "Diwali",
+    "12-25": "Christmas",
+}
+
+MONTH_BASE_AQI = np.array([260, 220, 200, 180, 170, 150, 140, 145, 160, 200, 260, 270])
+MONTH_BASE_TEMP = np.array([15, 18, 24, 30, 34, 32, 30, 30, 29, 26, 20, 16])
+
+# Recurring epidemic waves (month-day, length in days); one extra wave per
+# hospital and year starts on a random day
+EPIDEMIC_WAVES = [("01-05", 10), ("07-10", 14), ("12-10", 12)]
+EPIDEMIC_PATTERN = np.array([0, 1, 2, 3, 2, 1])
+
+# Hourly demand model per department: base arrivals, weekend/holiday shift and
+# extra arrivals when AQI exceeds 200 / 300
+DEPARTMENT_PROFILES = {
+    "ER": {"base": 6, "weekend": 2, "holiday": 5, "aqi_200": 0, "aqi_300": 0},
+    "Resp_OPD": {"base": 4, "weekend": -1, "holiday": 3, "aqi_200": 3, "aqi_300": 5},
+    "General_OPD": {"base": 8, "weekend": -3, "holiday": -2, "aqi_200": 1, "aqi_300": 1},
+    "Pediatrics": {"base": 3, "weekend": 1, "holiday": 1, "aqi_200": 1, "aqi_300": 2},
+}
+
+# Time-of-day effects
+HOUR_EFFECT = np.zeros(24)
+HOUR_EFFECT[9:13] += 4
+HOUR_EFFECT[18:22] += 3
+HOUR_EFFECT[0:6] -= 2
+
+# Extra arrivals by epidemic alert level (0-3)
+EPIDEMIC_EFFECT = np.array([0, 2, 6, 12])
+
+
 def add_epidemic_wave(df, start_date, length=10):
     """Adds a wave like: 0,1,2,3,2,1,... over 'length' days."""
-    pattern = [0, 1, 2, 3, 2, 1]
-    idxs = df.index[df["date"].between(start_date, start_date + pd.Timedelta(days=length - 1))]
-    for i, idx in enumerate(idxs):
-        df.at[idx, "epidemic_alert_level"] = max(
-            df.at[idx, "epidemic_alert_level"],
-            pattern[i % len(pattern)]
-        )
+    offset = (df["date"] - start_date).dt.days.to_numpy()
+    in_wave = (offset >= 0) & (offset < length)
+    wave = np.where(in_wave, EPIDEMIC_PATTERN[offset % len(EPIDEMIC_PATTERN)], 0)
+    df["epidemic_alert_level"] = np.maximum(df["epidemic_alert_level"].to_numpy(), wave)
 
 
-def generate_external_factors(start_date=START_DATE, end_date=END_DATE, seed=42):
-    np.random.seed(seed)
-    
-    dates = pd.date_range(start_date, end_date, freq="D")
-    df = pd.DataFrame({"date": dates})
-    df["day_of_week"] = df["date"].dt.day_name()
-    df["month"] = df["date"].dt.month
-    
-    # Festivals / holidays
-    festival_info = {
-        "2024-01-26": "Republic_Day",
-        "2024-03-25": "Holi",
-        "2024-08-15": "Independence_Day",
-        "2024-11-01": "Diwali",
-        "2024-12-25": "Christmas",
-    }
-    festival_dates = pd.to_datetime(list(festival_info.keys()))
-    df["holiday_flag"] = df["date"].isin(festival_dates).astype(int)
-    df["festival_name"] = df["date"].map(
-        lambda d: festival_info.get(d.strftime("%Y-%m-%d"), "")
-    )
-    
-    # AQI
-    month_base_aqi = {
-        1: 260, 2: 220, 3: 200, 4: 180, 5: 170, 6: 150,
-        7: 140, 8: 145, 9: 160, 10: 200, 11: 260, 12: 270,
-    }
-    df["AQI_base"] = df["month"].map(month_base_aqi)
-    noise_aqi = np.random.normal(0, 25, size=len(df))
-    df["AQI"] = (df["AQI_base"] + noise_aqi).clip(50, 500)
-    
-    # Extra pollution around Diwali
-    diwali_mask = df["festival_name"] == "Diwali"
-    for offset in [0, 1, 2]:
-        df.loc[diwali_mask.shift(offset, fill_value=False), "AQI"] += 80
-    df["AQI"] = df["AQI"].clip(50, 500).round().astype(int)
+def _epidemic_levels(dates, wave_starts, wave_lengths):
+    """
+    Epidemic alert level per hospital and day from overlapping waves
+    
+    Args:
+        dates: DatetimeIndex of D days
+        wave_starts: (H, W) wave start dates as datetime64[D]
+        wave_lengths: (H, W) wave lengths in days
+    
+    Returns:
+        (H, D) int array
+    """
+    offset = (
+        dates.to_numpy().astype("datetime64[D]")[None, None, :] - wave_starts[:, :, None]
+    ).astype(np.int64)
+    in_wave = (offset >= 0) & (offset < wave_lengths[:, :, None])
+    levels = np.where(in_wave, EPIDEMIC_PATTERN[offset % len(EPIDEMIC_PATTERN)], 0)
+    return levels.max(axis=1)
+
+
+def _external_factor_arrays(dates, n_hospitals, rng):
+    """
+    Daily external factors for every hospital as (H, D) arrays
+    
+    Hospitals share the calendar but get their own AQI/temperature offsets,
+    weather noise and random epidemic waves.
+    """
+    n_days = len(dates)
+    shape = (n_hospitals, n_days)
+    month_idx = dates.month.to_numpy() - 1
+    month_day = dates.strftime("%m-%d")
+    
+    holiday = np.isin(month_day, list(FESTIVAL_INFO)).astype(int)
+    festival = np.array([FESTIVAL_INFO.get(md, "") for md in month_day])
+    
+    # AQI, plus extra pollution on Diwali and the two days after
+    aqi_offset = np.zeros((n_hospitals, 1)) if n_hospitals == 1 else rng.normal(0, 20, size=(n_hospitals, 1))
+    aqi = MONTH_BASE_AQI[month_idx][None, :] + aqi_offset + rng.normal(0, 25, size=shape)
+    diwali = festival == "Diwali"
+    diwali_window = diwali.copy()
+    diwali_window[1:] |= diwali[:-1]
+    diwali_window[2:] |= diwali[:-2]
+    aqi = aqi + 80 * diwali_window[None, :]
+    aqi = aqi.clip(50, 500).round().astype(int)
     
     # Temperature
-    month_base_temp = {
-        1: 15, 2: 18, 3: 24, 4: 30, 5: 34, 6: 32,
-        7: 30, 8: 30, 9: 29, 10: 26, 11: 20, 12: 16,
-    }
-    df["temp_base"] = df["month"].map(month_base_temp)
-    noise_temp = np.random.normal(0, 2, size=len(df))
-    df["temp"] = (df["temp_base"] + noise_temp).round(1)
-    
-    # Rainfall
-    df["rainfall"] = 0.0
-    monsoon_mask = df["month"].isin([6, 7, 8, 9])
-    df.loc[monsoon_mask, "rainfall"] = np.random.gamma(
-        shape=2.5, scale=6, size=monsoon_mask.sum()
-    ).round(1)
-    
-    non_monsoon_mask = ~monsoon_mask
-    non_monsoon_idx = df.index[non_monsoon_mask]
-    rain_chance = np.random.rand(non_monsoon_idx.size)
-    light_rain_idx = non_monsoon_idx[rain_chance < 0.3]
-    df.loc[light_rain_idx, "rainfall"] = np.random.uniform(
-        0.5, 5.0, light_rain_idx.size
-    ).round(1)
+    temp_offset = np.zeros((n_hospitals, 1)) if n_hospitals == 1 else rng.normal(0, 1.5, size=(n_hospitals, 1))
+    temp = (MONTH_BASE_TEMP[month_idx][None, :] + temp_offset + rng.normal(0, 2, size=shape)).round(1)
     
-    # Epidemic alert level
-    df["epidemic_alert_level"] = 0
-    add_epidemic_wave(df, pd.to_datetime("2024-01-05"), length=10)
-    add_epidemic_wave(df, pd.to_datetime("2024-07-10"), length=14)
-    add_epidemic_wave(df, pd.to_datetime("2024-12-10"), length=12)
-    rand_start = np.random.choice(df["date"].iloc[30:-30])
-    add_epidemic_wave(df, rand_start, length=10)
+    # Rainfall: heavy during the monsoon, occasional light rain otherwise
+    monsoon = np.isin(month_idx + 1, [6, 7, 8, 9])[None, :]
+    heavy = rng.gamma(shape=2.5, scale=6, size=shape).round(1)
+    light = rng.uniform(0.5, 5.0, size=shape).round(1)
+    light_rain = rng.random(size=shape) < 0.3
+    rainfall = np.where(monsoon, heavy, np.where(light_rain, light, 0.0))
     
+    # Epidemic alert level
+    years = np.unique(dates.year)
+    fixed_starts = np.array(
+        [np.datetime64(f"{year}-{md}") for year in years for md, _ in EPIDEMIC_WAVES]
+    )
+    fixed_lengths = np.array([length for _ in years for _, length in EPIDEMIC_WAVES])
+    low, high = (30, n_days - 30) if n_days > 60 else (0, n_days)
+    random_starts = dates.to_numpy().astype("datetime64[D]")[
+        rng.integers(low, high, size=(n_hospitals, len(years)))
+    ]
+    wave_starts = np.concatenate([np.broadcast_to(fixed_starts, (n_hospitals, len(fixed_starts))), random_starts], axis=1)
+    wave_lengths = np.concatenate([
+        np.broadcast_to(fixed_lengths, (n_hospitals, len(fixed_lengths))),
+        np.full((n_hospitals, len(years)), 10)
+    ], axis=1)
+    epidemic = _epidemic_levels(dates, wave_starts, wave_lengths)
+    
+    return {
+        "holiday_flag": np.broadcast_to(holiday, shape),
+        "festival_name": np.broadcast_to(festival, shape),
+        "AQI": aqi,
+        "temp": temp,
+        "rainfall": rainfall,
+        "epidemic_alert_level": epidemic,
+    }
+
+
+def _external_factors_frame(dates, factors, hospital_ids=None):
+    """Flatten (H, D) factor arrays into one row per (hospital, date)"""
+    n_hospitals = factors["AQI"].shape[0]
+    df = pd.DataFrame({
+        "date": np.tile(dates, n_hospitals),
+        "day_of_week": np.tile(dates.day_name(), n_hospitals),
+        **{name: np.asarray(values).reshape(-1) for name, values in factors.items()},
+    })
     df = df[[
         "date", "day_of_week", "holiday_flag", "festival_name",
         "AQI", "temp", "rainfall", "epidemic_alert_level"
     ]]
-    
+    if hospital_ids is not None:
+        df.insert(0, "hospital_id", np.repeat(hospital_ids, len(dates)))
     return df
 
 
-def generate_patient_visits(df_ext):
-    """Generate hourly patient visit data"""
-    rows = []
-    
-    for _, day_row in df_ext.iterrows():
-        date = day_row["date"]
-        dow = day_row["day_of_week"]
-        holiday = day_row["holiday_flag"]
-        aqi = day_row["AQI"]
-        epidemic = day_row["epidemic_alert_level"]
-        
-        for hour in range(24):
-            for dept in DEPARTMENTS:
-                # Base demand
-                base = 6 if dept == "ER" else 4
-                
-                # Time-of-day effects
-                if 9 <= hour <= 12:
-                    base += 4
-                if 18 <= hour <= 21:
-                    base += 3
-                if 0 <= hour <= 5:
-                    base -= 2
-                
-                # Weekend effect
-                if dow in ["Saturday", "Sunday"]:
-                    base += 2 if dept == "ER" else -1
-                
-                # Holiday effect
-                if holiday:
-                    base += 5 if dept == "ER" else 3
-                
-                # Pollution effect
-                if dept == "Resp_OPD":
-                    if aqi > 200:
-                        base += 3
-                    if aqi > 300:
-                        base += 5
-                
-                # Epidemic effect
-                if epidemic >= 1:
-                    base += 2
-                if epidemic >= 2:
-                    base += 4
-                if epidemic == 3:
-                    base += 6
-                
-                # Add noise
-                mean = max(0, base)
-                count = int(np.random.normal(loc=mean, scale=2))
-                count = max(count, 0)
-                
-                rows.append([date, hour, dept, count])
-    
-    df_visits = pd.DataFrame(
-        rows, columns=["date", "hour", "department", "patient_count"]
+def generate_external_factors(start_date=START_DATE, end_date=END_DATE, seed=42):
+    """Daily external factors for a single hospital"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start_date, end_date, freq="D")
+    return _external_factors_frame(dates, _external_factor_arrays(dates, 1, rng))
+
+
+def expected_visits(aqi, holiday, is_weekend, epidemic, departments=DEPARTMENTS):
+    """
+    Mean hourly arrivals broadcast over (..., day, hour, department)
+    
+    Args:
+        aqi, holiday, is_weekend, epidemic: arrays of shape (..., D)
+        departments: department names from DEPARTMENT_PROFILES
+    
+    Returns:
+        array of shape (..., D, 24, len(departments)), clipped at 0
+    """
+    profile = {
+        key: np.array([DEPARTMENT_PROFILES[dept][key] for dept in departments], dtype=np.float64)
+        for key in ("base", "weekend", "holiday", "aqi_200", "aqi_300")
+    }
+    day = lambda a: np.asarray(a, dtype=np.float64)[..., None, None]
+    
+    mean = (
+        profile["base"]
+        + HOUR_EFFECT[:, None]
+        + day(is_weekend) * profile["weekend"]
+        + day(holiday) * profile["holiday"]
+        + day(np.asarray(aqi) > 200) * profile["aqi_200"]
+        + day(np.asarray(aqi) > 300) * profile["aqi_300"]
+        + day(EPIDEMIC_EFFECT[np.asarray(epidemic, dtype=int)])
     )
+    return np.maximum(mean, 0)
+
+
+def sample_visits(mean, rng):
+    """Noisy integer counts around the expected arrivals"""
+    return np.maximum(np.trunc(rng.normal(loc=mean, scale=2)), 0).astype(np.int16)
+
+
+def _visits_frame(dates, counts, departments, hospital_ids=None):
+    """Flatten a (H, D, 24, K) count tensor into long-format visit rows"""
+    n_hospitals, n_days, n_hours, n_departments = counts.shape
+    per_hospital = n_days * n_hours * n_departments
+    df = pd.DataFrame({
+        "date": np.tile(np.repeat(dates.to_numpy(), n_hours * n_departments), n_hospitals),
+        "hour": np.tile(np.repeat(np.arange(n_hours, dtype=np.int16), n_departments), n_hospitals * n_days),
+        "department": pd.Categorical.from_codes(
+            np.tile(np.arange(n_departments), n_hospitals * n_days * n_hours), categories=list(departments)
+        ),
+        "patient_count": counts.reshape(-1),
+    })
+    if hospital_ids is not None:
+        df.insert(0, "hospital_id", np.repeat(hospital_ids, per_hospital))
+    return df
+
+
+def generate_patient_visits(df_ext, departments=DEPARTMENTS, seed=RANDOM_SEED):
+    """Generate hourly patient visit data for one hospital's external factors"""
+    rng = np.random.default_rng(seed)
+    dates = pd.DatetimeIndex(df_ext["date"])
+    mean = expected_visits(
+        df_ext["AQI"].to_numpy(),
+        df_ext["holiday_flag"].to_numpy(),
+        dates.dayofweek.to_numpy() >= 5,
+        df_ext["epidemic_alert_level"].to_numpy(),
+        departments
+    )
+    counts = sample_visits(mean, rng)
+    return _visits_frame(dates, counts[None], departments)
+
+
+def generate_dataset(n_hospitals=1, years=1, departments=DEPARTMENTS, start_date=START_DATE, seed=RANDOM_SEED):
+    """
+    Generate external factors and hourly visits for many hospitals at once
+    
+    The whole hospitals x days x hours x departments tensor is built with
+    NumPy broadcasting in one pass; the same seed always yields the same data.
+    Hospitals differ in size (a demand multiplier), local AQI/temperature
+    offsets and random epidemic waves.
+    
+    Returns:
+        (df_ext, df_visits), both with a hospital_id column
+    """
+    unknown = [dept for dept in departments if dept not in DEPARTMENT_PROFILES]
+    if unknown:
+        raise ValueError(f"Unknown departments {unknown}, expected some of {list(DEPARTMENT_PROFILES)}")
+    
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(start_date)
+    dates = pd.date_range(start, start + pd.DateOffset(years=years) - pd.Timedelta(days=1), freq="D")
+    hospital_ids = np.array([f"H{i + 1:02d}" for i in range(n_hospitals)])
+    
+    factors = _external_factor_arrays(dates, n_hospitals, rng)
+    mean = expected_visits(
+        factors["AQI"],
+        factors["holiday_flag"],
+        np.broadcast_to(dates.dayofweek.to_numpy() >= 5, factors["AQI"].shape),
+        factors["epidemic_alert_level"],
+        departments
+    )
+    size = 1.0 if n_hospitals == 1 else rng.lognormal(0, 0.3, size=n_hospitals)
+    counts = sample_visits(mean * np.reshape(size, (-1, 1, 1, 1)), rng)
     
-    return df_visits
+    return (
+        _external_factors_frame(dates, factors, hospital_ids),
+        _visits_frame(dates, counts, departments, hospital_ids)
+    )
 
 
 def prepare_modeling_data(df_visits, df_ext):
     """Prepare data for modeling with feature engineering"""
+    df_visits = single_hospital(df_visits, "Patient visits")
+    df_ext = single_hospital(df_ext, "External factors")
     
     # Aggregate to daily
     df_daily = (
@@ -273,24 +392,47 @@ def train_model(df_model):
 
 def main():
     """Main execution function"""
+    parser = argparse.ArgumentParser(description="Generate synthetic hospital data and train the model")
+    parser.add_argument("--hospitals", type=int, default=1, help="number of hospitals")
+    parser.add_argument("--years", type=int, default=1, help="years of data starting at START_DATE")
+    parser.add_argument("--departments", nargs="+", default=DEPARTMENTS, choices=list(DEPARTMENT_PROFILES),
+                        help="departments to simulate")
+    parser.add_argument("--seed", type=int, default=RANDOM_SEED, help="random seed")
+    args = parser.parse_args()
+    
     print("="*70)
     print("GENERATING HEALTHCARE DATA AND TRAINING MODEL")
     print("="*70)
     
-    # Step 1: Generate external factors
-    print("\n1. Generating external factors...")
-    df_ext = generate_external_factors()
-    ext_path = os.path.join(DATA_DIR, "external_factors.csv")
+    # Step 1-2: Generate external factors and patient visits
+    print(f"\n1. Generating {args.years} year(s) of data for {args.hospitals} hospital(s)...")
+    started = time.perf_counter()
+    df_ext, df_visits = generate_dataset(args.hospitals, args.years, args.departments, seed=args.seed)
+    print(f"   ✓ Generated {len(df_visits)} visit rows in {time.perf_counter() - started:.2f}s")
+    # Multi-hospital data goes to its own files so the single-hospital
+    # training CSVs are never replaced by rows the daily model cannot use
+    suffix = ""
+    if args.hospitals == 1:
+        df_ext = df_ext.drop(columns="hospital_id")
+        df_visits = df_visits.drop(columns="hospital_id")
+    else:
+        suffix = MULTI_HOSPITAL_SUFFIX
+    
+    print("\n2. Writing CSV files...")
+    ext_path = os.path.join(DATA_DIR, f"external_factors{suffix}.csv")
     df_ext.to_csv(ext_path, index=False)
     print(f"   ✓ Created {ext_path} with {len(df_ext)} rows")
     
-    # Step 2: Generate patient visits
-    print("\n2. Generating patient visits...")
-    df_visits = generate_patient_visits(df_ext)
-    visits_path = os.path.join(DATA_DIR, "patient_visits.csv")
+    visits_path = os.path.join(DATA_DIR, f"patient_visits{suffix}.csv")
     df_visits.to_csv(visits_path, index=False)
     print(f"   ✓ Created {visits_path} with {len(df_visits)} rows")
     
+    if args.hospitals > 1:
+        # The daily model is trained per hospital; see backtest/training pipelines
+        print("\nMulti-hospital dataset generated; skipping single-hospital model training.")
+        print(f"Backtest it with: python -m app.services.ai_model.backtest --visits {visits_path} --external {ext_path}")
+        return
+    
     # Step 3: Prepare modeling data
     print("\n3. Preparing data for modeling...")
     df_model = prepare_modeling_data(df_visits, df_ext)
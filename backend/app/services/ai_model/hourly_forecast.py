@@ -0,0 +1,366 @@
+"""
+Hourly Per-Department Patient Load Forecasting
+
+The daily model sums `patient_visits.csv` to one number per day. This module
+keeps the hourly, per-department resolution and forecasts a 24-72 hour curve
+for every department with one direct multi-horizon model:
+
+    one row per (department, target hour), horizon h = 1..72 hours ahead of
+    the forecast origin; lag features are only those known at the origin
+
+so the whole curve is a single vectorized predict call (no recursion).
+
+Train it from backend/ with:
+
+    python -m app.services.ai_model.train_model --mode hourly
+"""
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from sklearn.ensemble import RandomForestRegressor
+
+from app.services.ai_model.conformal import calibrate
+from app.services.ai_model.data_cache import single_hospital
+from app.services.ai_model.drift_monitor import training_profile
+from app.services.ai_model.errors import InvalidRequest
+from app.services.ai_model.forest_engine import CompiledForest
+from app.services.ai_model.model_registry import HOURLY_REGISTRY_DIR, ModelRegistry
+from app.services.ai_model.predictor import PatientLoadPredictor
+
+DEPARTMENTS = ["ER", "Resp_OPD"]
+MAX_HORIZON_HOURS = 72
+HISTORY_HOURS = 168
+
+# Exogenous features are those of the target hour's day
+HOURLY_EXOGENOUS_COLS = [
+    "holiday_flag", "AQI", "temp", "rainfall", "epidemic_alert_level",
+    "month", "is_weekend"
+]
+HOURLY_FEATURE_COLS = (
+    ["department_code", "hour"]
+    + HOURLY_EXOGENOUS_COLS
+    + ["lag_same_hour", "lag_week", "last_hour", "roll24", "horizon"]
+)
+
+# Training origins are taken every ORIGIN_STRIDE_HOURS; 7 is coprime with 24
+# so every hour of the day is used as an origin over a week
+ORIGIN_STRIDE_HOURS = 7
+TEST_DAYS = 14
+
+
+def prepare_hourly_data(df_visits: pd.DataFrame, df_ext: pd.DataFrame):
+    """
+    Reshape hourly visits into a dense (department, hour) count matrix
+
+    Args:
+        df_visits: date, hour, department, patient_count rows
+        df_ext: one row of external factors per date
+
+    Returns:
+        (timestamps, counts, exogenous, departments) where counts is
+        (n_departments, n_hours) and exogenous is (n_hours, len(HOURLY_EXOGENOUS_COLS))
+    """
+    df_visits = single_hospital(df_visits, "Patient visits")
+    df_ext = single_hospital(df_ext, "External factors")
+    departments = sorted(df_visits["department"].unique())
+    timestamps = pd.date_range(
+        df_visits["date"].min(),
+        df_visits["date"].max() + pd.Timedelta(hours=23),
+        freq="h"
+    )
+
+    # Missing (department, hour) cells are hours without visits
+    visit_ts = pd.to_datetime(df_visits["date"]) + pd.to_timedelta(df_visits["hour"], unit="h")
+    counts = (
+        df_visits.assign(timestamp=visit_ts)
+        .pivot_table(index="department", columns="timestamp", values="patient_count", aggfunc="sum")
+        .reindex(index=departments, columns=timestamps)
+        .fillna(0)
+        .to_numpy(dtype=np.float64)
+    )
+
+    ext = df_ext.set_index("date").reindex(timestamps.normalize())
+    ext["month"] = timestamps.month
+    ext["is_weekend"] = (timestamps.dayofweek >= 5).astype(int)
+    exogenous = ext[HOURLY_EXOGENOUS_COLS].to_numpy(dtype=np.float64)
+
+    return timestamps, counts, exogenous, departments
+
+
+def build_hourly_features(
+    counts: np.ndarray,
+    exogenous: np.ndarray,
+    hours_of_day: np.ndarray,
+    origins: np.ndarray,
+    horizons: int = MAX_HORIZON_HOURS
+) -> np.ndarray:
+    """
+    Feature matrix for every (department, origin, horizon) in one pass
+
+    Args:
+        counts: (n_departments, n_hours) history; only hours before each origin are read
+        exogenous: (n_target_hours, n_exogenous) indexed by target hour
+        hours_of_day: hour of day per target hour index
+        origins: index of the first forecast hour per origin (needs HISTORY_HOURS before it)
+        horizons: hours ahead to forecast from each origin
+
+    Returns:
+        array of shape (n_departments * len(origins) * horizons, len(HOURLY_FEATURE_COLS)),
+        ordered department-major, then origin, then horizon
+    """
+    n_departments = counts.shape[0]
+    origins = np.asarray(origins)
+    h = np.arange(1, horizons + 1)
+
+    # (origins, horizons) target index; same-hour lags are the most recent
+    # occurrence of that hour at or before the origin
+    targets = origins[:, None] + h[None, :] - 1
+    same_hour = targets - 24 * np.ceil(h / 24).astype(np.int64)[None, :]
+
+    cumsum = np.concatenate(
+        [np.zeros((n_departments, 1)), np.cumsum(counts, axis=1)], axis=1
+    )
+    roll24 = (cumsum[:, origins] - cumsum[:, origins - 24]) / 24
+
+    shape = (n_departments, len(origins), horizons)
+    columns = [
+        np.broadcast_to(np.arange(n_departments)[:, None, None], shape),
+        np.broadcast_to(hours_of_day[targets], shape)
+    ]
+    columns += [np.broadcast_to(exogenous[targets, i], shape) for i in range(exogenous.shape[1])]
+    columns += [
+        counts[:, same_hour],
+        counts[:, targets - HISTORY_HOURS],
+        np.broadcast_to(counts[:, origins - 1][:, :, None], shape),
+        np.broadcast_to(roll24[:, :, None], shape),
+        np.broadcast_to(h[None, None, :], shape)
+    ]
+
+    return np.stack([c.reshape(-1) for c in columns], axis=1).astype(np.float64)
+
+
+def train_hourly_model(df_visits: pd.DataFrame, df_ext: pd.DataFrame, horizons: int = MAX_HORIZON_HOURS):
+    """
+    Train the hourly direct model and evaluate it on the last TEST_DAYS days
+
+    Returns:
+        (model, metadata) ready for ModelRegistry.publish
+    """
+    timestamps, counts, exogenous, departments = prepare_hourly_data(df_visits, df_ext)
+    hours_of_day = timestamps.hour.to_numpy()
+    n_hours = len(timestamps)
+
+    test_start = n_hours - TEST_DAYS * 24
+    train_origins = np.arange(HISTORY_HOURS, test_start - horizons + 1, ORIGIN_STRIDE_HOURS)
+    test_origins = np.arange(test_start, n_hours - horizons + 1, ORIGIN_STRIDE_HOURS)
+
+    def targets_for(origins):
+        idx = origins[:, None] + np.arange(horizons)[None, :]
+        return counts[:, idx].reshape(-1)
+
+    X_train = build_hourly_features(counts, exogenous, hours_of_day, train_origins, horizons)
+    y_train = targets_for(train_origins)
+    X_test = build_hourly_features(counts, exogenous, hours_of_day, test_origins, horizons)
+    y_test = targets_for(test_origins)
+
+    print(f"\nTraining hourly model on {len(X_train)} (department, origin, horizon) rows...")
+    model = RandomForestRegressor(
+        n_estimators=100,
+        max_depth=12,
+        min_samples_leaf=5,
+        random_state=42,
+        n_jobs=-1
+    )
+    model.fit(X_train, y_train)
+
+    # Per-horizon error, plus a same-hour-last-week baseline for reference
+    y_pred = model.predict(X_test)
+    lag_week = X_test[:, HOURLY_FEATURE_COLS.index("lag_week")]
+    errors = np.abs(y_pred - y_test).reshape(len(departments), len(test_origins), horizons)
+    baseline = np.abs(lag_week - y_test).reshape(errors.shape)
+
+    print(f"\nHourly Test Performance ({len(test_origins)} origins, last {TEST_DAYS} days):")
+    print(f"  {'hours':>7s} {'MAE':>7s} {'MAE last week':>14s}")
+    horizon_metrics = []
+    for first in range(0, horizons, 24):
+        block = slice(first, min(first + 24, horizons))
+        mae = float(errors[:, :, block].mean())
+        mae_baseline = float(baseline[:, :, block].mean())
+        horizon_metrics.append({
+            'hours': f"{first + 1}-{block.stop}",
+            'mae': mae,
+            'mae_last_week': mae_baseline
+        })
+        print(f"  {horizon_metrics[-1]['hours']:>7s} {mae:7.2f} {mae_baseline:14.2f}")
+
+    # Conformal interval multipliers per hour ahead, pooled over departments and origins
+    _, spreads = CompiledForest.from_sklearn(model).predict_with_std(X_test)
+    calibration_shape = (len(departments) * len(test_origins), horizons)
+    conformal = calibrate((y_test - y_pred).reshape(calibration_shape), spreads.reshape(calibration_shape))
+
+    metadata = {
+        'feature_cols': HOURLY_FEATURE_COLS,
+        'kind': 'hourly',
+        'departments': departments,
+        'max_horizon_hours': horizons,
+        'training_window': {
+            'start': timestamps[0].strftime('%Y-%m-%d'),
+            'end': timestamps[test_start - 1].strftime('%Y-%m-%d')
+        },
+        'test_window': {
+            'start': timestamps[test_start].strftime('%Y-%m-%d'),
+            'end': timestamps[-1].strftime('%Y-%m-%d')
+        },
+        'metrics': {
+            'mae': float(errors.mean()),
+            'rmse': float(np.sqrt(((y_pred - y_test) ** 2).mean()))
+        },
+        'horizon_metrics': horizon_metrics,
+        'conformal': conformal,
+        'training_profile': training_profile(X_train, HOURLY_FEATURE_COLS),
+        # Last week (+1 day for hour-of-day alignment) of actuals, used as
+        # history until live hourly counts are wired in
+        'recent_history': {
+            'end': timestamps[-1].isoformat(),
+            'counts': {dept: counts[i, -(HISTORY_HOURS + 24):].tolist() for i, dept in enumerate(departments)}
+        }
+    }
+
+    return model, metadata
+
+
+class HourlyLoadForecaster:
+    """
+    Serves hourly per-department forecasts from the hourly registry
+
+    Loading and hot swap are delegated to PatientLoadPredictor. Without a
+    published model the forecaster falls back to a same-hour-last-week curve.
+    """
+
+    def __init__(self, registry: Optional[ModelRegistry] = None):
+        self.predictor = PatientLoadPredictor(registry=registry or ModelRegistry(HOURLY_REGISTRY_DIR))
+
+    def is_trained(self) -> bool:
+        return self.predictor.is_trained() and self.predictor.feature_cols == HOURLY_FEATURE_COLS
+
+    def default_history(self) -> Optional[Dict[str, Any]]:
+        """Most recent hourly counts stored with the model ({'end', 'counts'})"""
+        return self.predictor.metadata.get('recent_history')
+
+    def forecast(
+        self,
+        start: datetime,
+        hours: int,
+        env_for_day: Callable[[int], Dict[str, Any]],
+        history: Optional[Dict[str, Any]] = None,
+        departments: Optional[Sequence[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Forecast `hours` hourly counts per department starting at `start`
+
+        Args:
+            start: first forecast hour (minutes are dropped)
+            hours: curve length, 1..MAX_HORIZON_HOURS
+            env_for_day: external factors for a day offset from start's date
+            history: {'end': last history hour, 'counts': {department: hourly
+                counts, oldest first}} (default: stored history). If it does not
+                end the hour before start (e.g. a proxy week), its tail is trimmed
+                so hours of day line up with the forecast
+            departments: subset of departments to forecast (default: all)
+
+        Returns:
+            dict with timestamps, per-department prediction/lower/upper arrays,
+            method and model_version
+        """
+        if not 1 <= hours <= MAX_HORIZON_HOURS:
+            raise InvalidRequest(f"hours must be between 1 and {MAX_HORIZON_HOURS}")
+
+        start = start.replace(minute=0, second=0, microsecond=0)
+        history = history or self.default_history()
+        if not history:
+            raise ValueError("No hourly history available")
+        history_counts = history['counts']
+        departments = list(departments or history_counts.keys())
+        unknown = [dept for dept in departments if dept not in history_counts]
+        if unknown:
+            raise InvalidRequest(f"No hourly history for departments: {unknown}")
+
+        history_end = pd.Timestamp(history['end'])
+        trim = (history_end.hour - (start.hour - 1)) % 24
+        counts = np.array([
+            np.asarray(history_counts[dept], dtype=np.float64)[:len(history_counts[dept]) - trim][-HISTORY_HOURS:]
+            for dept in departments
+        ])
+        if counts.shape[1] < HISTORY_HOURS:
+            raise ValueError(f"Hourly history must cover at least {HISTORY_HOURS} hours")
+
+        timestamps = [start + timedelta(hours=h) for h in range(hours)]
+
+        if self.is_trained():
+            # Pad history with the forecast window so target-indexed features resolve
+            padded = np.concatenate([counts, np.zeros((len(departments), hours))], axis=1)
+            day_offsets = [(ts.date() - start.date()).days for ts in timestamps]
+            env_by_offset = {offset: env_for_day(offset) for offset in set(day_offsets)}
+            exogenous = np.zeros((padded.shape[1], len(HOURLY_EXOGENOUS_COLS)))
+            hours_of_day = np.zeros(padded.shape[1], dtype=np.int64)
+            for h, ts in enumerate(timestamps):
+                env = env_by_offset[day_offsets[h]]
+                exogenous[HISTORY_HOURS + h] = [
+                    env.get('holiday_flag', 0),
+                    env.get('AQI', 200),
+                    env.get('temp', 25),
+                    env.get('rainfall', 0),
+                    env.get('epidemic_alert_level', 0),
+                    ts.month,
+                    1 if ts.weekday() >= 5 else 0
+                ]
+                hours_of_day[HISTORY_HOURS + h] = ts.hour
+
+            X = build_hourly_features(padded, exogenous, hours_of_day, np.array([HISTORY_HOURS]), hours)
+            # Department codes are positions in the model's department list
+            model_departments = self.predictor.metadata.get('departments', DEPARTMENTS)
+            codes = np.array([model_departments.index(dept) for dept in departments])
+            X[:, 0] = np.repeat(codes, hours)
+
+            predictions, lower, upper = self.predictor.predict_matrix(X)
+            shape = (len(departments), hours)
+            predictions, lower, upper = (a.reshape(shape) for a in (predictions, lower, upper))
+            method = 'direct_hourly_model'
+            version = self.predictor.version
+        else:
+            # Same hour last week
+            predictions = counts[:, np.arange(hours) % HISTORY_HOURS]
+            lower = np.maximum(0, predictions * 0.8)
+            upper = predictions * 1.2
+            method = 'same_hour_last_week'
+            version = None
+
+        return {
+            'timestamps': timestamps,
+            'departments': departments,
+            'predictions': predictions,
+            'lower': lower,
+            'upper': upper,
+            'method': method,
+            'model_version': version
+        }
+
+
+def load_recent_history(visits_path: str, hours: int = HISTORY_HOURS + 24) -> Dict[str, Any]:
+    """Last `hours` hourly counts per department from a patient_visits.csv file"""
+    df_visits = single_hospital(pd.read_csv(visits_path, parse_dates=["date"]), visits_path)
+    visit_ts = df_visits["date"] + pd.to_timedelta(df_visits["hour"], unit="h")
+    end = visit_ts.max()
+    window = pd.date_range(end - pd.Timedelta(hours=hours - 1), end, freq="h")
+    counts = (
+        df_visits.assign(timestamp=visit_ts)
+        .pivot_table(index="department", columns="timestamp", values="patient_count", aggfunc="sum")
+        .reindex(columns=window)
+        .fillna(0)
+    )
+    return {
+        'end': end.isoformat(),
+        'counts': {dept: counts.loc[dept].tolist() for dept in counts.index}
+    }
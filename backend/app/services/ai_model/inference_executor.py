@@ -0,0 +1,131 @@
+"""Dedicated Executor for CPU-bound Inference Work"""
+import asyncio
+import functools
+import threading
+import time
+import numpy as np
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+EXECUTOR_KINDS = ("thread", "process")
+
+
+class InferenceQueueFull(Exception):
+    """Raised when the executor already has max_workers + max_queue jobs in flight"""
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict) -> Tuple[Any, float, float]:
+    """Run fn in the worker and report when it started and finished"""
+    # time.monotonic is system-wide, so it is comparable across worker processes
+    started = time.monotonic()
+    result = fn(*args, **kwargs)
+    return result, started, time.monotonic()
+
+
+class InferenceExecutor:
+    """
+    Runs predictor and decision-engine work off the event loop
+
+    Jobs go to a thread pool (default) or a process pool. When the queue is
+    full, new jobs are rejected with InferenceQueueFull. Queue wait and run
+    time are recorded for every job. Process pools need module-level
+    functions and picklable arguments.
+    """
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: int = 4,
+        max_queue: int = 64,
+        sample_size: int = 1024
+    ):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor kind '{kind}', expected one of {EXECUTOR_KINDS}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._wait_ms = deque(maxlen=sample_size)
+        self._run_ms = deque(maxlen=sample_size)
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="inference"
+                    )
+            return self._executor
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the executor and await its result"""
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise InferenceQueueFull(
+                    f"Inference queue is full ({self._in_flight} jobs in flight)"
+                )
+            self._in_flight += 1
+
+        submitted = time.monotonic()
+        try:
+            future = self._get_executor().submit(_timed_call, fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        # The slot is freed when the job itself finishes, not when the caller
+        # stops waiting: a cancelled request leaves a started job running
+        future.add_done_callback(functools.partial(self._job_done, submitted))
+        result, _, _ = await asyncio.wrap_future(future)
+        return result
+
+    def _job_done(self, submitted: float, future: Future):
+        """Free the job's slot and record its outcome (runs in the worker or submitting thread)"""
+        with self._lock:
+            self._in_flight -= 1
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self.failed += 1
+                return
+            _, started, finished = future.result()
+            self.completed += 1
+            self._wait_ms.append(max(0.0, started - submitted) * 1000)
+            self._run_ms.append((finished - started) * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        """Job counters plus p50/p99 queue wait and run time (ms) over recent jobs"""
+        with self._lock:
+            wait = np.array(self._wait_ms)
+            run = np.array(self._run_ms)
+            stats = {
+                'kind': self.kind,
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'in_flight': self._in_flight,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected
+            }
+        for name, samples in (('queue_wait_ms', wait), ('run_ms', run)):
+            stats[name] = {
+                'p50': float(np.percentile(samples, 50)) if samples.size else 0.0,
+                'p99': float(np.percentile(samples, 99)) if samples.size else 0.0
+            }
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,354 @@
+"""
+Inventory Depletion Projection
+
+Joins the patient-load forecast with the stock of every inventory item in
+one pass. Items are rows of column arrays (quantity, min_threshold, expiry
+day, usage per patient, supplier lead time) and the forecast is reduced to
+its cumulative patient curve, so for all items at once:
+
+    usable stock       quantity capped at what can be used before the expiry
+                       date; the rest is projected to expire on the shelf
+    days to stockout   usable stock / usage per patient, looked up on the
+                       cumulative curve (past the forecast horizon its mean
+                       day continues)
+    reorder quantity   usage over lead time + safety_stock_days, plus
+                       min_threshold, minus usable stock
+
+Usage per patient is the item's usage_per_patient, else the decision
+engine's supply_rates entry matching the item name or category ("PPE kit"
+uses the PPE_kit rate). Items with neither are not consumed by patient
+load and are only checked against min_threshold.
+
+Projections are cached per row. Writing an item recomputes only its row;
+a changed forecast (new day or different loads) recomputes every row,
+still as one vectorized pass. Stock is re-read from MongoDB every
+refresh_interval so writes made by other workers are picked up.
+"""
+import math
+import threading
+import time
+import numpy as np
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+DEFAULT_LEAD_TIME_DAYS = 3.0
+# Forecast days joined with the stock; /forecast serves up to 14
+FORECAST_DAYS = 14
+# In increasing urgency
+STATUSES = ("ok", "reorder", "critical", "out_of_stock")
+
+_COLUMNS = ("quantity", "min_threshold", "rate", "lead_time", "expiry")
+_RESULTS = ("usable", "days_to_stockout", "reorder_quantity", "status")
+
+
+def _normalize(name: Any) -> str:
+    return "_".join(str(name).lower().replace("-", " ").split())
+
+
+def _ordinal(value: Any) -> float:
+    """Day ordinal of an expiry date, inf for items that do not expire"""
+    if value is None:
+        return np.inf
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        value = value.date()
+    return float(value.toordinal())
+
+
+class InventoryProjection:
+    """Cached depletion projections of all inventory items against one forecast"""
+
+    def __init__(
+        self,
+        supply_rates: Dict[str, float],
+        safety_stock_days: float,
+        lead_time_days: float = DEFAULT_LEAD_TIME_DAYS,
+        forecast_ttl: float = 300.0,
+        refresh_interval: float = 300.0
+    ):
+        self.rates = {_normalize(item): float(rate) for item, rate in supply_rates.items()}
+        self.safety_stock_days = float(safety_stock_days)
+        self.lead_time_days = float(lead_time_days)
+        self.forecast_ttl = forecast_ttl
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        # Per row: the projected inputs (to skip unchanged writes), display fields
+        # and the cached response entry
+        self._inputs: List[tuple] = []
+        self._details: List[Dict[str, Any]] = []
+        self._views: List[Optional[Dict[str, Any]]] = []
+        self._columns = {name: np.zeros(0) for name in _COLUMNS + _RESULTS}
+        self._dirty = np.zeros(0, dtype=bool)
+        self._rendered: Optional[List[Dict[str, Any]]] = None
+
+        self.start: Optional[date] = None
+        self.daily_patients = np.zeros(0)
+        self._cumulative = np.zeros(1)
+        self.forecast_version = 0
+        self._forecast_expires = 0.0
+        self._items_expires = 0.0
+
+        self.full_passes = 0
+        self.rows_projected = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # Items
+
+    def _item_inputs(self, item: Dict[str, Any]) -> tuple:
+        rate = item.get('usage_per_patient')
+        if rate is None:
+            rate = self.rates.get(_normalize(item.get('item_name', '')))
+        if rate is None:
+            rate = self.rates.get(_normalize(item.get('category', '')), 0.0)
+        lead_time = (item.get('supplier') or {}).get('lead_time_days')
+        if lead_time is None:
+            lead_time = self.lead_time_days
+        return (
+            float(item.get('quantity') or 0.0),
+            float(item.get('min_threshold') or 0.0),
+            max(float(rate), 0.0),
+            max(float(lead_time), 0.0),
+            _ordinal(item.get('expiry_date'))
+        )
+
+    def _grow(self, size: int):
+        capacity = len(self._dirty)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 64)
+        for name, column in self._columns.items():
+            grown = np.zeros(capacity)
+            grown[:len(column)] = column
+            self._columns[name] = grown
+        dirty = np.zeros(capacity, dtype=bool)
+        dirty[:len(self._dirty)] = self._dirty
+        self._dirty = dirty
+
+    def _upsert(self, item: Dict[str, Any]):
+        item_id = str(item['_id'])
+        inputs = self._item_inputs(item)
+        row = self._rows.get(item_id)
+        details = {
+            'item_id': item_id,
+            'item_name': item.get('item_name'),
+            'category': item.get('category'),
+            'cost_per_unit': float(item.get('cost_per_unit') or 0.0)
+        }
+        if row is None:
+            row = len(self._ids)
+            self._grow(row + 1)
+            self._rows[item_id] = row
+            self._ids.append(item_id)
+            self._inputs.append(None)
+            self._details.append(details)
+            self._views.append(None)
+        elif self._inputs[row] == inputs and self._details[row] == details:
+            return
+        self._inputs[row] = inputs
+        self._details[row] = details
+        for name, value in zip(_COLUMNS, inputs):
+            self._columns[name][row] = value
+        self._dirty[row] = True
+        self._rendered = None
+
+    def _remove(self, item_id: str) -> bool:
+        row = self._rows.pop(item_id, None)
+        if row is None:
+            return False
+        # Move the last row into the gap so the columns stay dense
+        last = len(self._ids) - 1
+        if row != last:
+            moved = self._ids[last]
+            self._ids[row] = moved
+            self._rows[moved] = row
+            self._inputs[row] = self._inputs[last]
+            self._details[row] = self._details[last]
+            self._views[row] = self._views[last]
+            for column in self._columns.values():
+                column[row] = column[last]
+            self._dirty[row] = self._dirty[last]
+        self._ids.pop()
+        self._inputs.pop()
+        self._details.pop()
+        self._views.pop()
+        self._dirty[last] = False
+        self._rendered = None
+        return True
+
+    def upsert(self, item: Dict[str, Any]):
+        """Add or update one item (a MongoDB inventory document); only its row is reprojected"""
+        with self._lock:
+            self._upsert(item)
+
+    def remove(self, item_id: str) -> bool:
+        with self._lock:
+            return self._remove(str(item_id))
+
+    def sync(self, items: Iterable[Dict[str, Any]]):
+        """Replace the stock with a full read of the collection, keeping unchanged rows cached"""
+        with self._lock:
+            seen = set()
+            for item in items:
+                self._upsert(item)
+                seen.add(str(item['_id']))
+            for item_id in [item_id for item_id in self._ids if item_id not in seen]:
+                self._remove(item_id)
+            self._items_expires = time.monotonic() + self.refresh_interval
+
+    def needs_items(self) -> bool:
+        return time.monotonic() >= self._items_expires
+
+    # Forecast
+
+    def needs_forecast(self) -> bool:
+        return self.start is None or time.monotonic() >= self._forecast_expires
+
+    def set_forecast(self, start: date, daily_patients: Sequence[float]):
+        """Patient forecast from `start`; all rows are reprojected only if it changed"""
+        if isinstance(start, datetime):
+            start = start.date()
+        patients = np.maximum(np.asarray(daily_patients, dtype=np.float64), 0.0)
+        if len(patients) == 0:
+            raise ValueError("The forecast has no days")
+        with self._lock:
+            self._forecast_expires = time.monotonic() + self.forecast_ttl
+            if start == self.start and np.array_equal(patients, self.daily_patients):
+                return
+            self.start = start
+            self.daily_patients = patients
+            self._cumulative = np.concatenate([[0.0], np.cumsum(patients)])
+            self.forecast_version += 1
+            self._dirty[:len(self._ids)] = True
+            self._rendered = None
+
+    def _patients_until(self, days: np.ndarray) -> np.ndarray:
+        """Forecast patients over the first `days` days (fractional, extrapolated past the horizon)"""
+        horizon = len(self.daily_patients)
+        days = np.maximum(days, 0.0)
+        within = np.interp(np.minimum(days, horizon), np.arange(horizon + 1), self._cumulative)
+        beyond = np.maximum(days - horizon, 0.0) * self.daily_patients.mean()
+        return within + np.where(days > horizon, beyond, 0.0)
+
+    def _days_until(self, patients: np.ndarray) -> np.ndarray:
+        """Inverse of _patients_until: days until the forecast reaches `patients`"""
+        horizon = len(self.daily_patients)
+        total = self._cumulative[-1]
+        mean = self.daily_patients.mean()
+        within = np.interp(patients, self._cumulative, np.arange(horizon + 1))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            beyond = horizon + (patients - total) / mean
+        return np.where(patients <= total, within, beyond)
+
+    # Projection
+
+    def _project(self, rows: np.ndarray):
+        c = {name: self._columns[name][rows] for name in _COLUMNS}
+        rate, quantity = c['rate'], c['quantity']
+        consumed = rate > 0
+
+        # Stock usable before it expires; items nobody consumes keep it all until then
+        expiry_days = c['expiry'] - self.start.toordinal()
+        # Items without an expiry have infinite expiry_days, so skip 0 * inf
+        before_expiry = np.multiply(
+            rate, self._patients_until(expiry_days), out=np.full(len(rows), np.inf), where=consumed
+        )
+        usable = np.where(expiry_days > 0, np.minimum(quantity, before_expiry), 0.0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            days_to_stockout = np.where(consumed, self._days_until(usable / np.where(consumed, rate, 1.0)), np.inf)
+        cover = rate * self._patients_until(c['lead_time'] + self.safety_stock_days)
+        reorder = np.ceil(np.maximum(cover + c['min_threshold'] - usable, 0.0) - 1e-9)
+
+        status = np.select(
+            [usable <= 0, days_to_stockout <= c['lead_time'], reorder > 0],
+            [STATUSES.index("out_of_stock"), STATUSES.index("critical"), STATUSES.index("reorder")],
+            default=STATUSES.index("ok")
+        )
+        for name, values in zip(_RESULTS, (usable, days_to_stockout, reorder, status)):
+            self._columns[name][rows] = values
+        self.rows_projected += len(rows)
+
+    def _render(self, rows: np.ndarray):
+        """Response entries of the given rows"""
+        c = {name: self._columns[name][rows].tolist() for name in _COLUMNS + _RESULTS}
+        mean_patients = float(self.daily_patients.mean())
+        for k, i in enumerate(rows.tolist()):
+            details = self._details[i]
+            days, expiry = c['days_to_stockout'][k], c['expiry'][k]
+            finite = math.isfinite(days)
+            order_by = days - c['lead_time'][k] - self.safety_stock_days
+            reorder = int(c['reorder_quantity'][k])
+            self._views[i] = {
+                **details,
+                'quantity': int(c['quantity'][k]),
+                'min_threshold': int(c['min_threshold'][k]),
+                'usable_quantity': round(c['usable'][k], 1),
+                'expiring_quantity': round(c['quantity'][k] - c['usable'][k], 1),
+                'expiry_date': date.fromordinal(int(expiry)).isoformat() if math.isfinite(expiry) else None,
+                'daily_usage': round(c['rate'][k] * mean_patients, 2),
+                'days_to_stockout': round(days, 1) if finite else None,
+                'stockout_date': (self.start + timedelta(days=int(days))).isoformat() if finite else None,
+                'order_by': (self.start + timedelta(days=max(int(order_by), 0))).isoformat() if finite else None,
+                'reorder_quantity': reorder,
+                'reorder_cost': round(reorder * details['cost_per_unit'], 2),
+                'status': STATUSES[int(c['status'][k])]
+            }
+
+    def _projections(self) -> List[Dict[str, Any]]:
+        """Rendered projections, most urgent first (hold the lock)"""
+        if self.start is None:
+            raise ValueError("No forecast has been set for the inventory projection")
+        if self._rendered is None:
+            n = len(self._ids)
+            rows = np.flatnonzero(self._dirty[:n])
+            if len(rows):
+                if len(rows) == n:
+                    self.full_passes += 1
+                self._project(rows)
+                self._render(rows)
+                self._dirty[rows] = False
+            # Most urgent first, then soonest stockout
+            order = np.lexsort((self._columns['days_to_stockout'][:n], -self._columns['status'][:n]))
+            self._rendered = [self._views[i] for i in order.tolist()]
+        return self._rendered
+
+    def projections(self) -> List[Dict[str, Any]]:
+        """Every item's projection, most urgent first; recomputes only rows changed since the last call"""
+        with self._lock:
+            return self._projections()
+
+    def report(self) -> Dict[str, Any]:
+        # Items and the forecast they were projected from, from the same moment
+        with self._lock:
+            items = self._projections()
+            start, daily_patients = self.start, self.daily_patients
+        counts = {status: 0 for status in STATUSES}
+        for item in items:
+            counts[item['status']] += 1
+        return {
+            'forecast_start': start.isoformat(),
+            'forecast_days': len(daily_patients),
+            'daily_patients': [round(float(p), 1) for p in daily_patients],
+            'safety_stock_days': self.safety_stock_days,
+            'summary': {
+                'items': len(items),
+                **counts,
+                'reorder_cost': round(sum(item['reorder_cost'] for item in items), 2),
+                'expiring_quantity': round(sum(item['expiring_quantity'] for item in items), 1)
+            },
+            'items': items
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'items': len(self),
+            'forecast_version': self.forecast_version,
+            'full_passes': self.full_passes,
+            'rows_projected': self.rows_projected
+        }
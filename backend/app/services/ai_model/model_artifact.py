@@ -0,0 +1,127 @@
+"""
+Versioned On-Disk Model Artifacts
+
+An artifact is a directory holding one `.npy` file per CompiledForest node
+array plus a `metadata.json` file:
+
+    patient_predictor/
+    ├── metadata.json     # format_version, shapes, feature_cols, ...
+    ├── feature.npy
+    ├── threshold.npy
+    ├── left.npy
+    ├── right.npy
+    ├── value.npy
+    ├── roots.npy
+    └── children.npy
+
+Arrays are opened with np.load(mmap_mode="r"), so loading is near-instant
+and every worker process maps the same read-only pages from the OS page
+cache instead of unpickling a private copy of the forest.
+
+Format 2 artifacts hold integer-quantized node values (compress_model.py)
+decoded with the `value_scale` / `value_offset` metadata. Unquantized
+forests are still written as format 1 so older workers can read them.
+"""
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+
+from app.services.ai_model.forest_engine import CompiledForest
+
+FORMAT_VERSION = 1
+QUANTIZED_FORMAT_VERSION = 2
+SUPPORTED_FORMAT_VERSIONS = (FORMAT_VERSION, QUANTIZED_FORMAT_VERSION)
+METADATA_FILE = "metadata.json"
+ARRAY_NAMES = ("feature", "threshold", "left", "right", "value", "roots", "children")
+
+
+def is_artifact(path: str) -> bool:
+    """Check whether path is an artifact directory"""
+    return os.path.isfile(os.path.join(path, METADATA_FILE))
+
+
+def save_artifact(forest: CompiledForest, directory: str, metadata: Optional[Dict[str, Any]] = None):
+    """
+    Write a compiled forest to an artifact directory
+
+    The artifact is assembled in a temporary sibling directory and moved into
+    place at the end, so readers never observe a half-written artifact.
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp-artifact-", dir=parent)
+
+    try:
+        for name, array in forest.arrays().items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(array))
+
+        meta = dict(metadata or {})
+        meta.update({
+            'format_version': FORMAT_VERSION,
+            'n_trees': forest.n_trees,
+            'n_nodes': forest.n_nodes,
+            'max_depth': forest.max_depth,
+            'n_features': forest.n_features
+        })
+        meta.pop('value_scale', None)
+        meta.pop('value_offset', None)
+        if forest.value_scale is not None:
+            meta.update({
+                'format_version': QUANTIZED_FORMAT_VERSION,
+                'value_scale': forest.value_scale,
+                'value_offset': forest.value_offset
+            })
+        with open(os.path.join(tmp_dir, METADATA_FILE), 'w') as f:
+            json.dump(meta, f, indent=2, default=str)
+
+        if os.path.exists(directory):
+            shutil.rmtree(directory)
+        os.replace(tmp_dir, directory)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def load_metadata(directory: str) -> Dict[str, Any]:
+    """Read and validate artifact metadata"""
+    with open(os.path.join(directory, METADATA_FILE)) as f:
+        metadata = json.load(f)
+
+    version = metadata.get('format_version')
+    if version not in SUPPORTED_FORMAT_VERSIONS:
+        raise ValueError(
+            f"Unsupported artifact format version {version} in {directory} "
+            f"(expected one of {SUPPORTED_FORMAT_VERSIONS})"
+        )
+    return metadata
+
+
+def load_artifact(directory: str, mmap: bool = True) -> Tuple[CompiledForest, Dict[str, Any]]:
+    """Open an artifact, memory-mapping node arrays read-only by default"""
+    metadata = load_metadata(directory)
+    mmap_mode = "r" if mmap else None
+    arrays = {
+        name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in ARRAY_NAMES
+    }
+
+    forest = CompiledForest(
+        max_depth=metadata['max_depth'],
+        n_features=metadata['n_features'],
+        value_scale=metadata.get('value_scale'),
+        value_offset=metadata.get('value_offset', 0.0),
+        **arrays
+    )
+    return forest, metadata
+
+
+def export_sklearn_model(model, directory: str, metadata: Optional[Dict[str, Any]] = None):
+    """Compile a fitted sklearn forest and save it as an artifact"""
+    meta = dict(metadata or {})
+    if hasattr(model, 'feature_importances_'):
+        meta.setdefault('feature_importances', [float(v) for v in model.feature_importances_])
+    save_artifact(CompiledForest.from_sklearn(model), directory, meta)
+
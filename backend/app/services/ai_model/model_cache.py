@@ -0,0 +1,212 @@
+"""
+Per-Hospital / Per-Department Model Cache
+
+Each (hospital, department) pair publishes its own models to a registry
+(see model_registry.py) under one root:
+
+    registry/hospitals/
+    ├── city_general/
+    │   ├── ER/           # CURRENT + versions/
+    │   └── Resp_OPD/
+    └── north_clinic/
+        └── ER/
+
+ModelCache keeps the models in use keyed by (hospital, department, version):
+
+    memory budget   the node arrays of cached models stay under max_bytes;
+                    least recently used models are evicted first
+    single-flight   concurrent misses on the same key wait for one load
+                    instead of each reading the artifact
+    versions        the CURRENT pointer of each pair is re-read at most every
+                    reload_interval seconds; a new version replaces the old
+                    entry, and requests already holding the old model keep it
+
+Pairs without a registry are served by the fallback predictor, so a single
+global model keeps working until per-department models are published.
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.services.ai_model.errors import InvalidRequest
+from app.services.ai_model.model_registry import MODELS_DIR, ModelRegistry
+from app.services.ai_model.predictor import PatientLoadPredictor
+
+HOSPITALS_REGISTRY_DIR = os.path.join(MODELS_DIR, "registry", "hospitals")
+
+# Hospital and department ids become directory names
+_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+
+def _check_name(kind: str, name: str) -> str:
+    if not _NAME_PATTERN.match(name):
+        raise InvalidRequest(f"Invalid {kind} id '{name}': use letters, digits, '_', '-' or '.'")
+    return name
+
+
+def hospital_registry(
+    hospital_id: str,
+    department: str,
+    root: str = HOSPITALS_REGISTRY_DIR
+) -> ModelRegistry:
+    """Registry holding the models of one hospital department"""
+    return ModelRegistry(os.path.join(
+        root, _check_name("hospital", hospital_id), _check_name("department", department)
+    ))
+
+
+class _Load:
+    """One in-flight load that concurrent misses wait on"""
+
+    __slots__ = ('done', 'predictor', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.predictor: Optional[PatientLoadPredictor] = None
+        self.error: Optional[BaseException] = None
+
+
+class ModelCache:
+    """LRU cache of per-(hospital, department, version) predictors under a memory budget"""
+
+    def __init__(
+        self,
+        root: str = HOSPITALS_REGISTRY_DIR,
+        max_bytes: int = 512 * 1024 * 1024,
+        fallback: Optional[PatientLoadPredictor] = None,
+        reload_interval: float = 2.0
+    ):
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        self.root = root
+        self.max_bytes = max_bytes
+        self.fallback = fallback
+        self.reload_interval = reload_interval
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[PatientLoadPredictor, int]]" = OrderedDict()
+        self._loading: Dict[Tuple[str, str, str], _Load] = {}
+        # (hospital, department) -> (current version or None, next pointer check)
+        self._pointers: Dict[Tuple[str, str], Tuple[Optional[str], float]] = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+        self.loads = 0
+        self.load_failures = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    def _current_version(self, hospital_id: str, department: str) -> Optional[str]:
+        """Live version of a pair, re-reading its CURRENT pointer at most every reload_interval"""
+        pair = (hospital_id, department)
+        now = time.monotonic()
+        cached = self._pointers.get(pair)
+        if cached is not None and now < cached[1]:
+            return cached[0]
+        version = hospital_registry(hospital_id, department, self.root).current_version()
+        self._pointers[pair] = (version, now + self.reload_interval)
+        return version
+
+    def get(self, hospital_id: str, department: str) -> Optional[PatientLoadPredictor]:
+        """
+        Predictor for a hospital department, loading it on a miss
+
+        Returns the fallback predictor when the pair has no published model.
+        Blocks while another thread loads the same key; load errors are
+        raised to every waiting caller.
+        """
+        version = self._current_version(hospital_id, department)
+        if version is None:
+            with self._lock:
+                self.fallbacks += 1
+            return self.fallback
+
+        key = (hospital_id, department, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            load = self._loading.get(key)
+            owner = load is None
+            if owner:
+                load = self._loading[key] = _Load()
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            load.done.wait()
+            if load.error is not None:
+                raise load.error
+            return load.predictor
+
+        started = time.perf_counter()
+        try:
+            registry = hospital_registry(hospital_id, department, self.root)
+            load.predictor = PatientLoadPredictor.from_artifact(registry.version_path(version), version)
+        except Exception as e:
+            load.error = e
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            del self._loading[key]
+            self.load_seconds += elapsed
+            if load.error is None:
+                self.loads += 1
+                self._insert(key, load.predictor)
+            else:
+                self.load_failures += 1
+        load.done.set()
+
+        if load.error is not None:
+            raise load.error
+        return load.predictor
+
+    def _insert(self, key: Tuple[str, str, str], predictor: PatientLoadPredictor):
+        """Add a loaded model, drop older versions of its pair and evict down to the budget"""
+        hospital_id, department, _ = key
+        for stale in [k for k in self._entries if k[:2] == (hospital_id, department)]:
+            self._remove(stale)
+        nbytes = predictor.compiled.nbytes
+        self._entries[key] = (predictor, nbytes)
+        self.bytes += nbytes
+        # A single model larger than the budget is still served
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: Tuple[str, str, str]):
+        _, nbytes = self._entries.pop(key)
+        self.bytes -= nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pointers.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'models': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'loading': len(self._loading),
+                'hits': self.hits,
+                'misses': self.misses,
+                'fallbacks': self.fallbacks,
+                'loads': self.loads,
+                'load_failures': self.load_failures,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'mean_load_ms': 1000 * self.load_seconds / (self.loads + self.load_failures)
+                if self.loads + self.load_failures else 0.0,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
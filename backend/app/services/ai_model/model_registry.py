@@ -0,0 +1,178 @@
+"""
+Versioned Model Registry with Atomic Pointer Swap
+
+Layout of a registry root:
+
+    registry/patient_load/
+    ├── CURRENT                 # name of the live version
+    └── versions/
+        ├── 20250105T020000Z/   # model artifact (see model_artifact.py)
+        └── 20250112T020000Z/
+
+Publishing writes a complete artifact under versions/ and then replaces
+CURRENT with os.replace, which is atomic. Serving processes poll CURRENT
+and switch to the new version between requests; requests already running
+keep the version they started with.
+
+Import an existing pickled model as a new version (run from backend/):
+
+    python -m app.services.ai_model.model_registry
+"""
+import os
+import pickle
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.services.ai_model.forest_engine import CompiledForest
+from app.services.ai_model.model_artifact import (
+    is_artifact,
+    load_metadata,
+    save_artifact
+)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(SCRIPT_DIR, "models")
+DEFAULT_REGISTRY_DIR = os.path.join(MODELS_DIR, "registry", "patient_load")
+DIRECT_REGISTRY_DIR = os.path.join(MODELS_DIR, "registry", "patient_load_direct")
+HOURLY_REGISTRY_DIR = os.path.join(MODELS_DIR, "registry", "patient_load_hourly")
+
+POINTER_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+
+
+class ModelRegistry:
+    """Stores versioned model artifacts and tracks which one is live"""
+
+    def __init__(self, root: str = DEFAULT_REGISTRY_DIR):
+        self.root = root
+        self.versions_dir = os.path.join(root, VERSIONS_DIR)
+        self.pointer_path = os.path.join(root, POINTER_FILE)
+
+    def version_path(self, version: str) -> str:
+        return os.path.join(self.versions_dir, version)
+
+    def list_versions(self) -> List[str]:
+        """Return published versions, oldest first"""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(
+            v for v in os.listdir(self.versions_dir)
+            if is_artifact(self.version_path(v))
+        )
+
+    def current_version(self) -> Optional[str]:
+        """Return the live version, or None if nothing has been published"""
+        try:
+            with open(self.pointer_path) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version or None
+
+    def pointer_mtime(self) -> Optional[int]:
+        """Cheap change check for pollers (nanosecond mtime of CURRENT)"""
+        try:
+            return os.stat(self.pointer_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def get_metadata(self, version: Optional[str] = None) -> Dict[str, Any]:
+        """Return metadata for a version (default: the live one)"""
+        version = version or self.current_version()
+        if version is None:
+            return {}
+        return load_metadata(self.version_path(version))
+
+    def set_current(self, version: str):
+        """Atomically point CURRENT at an already-published version"""
+        if not is_artifact(self.version_path(version)):
+            raise ValueError(f"Version '{version}' is not published in {self.root}")
+
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-pointer-", dir=self.root)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(version)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.pointer_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def publish(
+        self,
+        model,
+        metadata: Optional[Dict[str, Any]] = None,
+        activate: bool = True
+    ) -> str:
+        """
+        Save a fitted sklearn forest as a new version
+
+        Args:
+            model: fitted RandomForestRegressor
+            metadata: training window, metrics, feature_cols, etc.
+            activate: swap CURRENT to the new version once it is fully written
+
+        Returns:
+            the new version name
+        """
+        meta = dict(metadata or {})
+        if hasattr(model, 'feature_importances_'):
+            meta.setdefault('feature_importances', [float(v) for v in model.feature_importances_])
+        return self.publish_forest(CompiledForest.from_sklearn(model), meta, activate)
+
+    def publish_forest(
+        self,
+        forest: CompiledForest,
+        metadata: Optional[Dict[str, Any]] = None,
+        activate: bool = True
+    ) -> str:
+        """Save an already-compiled forest as a new version (see publish)"""
+        now = datetime.now(timezone.utc)
+        version = now.strftime("%Y%m%dT%H%M%S%fZ")
+
+        meta = dict(metadata or {})
+        meta.setdefault('trained_at', now.isoformat())
+        meta['version'] = version
+
+        save_artifact(forest, self.version_path(version), meta)
+        if activate:
+            self.set_current(version)
+        return version
+
+    def prune(self, keep: int = 5):
+        """Delete old versions, always keeping the live one"""
+        current = self.current_version()
+        versions = self.list_versions()
+        for version in versions[:-keep] if keep > 0 else versions:
+            if version != current:
+                # Memory-mapped files stay readable on POSIX after removal
+                shutil.rmtree(self.version_path(version), ignore_errors=True)
+
+
+def main():
+    """Publish models/patient_predictor.pkl as a new registry version"""
+    from app.services.ai_model.predictor import FEATURE_COLS
+
+    model_path = os.path.join(MODELS_DIR, "patient_predictor.pkl")
+    if not os.path.exists(model_path):
+        print(f"❌ No pickled model at {model_path}")
+        return
+
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+
+    registry = ModelRegistry()
+    version = registry.publish(model, {
+        'feature_cols': FEATURE_COLS,
+        'source': os.path.basename(model_path)
+    })
+    print(f"✓ Published version {version} to {registry.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Online Incremental Updates from Daily Actuals
+Run from the backend directory:
+
+    python -m app.services.ai_model.online_update --force
+
+Full retraining refits every tree on the whole history. An online update
+instead fits a few new trees on a recent window of the `daily_actuals`
+collection, appends them to the live compiled forest and retires the
+oldest trees, so its cost depends on the window size rather than on the
+length of the history:
+
+    live forest  [t0 t1 ... t99]
+    update       [t10 ... t99 | n0 ... n9]    # 10 oldest retired, 10 new
+
+The result is published to the registry like any other version, so
+serving workers hot-swap to it. The background loop runs daily, and
+hourly while the latest actual carries an epidemic alert.
+"""
+import argparse
+import asyncio
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sklearn.ensemble import RandomForestRegressor
+
+from app.services.ai_model.forest_engine import CompiledForest
+from app.services.ai_model.model_artifact import load_artifact
+from app.services.ai_model.model_registry import DEFAULT_REGISTRY_DIR, ModelRegistry
+from app.services.ai_model.train_model import (
+    FEATURE_COLS,
+    MODEL_PARAMS,
+    build_daily_features,
+    calibrate_forest,
+    calibration_origins,
+    recursive_forecast
+)
+
+ACTUALS_COLLECTION = "daily_actuals"
+
+WINDOW_DAYS = 90
+TREES_PER_UPDATE = 10
+MIN_WINDOW_ROWS = 30
+# Newest days of the window held out from the new trees to recalibrate the
+# interval multipliers on; shorter tails serve tree-spread intervals
+CALIBRATION_DAYS = 28
+# Days of history before the window needed to compute lag7 / roll7
+LAG_WARMUP_DAYS = 7
+
+
+async def fetch_recent_actuals(database, since: datetime) -> pd.DataFrame:
+    """Daily actuals from `since` onwards as a date-sorted frame"""
+    cursor = database[ACTUALS_COLLECTION].find(
+        {"date": {"$gte": since}},
+        {"_id": 0, "created_at": 0}
+    ).sort("date", 1)
+    rows = await cursor.to_list(length=None)
+    df = pd.DataFrame(rows)
+    if not df.empty:
+        df["date"] = pd.to_datetime(df["date"])
+    return df
+
+
+def daily_calendar(df_actuals: pd.DataFrame) -> pd.DataFrame:
+    """Actuals on a gap-free daily calendar; days without actuals are NaN rows"""
+    df = df_actuals.assign(date=pd.to_datetime(df_actuals["date"]).dt.normalize())
+    df = df.sort_values("date").drop_duplicates("date", keep="last")
+    return df.set_index("date").asfreq("D").reset_index()
+
+
+def _window_end(metadata: Dict[str, Any]) -> Optional[pd.Timestamp]:
+    """Last day of data the live model has been fitted on"""
+    end = metadata.get('data_end') or metadata.get('training_window', {}).get('end')
+    return pd.Timestamp(end) if end else None
+
+
+def _fit_end(metadata: Dict[str, Any]) -> Optional[pd.Timestamp]:
+    """Last day any tree of the model was fitted on (training keeps its test window out)"""
+    end = metadata.get('fit_end') or metadata.get('training_window', {}).get('end')
+    return pd.Timestamp(end) if end else None
+
+
+def _blend_importances(
+    metadata: Dict[str, Any],
+    new_importances: np.ndarray,
+    kept_trees: int,
+    new_trees: int
+) -> Optional[list]:
+    """
+    Tree-count weighted mix of the old and new feature importances
+
+    Per-tree importances are not stored in the artifact, so retired trees
+    are assumed to contribute like the average old tree.
+    """
+    old = metadata.get('feature_importances')
+    if old is None:
+        return None
+    total = kept_trees + new_trees
+    blended = (np.asarray(old) * kept_trees + new_importances * new_trees) / total
+    return [float(v) for v in blended]
+
+
+def incremental_update(
+    df_actuals: pd.DataFrame,
+    registry_root: str = DEFAULT_REGISTRY_DIR,
+    window_days: int = WINDOW_DAYS,
+    trees_per_update: int = TREES_PER_UPDATE,
+    max_trees: Optional[int] = None,
+    params: Optional[Dict[str, Any]] = None,
+    force: bool = False,
+    calibration_days: int = CALIBRATION_DAYS
+) -> Optional[Dict[str, Any]]:
+    """
+    Refresh the live model with trees fitted on the most recent actuals
+
+    Args:
+        df_actuals: daily actuals (date, patients and external factor columns),
+            including LAG_WARMUP_DAYS days before the window
+        registry_root: registry holding the live recursive model
+        window_days: days of actuals the new trees are fitted on
+        trees_per_update: trees added (and, once at max_trees, retired) per update
+        max_trees: forest size cap (default: the model's trained n_estimators)
+        params: tree parameters for the new trees (default: the model's own)
+        force: update even if no actuals are newer than the model
+        calibration_days: newest window days kept from the new trees and used
+            to recalibrate the interval multipliers
+
+    Returns:
+        a summary with the new version, or None when there was nothing new
+    """
+    registry = ModelRegistry(registry_root)
+    version = registry.current_version()
+    if version is None:
+        raise ValueError(f"No published model in {registry_root}; train one first")
+
+    forest, metadata = load_artifact(registry.version_path(version))
+    feature_cols = metadata.get('feature_cols', FEATURE_COLS)
+    if 'horizon' in feature_cols:
+        raise ValueError("Direct multi-horizon models are refreshed by retraining")
+
+    # Lags are shifted on the calendar, so a missing day leaves NaN lags
+    # (and drops the rows that need it) instead of borrowing an older day
+    calendar = build_daily_features(daily_calendar(df_actuals))
+    df = calendar.dropna(subset=feature_cols + ["patients"]).reset_index(drop=True)
+
+    data_end = _window_end(metadata)
+    new_rows = df[df["date"] > data_end] if data_end is not None else df
+    if new_rows.empty and not force:
+        return None
+
+    window = df[df["date"] > df["date"].max() - pd.Timedelta(days=window_days)]
+    if len(window) < MIN_WINDOW_ROWS:
+        raise ValueError(f"Need at least {MIN_WINDOW_ROWS} days of actuals, got {len(window)}")
+
+    # Interval multipliers are recalibrated on the newest days, so the new
+    # trees must not see them; without room for the tail, none is held out
+    if metadata.get('conformal') is not None:
+        horizons = len(metadata['conformal']['lower'])
+    else:
+        horizons = metadata.get('conformal_horizons', 0)
+    tail_start = df["date"].max() - pd.Timedelta(days=calibration_days)
+    holdout = calibration_days if (
+        horizons and calibration_days >= horizons
+        and (window["date"] <= tail_start).sum() >= MIN_WINDOW_ROWS
+    ) else 0
+    fit_rows = window[window["date"] <= tail_start] if holdout else window
+    X_window = fit_rows[feature_cols].to_numpy(dtype=np.float64)
+    y_window = fit_rows["patients"].to_numpy(dtype=np.float64)
+
+    # Error of the live model on days it has never seen, before they are learned
+    pre_update_mae = None
+    if not new_rows.empty:
+        errors = forest.predict(new_rows[feature_cols].to_numpy(dtype=np.float64)) - new_rows["patients"].to_numpy()
+        pre_update_mae = float(np.abs(errors).mean())
+
+    started = time.perf_counter()
+    tree_params = {**MODEL_PARAMS, **metadata.get('params', {}), **(params or {})}
+    tree_params['n_estimators'] = trees_per_update
+    n_updates = metadata.get('online_updates', 0) + 1
+    model = RandomForestRegressor(random_state=42 + n_updates, n_jobs=1, **tree_params)
+    model.fit(X_window, y_window)
+    new_forest = CompiledForest.from_sklearn(model)
+
+    # Trees are stored oldest first, so retiring means dropping from the front
+    max_trees = max_trees or metadata.get('params', {}).get('n_estimators', forest.n_trees)
+    n_keep = max(0, min(forest.n_trees, max_trees - trees_per_update))
+    kept = forest.select_trees(np.arange(forest.n_trees - n_keep, forest.n_trees))
+    updated = CompiledForest.concat([kept, new_forest]) if n_keep else new_forest
+    fit_seconds = time.perf_counter() - started
+
+    # The old interval multipliers were fitted to the old trees. Recalibrate
+    # on held-out origins no tree has been fitted on, or serve tree-spread
+    # intervals when there are none
+    conformal = None
+    fit_end = fit_rows["date"].iloc[-1]
+    if holdout:
+        seen_end = max(fit_end, _fit_end(metadata) or fit_end)
+        starts = calibration_origins(calendar, calendar["date"] > seen_end, horizons)
+        if len(starts):
+            conformal = calibrate_forest(recursive_forecast, updated, calendar, starts, horizons)
+
+    last_day = df["date"].max().strftime('%Y-%m-%d')
+    meta = {
+        key: value for key, value in metadata.items()
+        if key not in ('version', 'trained_at', 'feature_importances', 'conformal', 'conformal_horizons')
+    }
+    if conformal is not None:
+        meta['conformal'] = conformal
+    elif horizons:
+        # Lets a later update recalibrate once there are held-out origins again
+        meta['conformal_horizons'] = horizons
+    meta.update({
+        'feature_cols': feature_cols,
+        'data_end': last_day,
+        'fit_end': max(fit_end, _fit_end(metadata) or fit_end).strftime('%Y-%m-%d'),
+        'online_updates': n_updates,
+        'updated_from': version,
+        'last_update': {
+            'window': {
+                'start': window["date"].iloc[0].strftime('%Y-%m-%d'),
+                'end': last_day
+            },
+            'new_days': int(len(new_rows)),
+            'calibration_days': holdout,
+            'trees_added': trees_per_update,
+            'trees_retired': forest.n_trees - n_keep,
+            'pre_update_mae': pre_update_mae,
+            'fit_seconds': fit_seconds,
+            'recalibrated': conformal is not None
+        }
+    })
+    importances = _blend_importances(metadata, model.feature_importances_, n_keep, trees_per_update)
+    if importances is not None:
+        meta['feature_importances'] = importances
+
+    new_version = registry.publish_forest(updated, meta)
+    registry.prune(keep=5)
+    return {'version': new_version, 'n_trees': updated.n_trees, **meta['last_update']}
+
+
+async def run_online_update(database, executor, registry_root: str = DEFAULT_REGISTRY_DIR,
+                            force: bool = False, **kwargs) -> Optional[Dict[str, Any]]:
+    """Fetch recent actuals and apply an incremental update on the executor"""
+    window_days = kwargs.get('window_days', WINDOW_DAYS)
+    latest = await database[ACTUALS_COLLECTION].find_one(sort=[("date", -1)])
+    if latest is None:
+        return None
+
+    since = latest["date"] - timedelta(days=window_days + LAG_WARMUP_DAYS)
+    df_actuals = await fetch_recent_actuals(database, since)
+    return await executor.run(incremental_update, df_actuals, registry_root, force=force, **kwargs)
+
+
+async def online_update_loop(
+    get_db,
+    executor,
+    interval_seconds: float,
+    alert_interval_seconds: float,
+    registry_root: str = DEFAULT_REGISTRY_DIR,
+    **kwargs
+):
+    """
+    Apply incremental updates forever
+
+    Sleeps `alert_interval_seconds` while the latest actual reports an
+    epidemic alert and `interval_seconds` otherwise.
+    """
+    while True:
+        interval = interval_seconds
+        try:
+            database = get_db()
+            latest = await database[ACTUALS_COLLECTION].find_one(sort=[("date", -1)])
+            if latest is not None and latest.get("epidemic_alert_level", 0) > 0:
+                interval = alert_interval_seconds
+
+            result = await run_online_update(database, executor, registry_root, **kwargs)
+            if result is not None:
+                print(f"✓ Online update published {result['version']} ({result['new_days']} new days, "
+                      f"{result['fit_seconds']:.2f}s)")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️  Online model update failed: {e}")
+
+        await asyncio.sleep(interval)
+
+
+def main():
+    """Apply one incremental update from the configured database"""
+    from app.core.database import db
+    from app.services.ai_model.inference_executor import InferenceExecutor
+
+    parser = argparse.ArgumentParser(description="Incrementally update the patient load model from daily actuals")
+    parser.add_argument("--window-days", type=int, default=WINDOW_DAYS, help="days of actuals the new trees see")
+    parser.add_argument("--trees", type=int, default=TREES_PER_UPDATE, help="trees added per update")
+    parser.add_argument("--calibration-days", type=int, default=CALIBRATION_DAYS,
+                        help="newest days held out from the new trees to recalibrate intervals")
+    parser.add_argument("--force", action="store_true", help="update even without new actuals")
+    args = parser.parse_args()
+
+    async def run():
+        db.connect()
+        executor = InferenceExecutor(kind="thread", max_workers=1)
+        try:
+            return await run_online_update(
+                db.get_db(), executor, force=args.force,
+                window_days=args.window_days, trees_per_update=args.trees,
+                calibration_days=args.calibration_days
+            )
+        finally:
+            executor.shutdown()
+            db.close()
+
+    result = asyncio.run(run())
+    if result is None:
+        print("No new actuals; the live model is up to date")
+    else:
+        print(f"✓ Published version {result['version']} with {result['n_trees']} trees "
+              f"(pre-update MAE on new days: {result['pre_update_mae']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Bounded LRU + TTL Cache for Patient Load Predictions"""
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+
+class PredictionCache:
+    """
+    Caches (prediction, lower, upper) per quantized feature vector
+
+    AQI and temperature are snapped down to configurable bucket edges before
+    the vector is used as a key (and before the miss is evaluated), so
+    near-identical public advisory requests share one forest evaluation.
+    Entries expire after `ttl` seconds and the least recently used entry is
+    evicted once `maxsize` is reached.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 300.0,
+        aqi_bucket: float = 10.0,
+        temp_bucket: float = 1.0
+    ):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.buckets = {'AQI': aqi_bucket, 'temp': temp_bucket}
+        self._entries: "OrderedDict[Hashable, Tuple[float, Tuple[float, float, float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def quantize(self, X: np.ndarray, feature_cols: Sequence[str]) -> np.ndarray:
+        """Return a copy of X with bucketed columns snapped to their bucket floor"""
+        Xq = np.array(X, dtype=np.float64, copy=True)
+        for name, bucket in self.buckets.items():
+            if bucket and name in feature_cols:
+                col = feature_cols.index(name)
+                Xq[:, col] = np.floor(Xq[:, col] / bucket) * bucket
+        return Xq
+
+    def make_keys(self, Xq: np.ndarray, namespace: Hashable = None) -> List[Hashable]:
+        """Build one hashable key per quantized row"""
+        Xq = np.ascontiguousarray(Xq, dtype=np.float64)
+        return [(namespace, row.tobytes()) for row in Xq]
+
+    def get(self, key: Hashable) -> Optional[Tuple[float, float, float]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Tuple[float, float, float]):
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -2,48 +2,250 @@
 import numpy as np
 import pickle
 import os
-from typing import Dict, Any, Optional
-from datetime import datetime
+import threading
+import time
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from datetime import datetime, timedelta
 from sklearn.ensemble import RandomForestRegressor
 
+from app.services.ai_model.conformal import conformal_bounds
+from app.services.ai_model.drift_monitor import DriftMonitor
+from app.services.ai_model.forest_engine import CompiledForest
+from app.services.ai_model.model_artifact import is_artifact, load_artifact
+from app.services.ai_model.model_registry import ModelRegistry
+from app.services.ai_model.prediction_cache import PredictionCache
+
+# Inference engines selectable on PatientLoadPredictor
+ENGINES = ("sklearn", "compiled")
+
+FEATURE_COLS = [
+    "holiday_flag", "festival_flag", "AQI", "high_AQI_flag",
+    "temp", "rainfall", "epidemic_alert_level", "month", "is_weekend",
+    "patients_lag1", "patients_lag2", "patients_lag7", "patients_roll7"
+]
+
+
+def _default_model() -> RandomForestRegressor:
+    """Untrained model used when no model file is available"""
+    return RandomForestRegressor(
+        n_estimators=100,
+        max_depth=10,
+        random_state=42,
+        n_jobs=-1
+    )
+
+
+class LoadedModel:
+    """Snapshot of everything needed to serve one model version"""
+    
+    __slots__ = ("model", "compiled", "metadata", "feature_cols", "version", "drift")
+    
+    def __init__(
+        self,
+        model=None,
+        compiled: Optional[CompiledForest] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        version: Optional[str] = None
+    ):
+        self.model = model
+        self.compiled = compiled
+        self.metadata = metadata or {}
+        self.feature_cols = list(self.metadata.get('feature_cols', FEATURE_COLS))
+        self.version = version
+        # Live input histograms against the artifact's training profile, if saved
+        self.drift = DriftMonitor.from_metadata(self.metadata, self.feature_cols)
+
 
 class PatientLoadPredictor:
     """Predicts patient load using Random Forest model"""
     
-    def __init__(self, model_path: Optional[str] = None):
-        self.model = None
-        self.feature_cols = [
-            "holiday_flag", "festival_flag", "AQI", "high_AQI_flag",
-            "temp", "rainfall", "epidemic_alert_level", "month", "is_weekend",
-            "patients_lag1", "patients_lag2", "patients_lag7", "patients_roll7"
-        ]
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        engine: str = "compiled",
+        registry: Optional[ModelRegistry] = None,
+        reload_interval: float = 2.0,
+        cache: Optional[PredictionCache] = None,
+        monitor_drift: bool = True
+    ):
+        """
+        Args:
+            model_path: pickled sklearn model or artifact directory; loaded lazily
+                on first use so constructing the predictor at import time is free
+            engine: "compiled" (flat node arrays) or "sklearn"
+            registry: serve the registry's live version and follow pointer swaps;
+                model_path is only used until a version has been published
+            reload_interval: seconds between checks of the registry pointer
+            cache: optional result cache keyed by quantized feature vectors
+            monitor_drift: feed live feature rows to the model's DriftMonitor
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
+        self.engine = engine
+        self.model_path = model_path if model_path and os.path.exists(model_path) else None
+        self.registry = registry
+        self.reload_interval = reload_interval
+        self.cache = cache
+        self.monitor_drift = monitor_drift
+        self._state: Optional[LoadedModel] = None
+        self._load_lock = threading.Lock()
+        self._pointer_mtime: Optional[int] = None
+        self._next_check = 0.0
+    
+    @classmethod
+    def from_artifact(cls, model_path: str, version: Optional[str] = None) -> "PatientLoadPredictor":
+        """
+        Predictor pinned to one artifact, loaded eagerly
         
-        if model_path and os.path.exists(model_path):
-            self.load_model(model_path)
-        else:
-            # Initialize with default model
-            self.model = RandomForestRegressor(
-                n_estimators=100,
-                max_depth=10,
-                random_state=42,
-                n_jobs=-1
+        Unlike model_path, load errors propagate instead of falling back to
+        an untrained default model (used by the per-hospital ModelCache).
+        """
+        compiled, metadata = load_artifact(model_path)
+        predictor = cls()
+        predictor._state = LoadedModel(
+            compiled=compiled,
+            metadata=metadata,
+            version=version or metadata.get('version')
+        )
+        return predictor
+    
+    # Accessors for the live snapshot; a request should read self._state once
+    @property
+    def model(self):
+        return self._current().model
+    
+    @property
+    def compiled(self) -> Optional[CompiledForest]:
+        return self._current().compiled
+    
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self._current().metadata
+    
+    @property
+    def feature_cols(self) -> List[str]:
+        return self._current().feature_cols
+    
+    @property
+    def version(self) -> Optional[str]:
+        return self._current().version
+    
+    def _current(self) -> LoadedModel:
+        """Return the live model snapshot, loading or hot-swapping it if needed"""
+        state = self._state
+        if state is None:
+            return self._ensure_loaded()
+        if self.registry is not None and time.monotonic() >= self._next_check:
+            self._check_registry()
+            state = self._state
+        return state
+    
+    def _ensure_loaded(self) -> LoadedModel:
+        """Load the model on first use (once per process, even under concurrent requests)"""
+        with self._load_lock:
+            if self._state is None:
+                if self.registry is not None:
+                    self._pointer_mtime = self.registry.pointer_mtime()
+                    self._next_check = time.monotonic() + self.reload_interval
+                    version = self.registry.current_version()
+                    if version is not None:
+                        self._state = self._load_state(self.registry.version_path(version), version)
+                if self._state is None and self.model_path:
+                    self._state = self._load_state(self.model_path)
+                if self._state is None:
+                    # Initialize with default model
+                    self._state = LoadedModel(model=_default_model())
+            return self._state
+    
+    def _check_registry(self):
+        """Swap in a newly published registry version without blocking readers"""
+        if not self._load_lock.acquire(blocking=False):
+            # Another thread is already checking or loading; keep serving the old version
+            return
+        try:
+            self._next_check = time.monotonic() + self.reload_interval
+            mtime = self.registry.pointer_mtime()
+            if mtime == self._pointer_mtime:
+                return
+            self._pointer_mtime = mtime
+            version = self.registry.current_version()
+            if version is None or version == self._state.version:
+                return
+            state = self._load_state(self.registry.version_path(version), version)
+            if state is not None:
+                # Single reference assignment: in-flight requests keep their snapshot
+                self._state = state
+                self._clear_cache()
+        finally:
+            self._load_lock.release()
+    
+    def set_engine(self, engine: str):
+        """Select the inference engine ("sklearn" or "compiled")"""
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
+        self.engine = engine
+        state = self._state
+        if state is not None and state.model is not None:
+            self._state = LoadedModel(
+                model=state.model,
+                compiled=self._compile(state.model),
+                metadata=state.metadata,
+                version=state.version
             )
+            # Same model, so its live input histograms carry over
+            self._state.drift = state.drift
+            self._clear_cache()
     
-    def load_model(self, model_path: str):
-        """Load trained model from file"""
+    def _compile(self, model) -> Optional[CompiledForest]:
+        """Flatten a fitted forest into node arrays when the compiled engine is selected"""
+        if self.engine == "compiled" and hasattr(model, 'estimators_'):
+            return CompiledForest.from_sklearn(model)
+        return None
+    
+    def _load_state(self, model_path: str, version: Optional[str] = None) -> Optional[LoadedModel]:
+        """Read a pickle file or a memory-mapped artifact directory into a snapshot"""
         try:
-            with open(model_path, 'rb') as f:
-                self.model = pickle.load(f)
+            if is_artifact(model_path):
+                compiled, metadata = load_artifact(model_path)
+                if self.engine == "sklearn":
+                    print("⚠️ Artifact models only support the compiled engine; using it instead")
+                    self.engine = "compiled"
+                state = LoadedModel(
+                    compiled=compiled,
+                    metadata=metadata,
+                    version=version or metadata.get('version')
+                )
+            else:
+                with open(model_path, 'rb') as f:
+                    model = pickle.load(f)
+                state = LoadedModel(model=model, compiled=self._compile(model), version=version)
             print(f"✓ Model loaded from {model_path}")
+            return state
         except Exception as e:
             print(f"❌ Error loading model: {e}")
-            # Initialize default model
-            self.model = RandomForestRegressor(
-                n_estimators=100,
-                max_depth=10,
-                random_state=42,
-                n_jobs=-1
-            )
+            return None
+    
+    def load_model(self, model_path: str):
+        """Load trained model from a pickle file or a memory-mapped artifact directory"""
+        state = self._load_state(model_path)
+        with self._load_lock:
+            # Initialize default model if loading failed
+            self._state = state or LoadedModel(model=_default_model())
+        self._clear_cache()
+    
+    def _clear_cache(self):
+        """Drop cached results computed by a previous model"""
+        if self.cache is not None:
+            self.cache.clear()
+    
+    def is_direct(self) -> bool:
+        """Check whether the served model is a direct multi-horizon model"""
+        return 'horizon' in self._current().feature_cols
+    
+    def is_trained(self) -> bool:
+        """Check whether a trained model is available for predictions"""
+        state = self._current()
+        return state.compiled is not None or hasattr(state.model, 'estimators_')
     
     def save_model(self, model_path: str):
         """Save trained model to file"""
@@ -56,10 +258,11 @@ class PatientLoadPredictor:
             print(f"❌ Error saving model: {e}")
     
     def predict_patient_load(
-        self, 
-        date: datetime, 
-        external_data: Dict[str, Any], 
-        historical_data: Dict[str, float]
+        self,
+        date: datetime,
+        external_data: Dict[str, Any],
+        historical_data: Dict[str, float],
+        horizon: int = 1
     ) -> Dict[str, Any]:
         """
         Predict patient load for a given date
@@ -68,43 +271,244 @@ class PatientLoadPredictor:
             date: datetime for prediction
             external_data: dict with AQI, temp, rainfall, epidemic_alert_level
             historical_data: recent patient counts for lag features
+            horizon: steps ahead of the last actual in historical_data
+                (e.g. day 3 of a recursive forecast); widens the interval
         
         Returns:
             dict with prediction, confidence_interval, and features_used
         """
-        # Extract features
-        features = self._extract_features(date, external_data, historical_data)
+        return self.predict_batch([date], [external_data], [historical_data], horizons=[horizon])[0]
+    
+    def predict_horizon(
+        self,
+        start_date: datetime,
+        env_rows: Sequence[Dict[str, Any]],
+        historical_data: Dict[str, float]
+    ) -> List[Dict[str, Any]]:
+        """
+        Forecast consecutive days from one origin with a direct multi-horizon model
         
-        # Make prediction
-        X_pred = np.array(features).reshape(1, -1)
-        prediction = self.model.predict(X_pred)[0]
+        Args:
+            start_date: first forecast day (horizon 1)
+            env_rows: one external_data dict per forecast day
+            historical_data: lag features as of the day before start_date
         
-        # Calculate confidence interval (using tree predictions)
-        if hasattr(self.model, 'estimators_'):
-            tree_predictions = np.array([tree.predict(X_pred)[0] for tree in self.model.estimators_])
-            std_dev = np.std(tree_predictions)
-            confidence_interval = {
-                'lower': max(0, prediction - 1.96 * std_dev),
-                'upper': prediction + 1.96 * std_dev
+        Returns:
+            list of prediction dicts, one per day
+        """
+        dates = [start_date + timedelta(days=offset) for offset in range(len(env_rows))]
+        return self.predict_batch(
+            dates,
+            env_rows,
+            [historical_data] * len(env_rows),
+            horizons=list(range(1, len(env_rows) + 1))
+        )
+    
+    def predict_batch(
+        self,
+        dates: Sequence[datetime],
+        env_rows: Sequence[Dict[str, Any]],
+        history_rows: Sequence[Dict[str, float]],
+        horizons: Optional[Sequence[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Predict patient load for many dates in a single pass
+        
+        Args:
+            dates: datetimes for prediction
+            env_rows: one external_data dict per date
+            history_rows: one historical_data dict per date
+            horizons: days ahead of the lag origin per row (default 1); a
+                feature of direct multi-horizon models, and selects the
+                calibrated interval width of conformal models
+        
+        Returns:
+            list of dicts shaped like predict_patient_load results, in input order
+        """
+        if not (len(dates) == len(env_rows) == len(history_rows)):
+            raise ValueError("dates, env_rows and history_rows must have the same length")
+        if len(dates) == 0:
+            return []
+        
+        state = self._current()
+        feature_rows = [
+            self._extract_features(date, env, hist)
+            for date, env, hist in zip(dates, env_rows, history_rows)
+        ]
+        if 'horizon' in state.feature_cols:
+            for row, horizon in zip(feature_rows, horizons or [1] * len(feature_rows)):
+                row.append(horizon)
+        X = np.array(feature_rows, dtype=np.float64)
+        self._observe(X, state)
+        if self.cache is not None:
+            predictions, lower, upper = self._predict_cached(X, state, horizons)
+        else:
+            predictions, lower, upper = self._predict_matrix(X, state, horizons)
+        
+        return [
+            {
+                'prediction': float(predictions[i]),
+                'confidence_interval': {
+                    'lower': float(lower[i]),
+                    'upper': float(upper[i])
+                },
+                'features_used': dict(zip(state.feature_cols, feature_rows[i])),
+                'date': dates[i].strftime('%Y-%m-%d')
             }
+            for i in range(len(dates))
+        ]
+    
+    def predict_matrix(
+        self,
+        X: np.ndarray,
+        horizons: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Predict mean and 95% interval bounds for an already-built feature matrix
+        
+        Columns must follow `feature_cols` of the served model. Used by callers
+        with their own feature pipelines (e.g. the hourly forecaster).
+        `horizons` gives the steps ahead of recursive forecasts, so conformal
+        intervals widen with them; direct models read their horizon column.
+        """
+        state = self._current()
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(state.feature_cols):
+            raise ValueError(
+                f"Expected a feature matrix with {len(state.feature_cols)} columns, got shape {X.shape}"
+            )
+        self._observe(X, state)
+        return self._predict_matrix(X, state, horizons)
+    
+    def _observe(self, X: np.ndarray, state: LoadedModel):
+        """Record live inputs for drift monitoring (a few microseconds per batch)"""
+        if self.monitor_drift and state.drift is not None:
+            state.drift.observe(X)
+    
+    def drift_report(self) -> Optional[Dict[str, Any]]:
+        """Drift of live inputs from the training profile, or None without a profile"""
+        drift = self._current().drift
+        return drift.report() if drift is not None else None
+    
+    def n_trees(self) -> int:
+        """Number of trees in the served forest (0 if untrained)"""
+        state = self._current()
+        if state.compiled is not None:
+            return state.compiled.n_trees
+        return len(getattr(state.model, 'estimators_', []))
+    
+    def predict_sampled(self, X: np.ndarray, tree_ids: np.ndarray) -> np.ndarray:
+        """
+        Prediction of one ensemble member per row (tree tree_ids[i] for row i)
+        
+        Each row costs one tree walk instead of a whole-forest pass; averaged
+        over many rows with random tree ids it matches the forest mean, and
+        its spread reflects the model uncertainty behind the intervals.
+        """
+        state = self._current()
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(state.feature_cols):
+            raise ValueError(
+                f"Expected a feature matrix with {len(state.feature_cols)} columns, got shape {X.shape}"
+            )
+        if state.compiled is not None:
+            return state.compiled.predict_selected(X, tree_ids)
+        if not hasattr(state.model, 'estimators_'):
+            raise ValueError("No trained model is available")
+        
+        X32 = np.ascontiguousarray(X, dtype=np.float32)
+        predictions = np.empty(len(X), dtype=np.float64)
+        for tree_id in np.unique(tree_ids):
+            rows = tree_ids == tree_id
+            predictions[rows] = state.model.estimators_[tree_id].tree_.predict(X32[rows]).reshape(-1)
+        return predictions
+    
+    def _predict_cached(
+        self,
+        X: np.ndarray,
+        state: LoadedModel,
+        horizons: Optional[Sequence[int]] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Serve rows from the result cache and evaluate only the misses, as one batch"""
+        cache = self.cache
+        Xq = cache.quantize(X, state.feature_cols)
+        if horizons is not None and 'conformal' in state.metadata:
+            # Conformal interval width depends on the horizon, so it is part of the key
+            horizons = np.asarray(horizons)
+            keys = cache.make_keys(np.column_stack([Xq, horizons]), namespace=state.version)
+        else:
+            horizons = None
+            keys = cache.make_keys(Xq, namespace=state.version)
+        results = np.empty((3, len(keys)), dtype=np.float64)
+        
+        missing = []
+        for i, key in enumerate(keys):
+            hit = cache.get(key)
+            if hit is None:
+                missing.append(i)
+            else:
+                results[:, i] = hit
+        
+        if missing:
+            computed = np.vstack(self._predict_matrix(
+                Xq[missing], state, None if horizons is None else horizons[missing]
+            ))
+            results[:, missing] = computed
+            for j, i in enumerate(missing):
+                cache.put(keys[i], tuple(float(v) for v in computed[:, j]))
+        
+        return results[0], results[1], results[2]
+    
+    def _predict_matrix(
+        self,
+        X: np.ndarray,
+        state: Optional[LoadedModel] = None,
+        horizons: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Predict mean and 95% interval bounds for every row of X
+        
+        Per-tree predictions are gathered into one (n_trees, n_rows) array so the
+        forest mean and the spread come from the same stacked pass. Models with
+        conformal calibration scale the spread by the multipliers for the row's
+        horizon; others use a +/-1.96 spread band.
+        """
+        state = state or self._current()
+        conformal = state.metadata.get('conformal')
+        if conformal is not None and 'horizon' in state.feature_cols:
+            horizons = X[:, state.feature_cols.index('horizon')]
+        
+        if state.compiled is not None or hasattr(state.model, 'estimators_'):
+            predictions, std_dev = self._mean_and_spread(X, state)
+            if conformal is not None:
+                lower, upper = conformal_bounds(predictions, std_dev, conformal, horizons)
+            else:
+                lower = np.maximum(0, predictions - 1.96 * std_dev)
+                upper = predictions + 1.96 * std_dev
         else:
             # Default confidence interval if model not trained
-            confidence_interval = {
-                'lower': max(0, prediction * 0.8),
-                'upper': prediction * 1.2
-            }
+            predictions = np.asarray(state.model.predict(X), dtype=np.float64)
+            lower = np.maximum(0, predictions * 0.8)
+            upper = predictions * 1.2
+        
+        return predictions, lower, upper
+    
+    def _mean_and_spread(self, X: np.ndarray, state: LoadedModel) -> Tuple[np.ndarray, np.ndarray]:
+        """Forest mean and per-tree standard deviation for every row"""
+        if state.compiled is not None:
+            return state.compiled.predict_with_std(X)
         
-        return {
-            'prediction': float(prediction),
-            'confidence_interval': confidence_interval,
-            'features_used': dict(zip(self.feature_cols, features)),
-            'date': date.strftime('%Y-%m-%d')
-        }
+        # Trees are fitted on float32 inputs; validate once, not once per tree
+        X32 = np.ascontiguousarray(X, dtype=np.float32)
+        tree_predictions = np.stack(
+            [tree.tree_.predict(X32).reshape(len(X32), -1)[:, 0] for tree in state.model.estimators_]
+        )
+        return tree_predictions.mean(axis=0), tree_predictions.std(axis=0)
     
     def _extract_features(
-        self, 
-        date: datetime, 
-        external_data: Dict[str, Any], 
+        self,
+        date: datetime,
+        external_data: Dict[str, Any],
         historical_data: Dict[str, float]
     ) -> list:
         """Extract features for prediction"""
@@ -136,6 +540,9 @@ class PatientLoadPredictor:
     
     def get_feature_importance(self) -> Dict[str, float]:
         """Get feature importance from trained model"""
-        if hasattr(self.model, 'feature_importances_'):
-            return dict(zip(self.feature_cols, self.model.feature_importances_))
+        state = self._current()
+        if hasattr(state.model, 'feature_importances_'):
+            return dict(zip(state.feature_cols, state.model.feature_importances_))
+        if 'feature_importances' in state.metadata:
+            return dict(zip(state.feature_cols, state.metadata['feature_importances']))
         return {}
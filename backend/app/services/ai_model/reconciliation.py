@@ -0,0 +1,208 @@
+"""
+Hierarchical Forecast Reconciliation
+
+Department forecasts, hospital totals and the network total come from
+separate models and do not add up. Reconciliation adjusts every level at
+once so that each aggregate equals the sum of its children:
+
+    network
+    ├── hospital A          aggregates: every prefix of a bottom path
+    │   ├── (A, ER)
+    │   └── (A, Resp_OPD)   bottom series: full (hospital, department) paths
+    └── hospital B
+        └── (B, ER)
+
+Methods:
+
+    bottom_up    aggregates are the sums of the bottom forecasts
+    ols          MinT with W = I
+    wls_struct   MinT with W = diag(number of bottom series under each node)
+    mint         MinT with W = diag(forecast error variances), typically
+                 taken from the predictors' interval widths
+
+MinT reconciles ŷ to ỹ = ŷ - W Cᵀ (C W Cᵀ)⁻¹ C ŷ, where C ŷ = ŷ_agg - S ŷ_bottom
+is the incoherence of each aggregate. For a diagonal W this is the weighted
+least-squares fit of coherent values to ŷ, which separates along the tree
+and is solved in two passes over the levels instead of forming C W Cᵀ:
+
+    up      each node's estimate of its total combines the sum of its
+            children's estimates (variance: the sum of theirs) with its own
+            forecast, weighted by inverse variance
+    down    the root keeps its estimate; every node's total is split over
+            its children in proportion to their variances
+
+Both passes are vectorised per level and batched over time steps, so cost
+and memory are O(n_series x T) however wide the tree is. A full MinT
+covariance would need an (n_series x n_series) residual history.
+"""
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+METHODS = ("bottom_up", "ols", "wls_struct", "mint")
+
+
+class Hierarchy:
+    """
+    Tree of aggregates over bottom series identified by equal-length paths
+
+    Series are ordered aggregates first (top level down, then by path),
+    followed by the bottom series in sorted path order.
+    """
+
+    def __init__(self, bottom_paths: Sequence[Tuple[str, ...]]):
+        paths = sorted({tuple(path) for path in bottom_paths})
+        if not paths:
+            raise ValueError("A hierarchy needs at least one bottom series")
+        depth = len(paths[0])
+        if any(len(path) != depth for path in paths):
+            raise ValueError("Bottom series paths must all have the same length")
+
+        self.bottom: List[Tuple[str, ...]] = paths
+        self.depth = depth
+        self.aggregates: List[Tuple[str, ...]] = []
+        starts, ends, parents = [], [], []
+        # Series of level l are series[level_bounds[l]:level_bounds[l + 1]]; bottom is level depth
+        self.level_bounds = np.zeros(depth + 2, dtype=np.int64)
+        # ancestors[level, b] = aggregate index of bottom series b's ancestor at that level
+        self.ancestors = np.empty((depth, len(paths)), dtype=np.int64)
+
+        for level in range(depth):
+            keys = [path[:level] for path in paths]
+            boundaries = [0] + [i for i in range(1, len(keys)) if keys[i] != keys[i - 1]] + [len(keys)]
+            for start, end in zip(boundaries[:-1], boundaries[1:]):
+                parents.append(self.ancestors[level - 1, start] if level else -1)
+                self.ancestors[level, start:end] = len(self.aggregates)
+                self.aggregates.append(keys[start])
+                starts.append(start)
+                ends.append(end)
+            self.level_bounds[level + 1] = len(self.aggregates)
+        self.level_bounds[depth + 1] = len(self.aggregates) + len(paths)
+
+        self.starts = np.array(starts, dtype=np.int64)
+        self.ends = np.array(ends, dtype=np.int64)
+        # Parent series index of every series (-1 for the root)
+        self.parents = np.concatenate([np.array(parents, dtype=np.int64), self.ancestors[depth - 1]])
+        self.index: Dict[Tuple[str, ...], int] = {
+            path: i for i, path in enumerate(self.aggregates + self.bottom)
+        }
+
+    @property
+    def n_aggregates(self) -> int:
+        return len(self.aggregates)
+
+    @property
+    def n_bottom(self) -> int:
+        return len(self.bottom)
+
+    @property
+    def series(self) -> List[Tuple[str, ...]]:
+        return self.aggregates + self.bottom
+
+    def sizes(self) -> np.ndarray:
+        """Number of bottom series under every series (1 for bottom series)"""
+        return np.concatenate([self.ends - self.starts, np.ones(self.n_bottom, dtype=np.int64)])
+
+    def range_sums(self, bottom: np.ndarray) -> np.ndarray:
+        """Sum of bottom rows over every aggregate's range, shape (n_aggregates, ...)"""
+        cumulative = np.concatenate([np.zeros((1,) + bottom.shape[1:]), np.cumsum(bottom, axis=0)])
+        return cumulative[self.ends] - cumulative[self.starts]
+
+    def aggregate(self, bottom: np.ndarray) -> np.ndarray:
+        """Coherent values for all series from bottom-level values (rows in bottom order)"""
+        bottom = np.asarray(bottom, dtype=np.float64)
+        return np.concatenate([self.range_sums(bottom), bottom])
+
+    def incoherence(self, values: np.ndarray) -> np.ndarray:
+        """Aggregate value minus the sum of its bottom series, shape (n_aggregates, T)"""
+        values = np.asarray(values, dtype=np.float64)
+        return values[:self.n_aggregates] - self.range_sums(values[self.n_aggregates:])
+
+
+def _mint_bottom(hierarchy: Hierarchy, forecasts: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Bottom rows of the MinT solution for a diagonal W, shape (n_bottom, T)
+
+    Weighted least squares over the tree (see the module docstring); the
+    children of every aggregate are combined with np.add.at per level.
+    """
+    n_agg = hierarchy.n_aggregates
+    bounds, parents = hierarchy.level_bounds, hierarchy.parents
+    means = forecasts.copy()
+    variances = weights.copy()
+    child_means = np.zeros((n_agg, forecasts.shape[1]))
+    child_variances = np.zeros((n_agg, forecasts.shape[1]))
+
+    for level in range(hierarchy.depth, -1, -1):
+        nodes = slice(bounds[level], bounds[level + 1])
+        if level < hierarchy.depth:
+            precision = 1.0 / child_variances[nodes] + 1.0 / weights[nodes]
+            means[nodes] = (child_means[nodes] / child_variances[nodes] + forecasts[nodes] / weights[nodes]) / precision
+            variances[nodes] = 1.0 / precision
+        if level:
+            np.add.at(child_means, parents[nodes], means[nodes])
+            np.add.at(child_variances, parents[nodes], variances[nodes])
+
+    totals = means
+    for level in range(1, hierarchy.depth + 1):
+        nodes = slice(bounds[level], bounds[level + 1])
+        parent = parents[nodes]
+        share = variances[nodes] / child_variances[parent]
+        totals[nodes] = means[nodes] + share * (totals[parent] - child_means[parent])
+    return totals[n_agg:]
+
+
+def reconcile(
+    hierarchy: Hierarchy,
+    forecasts: np.ndarray,
+    method: str = "mint",
+    variances: Optional[np.ndarray] = None,
+    nonnegative: bool = True
+) -> np.ndarray:
+    """
+    Coherent forecasts for every series of a hierarchy
+
+    Args:
+        hierarchy: the series tree
+        forecasts: base forecasts, shape (n_series,) or (n_series, T), rows in
+            hierarchy.series order
+        method: one of METHODS
+        variances: forecast error variances like forecasts (method "mint")
+        nonnegative: clip negative bottom forecasts to zero before summing up
+
+    Returns:
+        reconciled forecasts with the shape of `forecasts`
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown reconciliation method '{method}', expected one of {METHODS}")
+    forecasts = np.asarray(forecasts, dtype=np.float64)
+    squeeze = forecasts.ndim == 1
+    if squeeze:
+        forecasts = forecasts[:, None]
+    n_series = hierarchy.n_aggregates + hierarchy.n_bottom
+    if forecasts.shape[0] != n_series:
+        raise ValueError(f"Expected {n_series} series, got {forecasts.shape[0]}")
+
+    bottom = forecasts[hierarchy.n_aggregates:]
+    if method != "bottom_up":
+        if method == "ols":
+            weights = np.ones_like(forecasts)
+        elif method == "wls_struct":
+            weights = np.broadcast_to(hierarchy.sizes()[:, None], forecasts.shape).astype(np.float64)
+        else:
+            if variances is None:
+                raise ValueError("method 'mint' needs forecast variances")
+            weights = np.asarray(variances, dtype=np.float64).reshape(forecasts.shape)
+            # A zero variance would pin a series; keep every weight positive
+            weights = np.maximum(weights, 1e-6 * max(float(weights.max()), 1.0))
+
+        bottom = _mint_bottom(hierarchy, forecasts, weights)
+
+    if nonnegative:
+        bottom = np.maximum(bottom, 0.0)
+    reconciled = hierarchy.aggregate(bottom)
+    return reconciled[:, 0] if squeeze else reconciled
+
+
+def interval_variances(lower: np.ndarray, upper: np.ndarray, z: float = 1.96) -> np.ndarray:
+    """Gaussian-equivalent variances from central interval bounds"""
+    return ((np.asarray(upper) - np.asarray(lower)) / (2 * z)) ** 2
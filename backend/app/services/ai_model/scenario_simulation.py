@@ -0,0 +1,244 @@
+"""
+Vectorized Monte Carlo What-If Scenarios
+
+Samples thousands of environmental trajectories around a planner's
+assumptions ("AQI 400 during Diwali with epidemic level 2") and pushes all
+of them through the forecaster at once:
+
+    environment    AQI (log AR(1)), temp (random walk), rainfall (wet days),
+                   epidemic level (up/down Markov chain); each (n, days)
+    load           one feature matrix per day for all scenarios; recursive
+                   models feed each day's draws back into the lag buffer,
+                   direct models score every (scenario, day) in one call
+    model noise    every scenario follows one randomly drawn tree of the
+                   forest, so a step walks one tree per scenario rather than
+                   the whole ensemble
+
+Staffing and supply needs are monotone in the load, so their quantiles are
+computed from the load quantiles rather than per scenario.
+"""
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Sequence
+
+from app.services.ai_model.decision_engine import LOAD_LEVELS
+
+SCENARIO_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+MAX_SCENARIOS = 20000
+MAX_DAYS = 14
+
+# Environment sampling defaults
+AQI_VOLATILITY = 0.15
+AQI_PERSISTENCE = 0.7
+TEMP_VOLATILITY = 1.0
+RAIN_PROBABILITY = 0.1
+RAIN_MEAN_MM = 8.0
+EPIDEMIC_ESCALATION = 0.05
+EPIDEMIC_RECOVERY = 0.05
+
+
+def sample_environment(
+    base_env: Dict[str, Any],
+    n_scenarios: int,
+    days: int,
+    rng: np.random.Generator,
+    aqi_volatility: float = AQI_VOLATILITY,
+    aqi_persistence: float = AQI_PERSISTENCE,
+    temp_volatility: float = TEMP_VOLATILITY,
+    rain_probability: float = RAIN_PROBABILITY,
+    epidemic_escalation: float = EPIDEMIC_ESCALATION,
+    epidemic_recovery: float = EPIDEMIC_RECOVERY,
+    event_days: Optional[Sequence[int]] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Environmental trajectories as (n_scenarios, days) arrays
+
+    Args:
+        base_env: starting conditions (AQI, temp, rainfall, epidemic_alert_level,
+            holiday_flag, festival_flag)
+        event_days: day offsets flagged as holiday/festival; default applies
+            the base_env flags to every day
+    """
+    shape = (n_scenarios, days)
+
+    # AQI: mean-reverting log deviation from the scenario's level
+    deviation = np.zeros(n_scenarios)
+    log_aqi = np.empty(shape)
+    shocks = rng.normal(0.0, aqi_volatility, shape)
+    for t in range(days):
+        deviation = aqi_persistence * deviation + shocks[:, t]
+        log_aqi[:, t] = deviation
+    aqi = np.clip(np.rint(max(base_env['AQI'], 1) * np.exp(log_aqi)), 0, 500)
+
+    temp = base_env['temp'] + np.cumsum(rng.normal(0.0, temp_volatility, shape), axis=1)
+
+    wet = rng.random(shape) < rain_probability
+    rainfall = np.where(wet, rng.exponential(RAIN_MEAN_MM, shape), 0.0)
+    if base_env.get('rainfall', 0) > 0:
+        rainfall[:, 0] = base_env['rainfall']
+
+    epidemic = np.empty(shape)
+    level = np.full(n_scenarios, float(base_env.get('epidemic_alert_level', 0)))
+    draws = rng.random(shape)
+    for t in range(days):
+        level = np.clip(
+            level + (draws[:, t] < epidemic_escalation) - (draws[:, t] > 1 - epidemic_recovery),
+            0, 3
+        )
+        epidemic[:, t] = level
+
+    if event_days is None:
+        holiday = np.full(shape, float(base_env.get('holiday_flag', 0)))
+        festival = np.full(shape, float(base_env.get('festival_flag', 0)))
+    else:
+        flags = np.zeros(days)
+        flags[[d for d in event_days if 0 <= d < days]] = 1.0
+        holiday = np.broadcast_to(flags, shape)
+        festival = holiday
+
+    return {
+        'AQI': aqi,
+        'temp': temp,
+        'rainfall': rainfall,
+        'epidemic_alert_level': epidemic,
+        'holiday_flag': holiday,
+        'festival_flag': festival
+    }
+
+
+def history_buffer(historical_data: Dict[str, float]) -> np.ndarray:
+    """
+    Seven days of loads (oldest first) consistent with lag1/lag2/lag7/roll7
+
+    Days 3-6 back are not stored as lags, so they share the remainder of
+    the 7-day sum implied by roll7.
+    """
+    lag1, lag2, lag7 = historical_data['lag1'], historical_data['lag2'], historical_data['lag7']
+    middle = max(0.0, (7 * historical_data['roll7'] - lag1 - lag2 - lag7) / 4)
+    return np.array([lag7, middle, middle, middle, middle, lag2, lag1], dtype=np.float64)
+
+
+def _feature_matrix(env: Dict[str, np.ndarray], t, date: datetime, lags: np.ndarray) -> np.ndarray:
+    """Rows in predictor.FEATURE_COLS order for day t of every scenario"""
+    aqi = env['AQI'][:, t]
+    n_rows = len(aqi)
+    return np.column_stack([
+        env['holiday_flag'][:, t],
+        env['festival_flag'][:, t],
+        aqi,
+        aqi >= 250,
+        env['temp'][:, t],
+        env['rainfall'][:, t],
+        env['epidemic_alert_level'][:, t],
+        np.full(n_rows, date.month),
+        np.full(n_rows, date.weekday() >= 5),
+        lags
+    ])
+
+
+def simulate_load(
+    predictor,
+    start_date: datetime,
+    env: Dict[str, np.ndarray],
+    historical_data: Dict[str, float],
+    rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Patient load per scenario and day, shape (n_scenarios, days)
+
+    Direct multi-horizon models score all days in one call from the origin
+    lags; recursive models step day by day, appending each day's draws to
+    the lag buffer of its own scenario.
+    """
+    n_scenarios, days = env['AQI'].shape
+    tree_ids = rng.integers(0, predictor.n_trees(), n_scenarios)
+    dates = [start_date + timedelta(days=offset) for offset in range(days)]
+    history = history_buffer(historical_data)
+
+    if predictor.is_direct():
+        origin_lags = np.broadcast_to(
+            [history[-1], history[-2], history[0], history.mean()], (n_scenarios, 4)
+        )
+        X = np.vstack([
+            np.column_stack([_feature_matrix(env, t, date, origin_lags), np.full(n_scenarios, t + 1)])
+            for t, date in enumerate(dates)
+        ])
+        return predictor.predict_sampled(X, np.tile(tree_ids, days)).reshape(days, n_scenarios).T
+
+    loads = np.empty((n_scenarios, 7 + days))
+    loads[:, :7] = history
+    for t, date in enumerate(dates):
+        recent = loads[:, t:t + 7]
+        lags = np.column_stack([recent[:, -1], recent[:, -2], recent[:, 0], recent.mean(axis=1)])
+        loads[:, 7 + t] = np.maximum(0.0, predictor.predict_sampled(_feature_matrix(env, t, date, lags), tree_ids))
+    return loads[:, 7:]
+
+
+def _bands(quantiles: np.ndarray, levels: Sequence[float]) -> Dict[str, list]:
+    """{'p5': [...], 'p50': [...], ...} from an array with quantiles on axis 0"""
+    return {f"p{round(q * 100)}": [float(v) for v in np.atleast_1d(row)] for q, row in zip(levels, quantiles)}
+
+
+def summarize_scenarios(
+    loads: np.ndarray,
+    decision_engine,
+    start_date: datetime,
+    levels: Sequence[float] = SCENARIO_QUANTILES
+) -> Dict[str, Any]:
+    """
+    Quantile bands for load, staffing and supplies
+
+    Staff counts are ceil(load / ratio) with floors and supplies are
+    load x rate, both non-decreasing in the load, so the decision engine's
+    array rules are evaluated at the load quantiles (exact for supplies,
+    and the staffing that covers each load quantile).
+    """
+    load_q = np.quantile(loads, levels, axis=0)  # (n_levels, days)
+    total_q = np.quantile(loads.sum(axis=1), levels)  # (n_levels,)
+    load_levels = decision_engine.load_level_index(loads)  # (n_scenarios, days)
+
+    staff_q = decision_engine.required_staff(load_q)  # (n_levels, days, n_roles)
+    staffing = {
+        role: _bands(staff_q[..., r], levels)
+        for r, role in enumerate(decision_engine.roles)
+    }
+    supply_q = decision_engine.supply_needs(total_q)  # (n_levels, n_items)
+    supplies = {
+        item: _bands(supply_q[:, i], levels)
+        for i, item in enumerate(decision_engine.supply_items)
+    }
+
+    return {
+        'dates': [(start_date + timedelta(days=t)).strftime('%Y-%m-%d') for t in range(loads.shape[1])],
+        'n_scenarios': int(loads.shape[0]),
+        'patient_load': _bands(load_q, levels),
+        'probability_high': [float(p) for p in (load_levels >= LOAD_LEVELS.index('HIGH')).mean(axis=0)],
+        'probability_critical': [float(p) for p in (load_levels == LOAD_LEVELS.index('CRITICAL')).mean(axis=0)],
+        'staffing': staffing,
+        'supplies_total': supplies
+    }
+
+
+def run_scenarios(
+    predictor,
+    decision_engine,
+    start_date: datetime,
+    base_env: Dict[str, Any],
+    historical_data: Dict[str, float],
+    n_scenarios: int = 10000,
+    days: int = MAX_DAYS,
+    seed: Optional[int] = None,
+    **sampling
+) -> Dict[str, Any]:
+    """Sample environments, simulate load and summarize (runs on the inference executor)"""
+    if not predictor.is_trained():
+        raise ValueError("No trained model is available for scenario simulation")
+    if not 1 <= days <= MAX_DAYS or not 1 <= n_scenarios <= MAX_SCENARIOS:
+        raise ValueError(f"Expected 1-{MAX_DAYS} days and 1-{MAX_SCENARIOS} scenarios")
+
+    rng = np.random.default_rng(seed)
+    env = sample_environment(base_env, n_scenarios, days, rng, **sampling)
+    loads = simulate_load(predictor, start_date, env, historical_data, rng)
+    summary = summarize_scenarios(loads, decision_engine, start_date)
+    summary['aqi'] = _bands(np.quantile(env['AQI'], SCENARIO_QUANTILES, axis=0), SCENARIO_QUANTILES)
+    return summary
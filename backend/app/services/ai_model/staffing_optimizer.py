@@ -0,0 +1,305 @@
+"""
+Staffing Optimizer over Staff Schedules
+
+Turns the per-department shift forecast and the staff schedules into a
+minimal-change reassignment plan for one day:
+
+    schedule    Staff.schedule entries {"date": "2026-10-18", "shift": "evening",
+                "department": "ER"}; the department defaults to the staff
+                member's own, and staff without an entry that day are off duty
+    required    ceil(shift patients / staffing_ratios[role]) per department,
+                shift and role, and at least MIN_STAFF_PER_SHIFT
+    plan        shortages are covered largest first with surplus staff of
+                the same role: another department on the same shift, then
+                another shift of the same department, then anywhere. What
+                is still short calls in off-duty staff, own department first
+
+Each change covers one missing person, so no plan closes the same
+shortages with fewer changes. A person works one department per shift (the
+first schedule entry counts) and is changed at most once. Nobody is moved
+into a shift they already work or next to one (no evening followed by
+night). Departments without a forecast keep
+MIN_STAFF_PER_SHIFT of what they have per shift and role and lend the rest.
+
+Counting is one bincount over the day's assignments and the greedy runs on
+the (department, shift, role) count cube; only the chosen moves touch
+individual staff, so thousands of staff plan in a few milliseconds.
+"""
+import numpy as np
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.services.ai_model.decision_engine import SHIFTS
+
+# Shifts run 07-15, 15-23 and 23-07 (the night shift belongs to the day it starts)
+SHIFT_START_HOUR = 7
+SHIFT_HOURS = 8
+MIN_STAFF_PER_SHIFT = 1
+
+# Staff.role values (lower case, singular) per decision engine role
+ROLE_ALIASES = {
+    'doctor': 'doctors',
+    'physician': 'doctors',
+    'nurse': 'nurses',
+    'support': 'support',
+    'support staff': 'support'
+}
+# Staff.department values (lower case) per forecast department
+DEPARTMENT_ALIASES = {
+    'emergency': 'ER',
+    'emergency room': 'ER',
+    'respiratory': 'Resp_OPD',
+    'respiratory opd': 'Resp_OPD'
+}
+
+
+def _key(name: Any) -> str:
+    return " ".join(str(name).lower().replace("_", " ").split())
+
+
+def engine_role(role: Any) -> Optional[str]:
+    """Decision engine role of a Staff.role value, None for roles without a staffing ratio"""
+    key = _key(role)
+    if key not in ROLE_ALIASES and key.endswith('s'):
+        key = key[:-1]
+    return ROLE_ALIASES.get(key)
+
+
+def shift_of(moment: datetime) -> Tuple[date, str]:
+    """(schedule date, shift) running at a moment"""
+    hours = moment.hour - SHIFT_START_HOUR
+    day = moment.date()
+    if hours < 0:
+        day -= timedelta(days=1)
+        hours += 24
+    return day, SHIFTS[hours // SHIFT_HOURS]
+
+
+def shift_start(day: date) -> datetime:
+    """Start of the first shift of a schedule date"""
+    return datetime.combine(day, datetime.min.time()) + timedelta(hours=SHIFT_START_HOUR)
+
+
+def shift_loads(hourly: np.ndarray) -> np.ndarray:
+    """Patients per shift from 24 hourly counts starting at shift_start, shape (..., n_shifts)"""
+    hourly = np.asarray(hourly, dtype=np.float64)
+    if hourly.shape[-1] != len(SHIFTS) * SHIFT_HOURS:
+        raise ValueError(f"Expected {len(SHIFTS) * SHIFT_HOURS} hourly counts, got {hourly.shape[-1]}")
+    return hourly.reshape(hourly.shape[:-1] + (len(SHIFTS), SHIFT_HOURS)).sum(axis=-1)
+
+
+def _on_day(value: Any, day: date, day_text: str) -> bool:
+    """Whether a schedule entry date (ISO string, date or datetime) falls on day"""
+    if isinstance(value, str):
+        # ISO dates and timestamps start with the date; no parsing on the hot path
+        return value[:10] == day_text
+    if isinstance(value, datetime):
+        return value.date() == day
+    return value == day
+
+
+def day_assignments(staff: Sequence[Dict[str, Any]], day: date) -> List[Tuple[int, str, str]]:
+    """(staff index, department, shift) of every schedule entry on a day, one per person and shift"""
+    day_text = day.isoformat()
+    assignments = []
+    for i, member in enumerate(staff):
+        shifts = set()
+        for entry in member.get('schedule') or []:
+            if not _on_day(entry.get('date'), day, day_text):
+                continue
+            shift = _key(entry.get('shift', ''))
+            if shift in SHIFTS and shift not in shifts:
+                shifts.add(shift)
+                assignments.append((i, entry.get('department') or member.get('department'), shift))
+    return assignments
+
+
+class StaffingOptimizer:
+    """Minimal-change shift reassignments from staffing ratios and a per-department forecast"""
+
+    def __init__(self, staffing_ratios: Dict[str, float], min_per_shift: int = MIN_STAFF_PER_SHIFT):
+        self.roles = list(staffing_ratios)
+        self.ratios = np.array([staffing_ratios[role] for role in self.roles], dtype=np.float64)
+        self.min_per_shift = min_per_shift
+
+    def required(self, loads: np.ndarray) -> np.ndarray:
+        """Staff needed per role for shift loads, shape loads.shape + (n_roles,)"""
+        needed = np.ceil(np.asarray(loads, dtype=np.float64)[..., None] / self.ratios)
+        return np.maximum(needed, self.min_per_shift).astype(np.int64)
+
+    def _departments(self, staff, assignments, forecast_names) -> Tuple[List[str], Dict[str, str]]:
+        """Department list (forecast departments first) and the canonical name of every raw name"""
+        by_key = {_key(name): name for name in forecast_names}
+        by_key.update({alias: name for alias, name in DEPARTMENT_ALIASES.items() if name in forecast_names})
+        raw = {member.get('department') for member in staff} | {dept for _, dept, _ in assignments}
+        canonical = {name: by_key.get(_key(name), name) for name in raw if name is not None}
+        others = sorted(set(canonical.values()) - set(forecast_names))
+        return list(forecast_names) + others, canonical
+
+    def plan(
+        self,
+        staff: Sequence[Dict[str, Any]],
+        day: date,
+        loads: Dict[str, Sequence[float]]
+    ) -> Dict[str, Any]:
+        """
+        Reassignment plan for one schedule date
+
+        Args:
+            staff: Staff documents (role, department, schedule, name, _id)
+            day: schedule date to plan
+            loads: forecast patients per shift (SHIFTS order) per department
+
+        Returns:
+            dict with the changes (moves and call-ins), coverage per
+            department/shift/role before and after, and a summary
+        """
+        assignments = day_assignments(staff, day)
+        departments, canonical = self._departments(staff, assignments, list(loads))
+        dept_index = {name: d for d, name in enumerate(departments)}
+        n_dept, n_shift, n_role = len(departments), len(SHIFTS), len(self.roles)
+        staff_roles = [engine_role(member.get('role')) for member in staff]
+        roles = np.array([self.roles.index(role) if role else -1 for role in staff_roles], dtype=np.int64)
+
+        # Scheduled staff per (department, shift, role) cell
+        rows = np.array([
+            (i, dept_index[canonical[dept]], SHIFTS.index(shift))
+            for i, dept, shift in assignments if dept is not None
+        ], dtype=np.int64).reshape(-1, 3)
+        rows = rows[roles[rows[:, 0]] >= 0]
+        cells = (rows[:, 1] * n_shift + rows[:, 2]) * n_role + roles[rows[:, 0]]
+        counts = np.bincount(cells, minlength=n_dept * n_shift * n_role).reshape(n_dept, n_shift, n_role)
+
+        forecast = np.zeros((n_dept, n_shift))
+        for d, name in enumerate(loads):
+            forecast[d] = loads[name]
+        required = np.minimum(counts, self.min_per_shift)
+        required[:len(loads)] = self.required(forecast[:len(loads)])
+
+        # Staff of every cell and the off-duty staff per (role, home department), to draw from
+        order = np.argsort(cells, kind='stable')
+        bounds = np.searchsorted(cells[order], np.arange(n_dept * n_shift * n_role + 1))
+        members = {
+            cell: rows[order[bounds[cell]:bounds[cell + 1]], 0].tolist()
+            for cell in np.flatnonzero(np.diff(bounds)).tolist()
+        }
+        # Shifts each person works, to keep moves off their other shifts
+        works: Dict[int, set] = {}
+        for i, _, shift in rows.tolist():
+            works.setdefault(i, set()).add(shift)
+        changed = set()
+        on_duty = np.zeros(len(staff), dtype=bool)
+        on_duty[[i for i, _, _ in assignments]] = True
+        off_duty: Dict[Tuple[int, int], List[int]] = {}
+        for i in np.flatnonzero(~on_duty & (roles >= 0)).tolist():
+            home = canonical.get(staff[i].get('department'))
+            off_duty.setdefault((int(roles[i]), dept_index.get(home, -1)), []).append(i)
+
+        surplus = np.maximum(counts - required, 0)
+        deficit = np.maximum(required - counts, 0)
+        changes = []
+        d_grid, s_grid = np.meshgrid(np.arange(n_dept), np.arange(n_shift), indexing='ij')
+        for cell in np.argsort(-deficit.ravel(), kind='stable').tolist():
+            need = int(deficit.flat[cell])
+            if need == 0:
+                break
+            d, s, r = np.unravel_index(cell, deficit.shape)
+            # Donor preference: same shift elsewhere, same department other shift, then anywhere
+            tier = np.where(s_grid == s, 0, np.where(d_grid == d, 1, 2))
+            available = surplus[:, :, r]
+            donors = np.lexsort((-available.ravel(), tier.ravel()))
+            for donor in donors.tolist():
+                if need == 0:
+                    break
+                if available.flat[donor] == 0:
+                    continue
+                from_d, from_s = divmod(donor, n_shift)
+                pool = members[(from_d * n_shift + from_s) * n_role + r]
+                take = min(need, int(available.flat[donor]))
+                for k in range(len(pool) - 1, -1, -1):
+                    if take == 0:
+                        break
+                    i = pool[k]
+                    kept = works[i] - {from_s}
+                    if i in changed or any(abs(other - s) <= 1 for other in kept):
+                        continue
+                    del pool[k]
+                    works[i] = kept | {s}
+                    changed.add(i)
+                    changes.append(('move', i, from_d, from_s, d, s))
+                    available.flat[donor] -= 1
+                    need -= 1
+                    take -= 1
+            # Off-duty staff of the role, own department first
+            for key in sorted((key for key in off_duty if key[0] == r), key=lambda key: key[1] != d):
+                pool = off_duty[key]
+                while need and pool:
+                    i = pool.pop()
+                    changed.add(i)
+                    changes.append(('call_in', i, None, None, d, s))
+                    need -= 1
+            deficit[d, s, r] = need
+
+        after = counts.copy()
+        for kind, i, from_d, from_s, d, s in changes:
+            if kind == 'move':
+                after[from_d, from_s, roles[i]] -= 1
+            after[d, s, roles[i]] += 1
+
+        return {
+            'date': day.isoformat(),
+            'changes': [
+                {
+                    'type': kind,
+                    'staff_id': str(staff[i].get('_id')),
+                    'name': staff[i].get('name'),
+                    'role': self.roles[roles[i]],
+                    'from_department': departments[from_d] if from_d is not None else None,
+                    'from_shift': SHIFTS[from_s] if from_s is not None else None,
+                    'to_department': departments[d],
+                    'to_shift': SHIFTS[s]
+                }
+                for kind, i, from_d, from_s, d, s in changes
+            ],
+            'coverage': [
+                {
+                    'department': departments[d],
+                    'shift': SHIFTS[s],
+                    'role': self.roles[r],
+                    'forecast_patients': round(float(forecast[d, s]), 1) if d < len(loads) else None,
+                    'scheduled': int(counts[d, s, r]),
+                    'required': int(required[d, s, r]),
+                    'after_plan': int(after[d, s, r]),
+                    'shortfall': int(deficit[d, s, r])
+                }
+                for d, s, r in zip(*np.nonzero((counts > 0) | (required > 0)))
+            ],
+            'summary': {
+                'staff': len(staff),
+                'scheduled': len(assignments),
+                'changes': len(changes),
+                'moves': sum(change[0] == 'move' for change in changes),
+                'call_ins': sum(change[0] == 'call_in' for change in changes),
+                'shortfall': int(deficit.sum())
+            }
+        }
+
+
+def staff_readiness(staff: Sequence[Dict[str, Any]], day: date, shift: str) -> List[Dict[str, Any]]:
+    """
+    Per Staff.role: total, on duty in the given shift, and available for it
+
+    Available staff are those on duty plus those with no shift that day, who
+    can be called in; staff working another shift that day are not.
+    """
+    assignments = day_assignments(staff, day)
+    working = {i for i, _, _ in assignments}
+    on_shift = {i for i, _, entry_shift in assignments if entry_shift == shift}
+    readiness: Dict[str, Dict[str, Any]] = {}
+    for i, member in enumerate(staff):
+        role = str(member.get('role', ''))
+        entry = readiness.setdefault(role, {'name': role.title(), 'total': 0, 'onDuty': 0, 'available': 0})
+        entry['total'] += 1
+        entry['onDuty'] += i in on_shift
+        entry['available'] += i in on_shift or i not in working
+    return list(readiness.values())
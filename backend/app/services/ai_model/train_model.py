@@ -1,7 +1,15 @@
 """
 Train the patient load prediction model using existing CSV data
-Run this script to generate the model file
+Run this script from the backend directory to generate the model files:
+    
+    python -m app.services.ai_model.train_model
+
+Pass `--mode direct` to train the direct multi-horizon model instead, which
+forecasts every day of the horizon from the same origin in one batch and
+reports per-horizon accuracy against the recursive one-step model.
+`--mode hourly` trains the hourly per-department model (hourly_forecast.py).
 """
+import argparse
 import numpy as np
 import pandas as pd
 import pickle
@@ -9,45 +17,93 @@ import os
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 
+from app.services.ai_model.conformal import calibrate
+from app.services.ai_model.data_cache import (
+    DAILY_FEATURE_DTYPES,
+    EXTERNAL_DTYPES,
+    VISITS_DTYPES,
+    DataCache,
+    single_hospital
+)
+from app.services.ai_model.drift_monitor import training_profile
+from app.services.ai_model.forest_engine import CompiledForest
+from app.services.ai_model.hourly_forecast import train_hourly_model
+from app.services.ai_model.model_registry import (
+    DIRECT_REGISTRY_DIR,
+    HOURLY_REGISTRY_DIR,
+    ModelRegistry
+)
+
 # Get paths
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(SCRIPT_DIR, "..", "..", "..", "notebooks")
 MODELS_DIR = os.path.join(SCRIPT_DIR, "models")
 
+FEATURE_COLS = [
+    "holiday_flag", "festival_flag", "AQI", "high_AQI_flag",
+    "temp", "rainfall", "epidemic_alert_level", "month", "is_weekend",
+    "patients_lag1", "patients_lag2", "patients_lag7", "patients_roll7"
+]
+
+# Calendar/environment features known for the target day
+EXOGENOUS_COLS = FEATURE_COLS[:9]
+LAG_COLS = ["patients_lag1", "patients_lag2", "patients_lag7", "patients_roll7"]
+
+# Direct multi-horizon model: lags are anchored at the forecast origin
+DIRECT_HORIZONS = 14
+DIRECT_FEATURE_COLS = FEATURE_COLS + ["horizon"]
+
+TEST_SIZE = 60
+
+# Default hyperparameters; tuning.py searches around these
+MODEL_PARAMS = {
+    'n_estimators': 100,
+    'max_depth': 10,
+    'min_samples_leaf': 1,
+}
+
 # Create models directory if it doesn't exist
 os.makedirs(MODELS_DIR, exist_ok=True)
 
 
-def prepare_modeling_data():
-    """Load and prepare data for modeling"""
+VISITS_PATH = os.path.join(DATA_DIR, "patient_visits.csv")
+EXT_PATH = os.path.join(DATA_DIR, "external_factors.csv")
+
+
+def load_raw_data(cache=None, visits_path=VISITS_PATH, ext_path=EXT_PATH):
+    """Load hourly patient visits and daily external factors"""
     print("Loading data...")
     
-    # Load CSVs
-    visits_path = os.path.join(DATA_DIR, "patient_visits.csv")
-    ext_path = os.path.join(DATA_DIR, "external_factors.csv")
-    
-    df_visits = pd.read_csv(visits_path, parse_dates=["date"])
-    df_ext = pd.read_csv(ext_path, parse_dates=["date"], keep_default_na=False)
+    # Load CSVs (or their cached columnar copies when the files are unchanged)
+    read_visits = lambda: pd.read_csv(visits_path, parse_dates=["date"])
+    read_ext = lambda: pd.read_csv(ext_path, parse_dates=["date"], keep_default_na=False)
+    if cache is not None:
+        df_visits = cache.get_or_build("visits", [visits_path], read_visits, VISITS_DTYPES)
+        df_ext = cache.get_or_build("external", [ext_path], read_ext, EXTERNAL_DTYPES)
+    else:
+        df_visits = read_visits()
+        df_ext = read_ext()
     
     print(f"  ✓ Loaded {len(df_visits)} patient visit records")
     print(f"  ✓ Loaded {len(df_ext)} days of external factors")
     
-    # Aggregate to daily
-    df_daily = (
-        df_visits.groupby("date")["patient_count"]
-        .sum()
-        .reset_index()
-        .rename(columns={"patient_count": "patients"})
-    )
+    return df_visits, df_ext
+
+
+def build_daily_features(df):
+    """
+    Add calendar flags, lags and the rolling mean to a daily frame
     
-    # Merge with external factors
-    df = df_daily.merge(df_ext, on="date", how="left")
+    Expects one row per day with patients and external factor columns;
+    festival_flag is derived from festival_name when not given directly.
+    """
     df = df.sort_values("date").reset_index(drop=True)
     
     # Feature engineering
     df["month"] = df["date"].dt.month
-    df["is_weekend"] = df["day_of_week"].isin(["Saturday", "Sunday"]).astype(int)
-    df["festival_flag"] = ((df["holiday_flag"] == 1) | (df["festival_name"] != "")).astype(int)
+    df["is_weekend"] = (df["date"].dt.dayofweek >= 5).astype(int)
+    if "festival_flag" not in df.columns:
+        df["festival_flag"] = ((df["holiday_flag"] == 1) | (df["festival_name"] != "")).astype(int)
     df["high_AQI_flag"] = (df["AQI"] >= 250).astype(int)
     
     # Lag features
@@ -60,6 +116,28 @@ def prepare_modeling_data():
         df["patients"].shift(1).rolling(window=7, min_periods=3).mean()
     )
     
+    return df
+
+
+def prepare_modeling_data(df_visits=None, df_ext=None):
+    """Load and prepare data for modeling"""
+    if df_visits is None or df_ext is None:
+        df_visits, df_ext = load_raw_data()
+    df_visits = single_hospital(df_visits, "Patient visits")
+    df_ext = single_hospital(df_ext, "External factors")
+    
+    # Aggregate to daily
+    df_daily = (
+        df_visits.groupby("date")["patient_count"]
+        .sum()
+        .reset_index()
+        .rename(columns={"patient_count": "patients"})
+    )
+    
+    # Merge with external factors
+    df = df_daily.merge(df_ext, on="date", how="left")
+    df = build_daily_features(df)
+    
     # Drop NaN rows
     df_model = df.dropna().reset_index(drop=True)
     
@@ -68,20 +146,33 @@ def prepare_modeling_data():
     return df_model
 
 
-def train_model(df_model):
-    """Train Random Forest model"""
+def load_modeling_data(cache=None):
+    """Engineered daily frame, reused from the cache while the CSVs are unchanged"""
+    if cache is None:
+        return prepare_modeling_data()
     
-    feature_cols = [
-        "holiday_flag", "festival_flag", "AQI", "high_AQI_flag",
-        "temp", "rainfall", "epidemic_alert_level", "month", "is_weekend",
-        "patients_lag1", "patients_lag2", "patients_lag7", "patients_roll7"
-    ]
+    misses = cache.misses
+    df_model = cache.get_or_build(
+        "daily_features",
+        [VISITS_PATH, EXT_PATH],
+        lambda: prepare_modeling_data(*load_raw_data(cache)),
+        DAILY_FEATURE_DTYPES
+    )
+    if cache.misses == misses:
+        print(f"  ✓ Loaded {len(df_model)} prepared days from cache ({cache.root})")
+    return df_model
+
+
+def train_model(df_model, params=None):
+    """Train Random Forest model (params override MODEL_PARAMS, e.g. from tuning.py)"""
+    
+    feature_cols = FEATURE_COLS
     
     X = df_model[feature_cols].values
     y = df_model["patients"].values
     
     # Train-test split (last 60 days for testing)
-    test_size = 60
+    test_size = TEST_SIZE
     train_size = len(df_model) - test_size
     
     X_train = X[:train_size]
@@ -98,11 +189,11 @@ def train_model(df_model):
     
     # Train model
     print("\nTraining Random Forest model...")
+    model_params = {**MODEL_PARAMS, **(params or {})}
     model = RandomForestRegressor(
-        n_estimators=100,
-        max_depth=10,
         random_state=42,
-        n_jobs=-1
+        n_jobs=-1,
+        **model_params
     )
     
     model.fit(X_train, y_train)
@@ -127,21 +218,313 @@ def train_model(df_model):
     for idx, row in feature_importance.head().iterrows():
         print(f"  {row['feature']:25s} {row['importance']:.4f}")
     
-    return model
+    metrics = {
+        'mae': float(mae),
+        'rmse': float(rmse),
+        'params': model_params,
+        'training_window': {
+            'start': train_dates.iloc[0].strftime('%Y-%m-%d'),
+            'end': train_dates.iloc[-1].strftime('%Y-%m-%d')
+        },
+        'test_window': {
+            'start': test_dates.iloc[0].strftime('%Y-%m-%d'),
+            'end': test_dates.iloc[-1].strftime('%Y-%m-%d')
+        }
+    }
+    
+    return model, metrics
+
+
+def build_direct_frame(df_model, horizons=DIRECT_HORIZONS):
+    """
+    Stack one row per (target day, horizon) for direct multi-horizon training
+    
+    For horizon h the lag features are those known at the forecast origin
+    (target day - h), i.e. the one-step lag columns shifted by h - 1 days.
+    Exogenous features stay those of the target day.
+    """
+    frames = []
+    for h in range(1, horizons + 1):
+        df_h = df_model.copy()
+        df_h[LAG_COLS] = df_model[LAG_COLS].shift(h - 1)
+        df_h["horizon"] = h
+        frames.append(df_h)
+    
+    return pd.concat(frames, ignore_index=True).dropna(subset=LAG_COLS).reset_index(drop=True)
+
+
+def recursive_forecast(predict_fn, df_model, starts, horizons=DIRECT_HORIZONS):
+    """
+    Forecast `horizons` days from each start row by feeding predictions back as lags
+    
+    All origins advance together, so each step is one batched predict call.
+    
+    Args:
+        predict_fn: callable mapping an (n, len(FEATURE_COLS)) matrix to predictions
+        df_model: prepared modeling frame (contiguous days)
+        starts: row indices of the first forecast day (need 7 prior rows)
+        horizons: number of days to forecast
+    
+    Returns:
+        array of shape (len(starts), horizons)
+    """
+    starts = np.asarray(starts)
+    y = df_model["patients"].values.astype(np.float64)
+    exogenous = df_model[EXOGENOUS_COLS].values.astype(np.float64)
+    
+    # Last 7 actual values before each origin, extended with predictions
+    history = np.stack([y[s - 7:s] for s in starts])
+    preds = np.empty((len(starts), horizons))
+    
+    for h in range(horizons):
+        X = np.column_stack([
+            exogenous[starts + h],
+            history[:, -1],
+            history[:, -2],
+            history[:, -7],
+            history[:, -7:].mean(axis=1)
+        ])
+        preds[:, h] = predict_fn(X)
+        history = np.column_stack([history, preds[:, h]])
+    
+    return preds
+
+
+def direct_forecast(predict_fn, df_model, starts, horizons=DIRECT_HORIZONS):
+    """
+    Forecast `horizons` days from each start row with a direct multi-horizon model
+    
+    Every (origin, horizon) row is independent, so the whole forecast is a
+    single batched predict call.
+    
+    Returns:
+        array of shape (len(starts), horizons)
+    """
+    starts = np.asarray(starts)
+    exogenous = df_model[EXOGENOUS_COLS].values.astype(np.float64)
+    origin_lags = df_model[LAG_COLS].values.astype(np.float64)[starts]
+    
+    h = np.arange(1, horizons + 1)
+    rows = (starts[:, None] + h[None, :] - 1).ravel()
+    X = np.column_stack([
+        exogenous[rows],
+        np.repeat(origin_lags, horizons, axis=0),
+        np.tile(h, len(starts))
+    ])
+    
+    return np.asarray(predict_fn(X)).reshape(len(starts), horizons)
+
+
+def train_direct_model(df_model, horizons=DIRECT_HORIZONS, params=None):
+    """
+    Train the direct multi-horizon model on targets before the test window
+    
+    params override MODEL_PARAMS as in train_model (e.g. from tuning.py --mode direct).
+    
+    Returns:
+        (model, training profile of its feature rows for drift monitoring)
+    """
+    test_start = df_model["date"].iloc[len(df_model) - TEST_SIZE]
+    df_direct = build_direct_frame(df_model, horizons)
+    df_train = df_direct[df_direct["date"] < test_start]
+    
+    print(f"\nTraining direct {horizons}-day model on {len(df_train)} (day, horizon) rows...")
+    model = RandomForestRegressor(
+        random_state=42,
+        n_jobs=-1,
+        **{**MODEL_PARAMS, **(params or {})}
+    )
+    X_train = df_train[DIRECT_FEATURE_COLS].values
+    model.fit(X_train, df_train["patients"].values)
+    
+    return model, training_profile(X_train, DIRECT_FEATURE_COLS)
+
+
+def compare_horizons(one_step_model, direct_model, df_model, horizons=DIRECT_HORIZONS):
+    """Per-horizon MAE/RMSE of recursive vs direct forecasts over the test window"""
+    first = len(df_model) - TEST_SIZE
+    starts = np.arange(first, len(df_model) - horizons + 1)
+    y = df_model["patients"].values.astype(np.float64)
+    actual = np.stack([y[s:s + horizons] for s in starts])
+    
+    recursive = recursive_forecast(one_step_model.predict, df_model, starts, horizons)
+    direct = direct_forecast(direct_model.predict, df_model, starts, horizons)
+    
+    report = pd.DataFrame({
+        'horizon': np.arange(1, horizons + 1),
+        'mae_recursive': np.abs(recursive - actual).mean(axis=0),
+        'mae_direct': np.abs(direct - actual).mean(axis=0),
+        'rmse_recursive': np.sqrt(((recursive - actual) ** 2).mean(axis=0)),
+        'rmse_direct': np.sqrt(((direct - actual) ** 2).mean(axis=0))
+    })
+    
+    print(f"\nPer-horizon accuracy over {len(starts)} origins in the test window:")
+    print(f"  {'h':>3s} {'MAE rec':>9s} {'MAE dir':>9s} {'RMSE rec':>9s} {'RMSE dir':>9s}")
+    for _, row in report.iterrows():
+        print(f"  {int(row['horizon']):3d} {row['mae_recursive']:9.2f} {row['mae_direct']:9.2f} "
+              f"{row['rmse_recursive']:9.2f} {row['rmse_direct']:9.2f}")
+    
+    return report
+
+
+def forecast_with_spread(forecast_fn, forest, df_model, starts, horizons=DIRECT_HORIZONS):
+    """
+    Run recursive_forecast or direct_forecast with a compiled forest
+    
+    Returns:
+        (forecasts, spreads), each of shape (len(starts), horizons); spreads
+        are the per-tree standard deviations behind each forecast
+    """
+    spreads = []
+    
+    def predict_fn(X):
+        mean, std = forest.predict_with_std(X)
+        spreads.append(std)
+        return mean
+    
+    forecasts = forecast_fn(predict_fn, df_model, starts, horizons)
+    if forecast_fn is recursive_forecast:
+        # One call per horizon step, all origins together
+        return forecasts, np.column_stack(spreads)
+    return forecasts, spreads[0].reshape(len(starts), horizons)
+
+
+def calibrate_forest(forecast_fn, forest, df_model, starts, horizons=DIRECT_HORIZONS):
+    """
+    Conformal interval multipliers of a compiled forest from forecasts at the given origins
+    
+    Also used to recalibrate forests whose trees changed after training
+    (online updates, compression); multipliers fitted to other trees do not
+    carry over.
+    """
+    y = df_model["patients"].values.astype(np.float64)
+    actual = np.stack([y[s:s + horizons] for s in starts])
+    forecasts, spreads = forecast_with_spread(forecast_fn, forest, df_model, starts, horizons)
+    return calibrate(actual - forecasts, spreads)
+
+
+def calibration_origins(df_model, mask, horizons=DIRECT_HORIZONS):
+    """
+    Rows selected by mask that have a week of history and a full horizon after them
+    
+    Days missing from a calendar frame are NaN rows; origins whose history
+    or horizon touches one are skipped.
+    """
+    starts = np.flatnonzero(np.asarray(mask))
+    starts = starts[(starts >= 7) & (starts + horizons <= len(df_model))]
+    missing = df_model[["patients"] + EXOGENOUS_COLS].isna().any(axis=1).to_numpy()
+    missing = np.concatenate([[0], np.cumsum(missing)])
+    return starts[missing[starts + horizons] == missing[starts - 7]]
+
+
+def interval_calibration(forecast_fn, model, df_model, horizons=DIRECT_HORIZONS):
+    """
+    Conformal interval multipliers per horizon from test-window forecasts
+    
+    The test window is held out from training, so its forecast residuals
+    calibrate the served intervals (see conformal.py).
+    
+    Args:
+        forecast_fn: recursive_forecast or direct_forecast
+        model: the fitted model whose intervals are calibrated
+    """
+    first = len(df_model) - TEST_SIZE
+    starts = np.arange(first, len(df_model) - horizons + 1)
+    conformal = calibrate_forest(
+        forecast_fn, CompiledForest.from_sklearn(model), df_model, starts, horizons
+    )
+    
+    print(f"\n✓ Calibrated 95% intervals on {len(starts)} test origins (multiples of the tree spread):")
+    for h in sorted({1, 7, horizons}):
+        print(f"  h={h:2d}: [{conformal['lower'][h - 1]:+.2f}, {conformal['upper'][h - 1]:+.2f}]")
+    
+    return conformal
+
+
+def main_direct(df_model, model, metrics, horizons=DIRECT_HORIZONS, params=None):
+    """Train, evaluate and publish the direct multi-horizon model"""
+    direct_model, profile = train_direct_model(df_model, horizons, params)
+    report = compare_horizons(model, direct_model, df_model, horizons)
+    conformal = interval_calibration(direct_forecast, direct_model, df_model, horizons)
+    
+    registry = ModelRegistry(DIRECT_REGISTRY_DIR)
+    version = registry.publish(direct_model, {
+        'feature_cols': DIRECT_FEATURE_COLS,
+        'kind': 'direct',
+        'horizons': horizons,
+        'params': {**MODEL_PARAMS, **(params or {})},
+        'training_window': metrics['training_window'],
+        'test_window': metrics['test_window'],
+        'metrics': {
+            'mae': float(report['mae_direct'].mean()),
+            'rmse': float(np.sqrt((report['rmse_direct'] ** 2).mean()))
+        },
+        'horizon_metrics': report.to_dict(orient='records'),
+        'conformal': conformal,
+        'training_profile': profile
+    })
+    registry.prune(keep=5)
+    print(f"\n✓ Published direct model version {version} to: {registry.root}")
+
+
+def main_hourly(df_visits, df_ext):
+    """Train, evaluate and publish the hourly per-department model"""
+    model, metadata = train_hourly_model(df_visits, df_ext)
+    
+    registry = ModelRegistry(HOURLY_REGISTRY_DIR)
+    version = registry.publish(model, metadata)
+    registry.prune(keep=5)
+    print(f"\n✓ Published hourly model version {version} to: {registry.root}")
 
 
 def main():
     """Main execution function"""
+    parser = argparse.ArgumentParser(description="Train the patient load prediction model")
+    parser.add_argument("--mode", choices=["recursive", "direct", "hourly"], default="recursive",
+                        help="one-step daily model used recursively (default), direct multi-horizon "
+                             "daily model, or hourly per-department model")
+    parser.add_argument("--horizons", type=int, default=DIRECT_HORIZONS,
+                        help="forecast horizon in days for --mode direct")
+    parser.add_argument("--n-estimators", type=int, default=None, help="number of trees")
+    parser.add_argument("--max-depth", type=int, default=None, help="maximum tree depth")
+    parser.add_argument("--min-samples-leaf", type=int, default=None, help="minimum samples per leaf")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="re-parse the CSVs instead of using the columnar data cache")
+    args = parser.parse_args()
+    
     print("="*70)
     print("TRAINING PATIENT LOAD PREDICTION MODEL")
     print("="*70)
     print()
     
+    cache = None if args.no_cache else DataCache()
+    
+    if args.mode == "hourly":
+        main_hourly(*load_raw_data(cache))
+        print("\n" + "="*70)
+        print("✓ HOURLY MODEL TRAINING COMPLETE!")
+        print("="*70)
+        return
+    
     # Prepare data
-    df_model = prepare_modeling_data()
+    df_model = load_modeling_data(cache)
     
     # Train model
-    model = train_model(df_model)
+    params = {
+        name: value for name, value in (
+            ('n_estimators', args.n_estimators),
+            ('max_depth', args.max_depth),
+            ('min_samples_leaf', args.min_samples_leaf)
+        ) if value is not None
+    }
+    model, metrics = train_model(df_model, params)
+    
+    if args.mode == "direct":
+        main_direct(df_model, model, metrics, args.horizons, params)
+        print("\n" + "="*70)
+        print("✓ DIRECT MODEL TRAINING COMPLETE!")
+        print("="*70)
+        return
     
     # Save model
     model_path = os.path.join(MODELS_DIR, "patient_predictor.pkl")
@@ -149,11 +532,28 @@ def main():
         pickle.dump(model, f)
     print(f"\n✓ Model saved to: {model_path}")
     
+    conformal = interval_calibration(recursive_forecast, model, df_model)
+    
+    # Publish to the registry; running API workers swap to it automatically
+    registry = ModelRegistry()
+    version = registry.publish(model, {
+        'feature_cols': FEATURE_COLS,
+        'training_window': metrics['training_window'],
+        'test_window': metrics['test_window'],
+        'params': metrics['params'],
+        'metrics': {'mae': metrics['mae'], 'rmse': metrics['rmse']},
+        'conformal': conformal,
+        # Feature histograms of the training rows, the baseline for drift monitoring
+        'training_profile': training_profile(df_model[FEATURE_COLS].values[:-TEST_SIZE], FEATURE_COLS)
+    })
+    registry.prune(keep=5)
+    print(f"✓ Published model version {version} to: {registry.root}")
+    
     print("\n" + "="*70)
     print("✓ MODEL TRAINING COMPLETE!")
     print("="*70)
     print("\nThe model is now ready to use for predictions.")
-    print("Restart the backend server to load the new model.")
+    print("Running backend workers pick up the new version within a few seconds.")
 
 
 if __name__ == "__main__":
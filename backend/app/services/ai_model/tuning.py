@@ -0,0 +1,247 @@
+"""
+Rolling-Origin Cross-Validation and Hyperparameter Search
+Run from the backend directory:
+
+    python -m app.services.ai_model.tuning --latency-budget-ms 1.0 --workers 4
+
+Every (candidate, fold) fit runs as its own task on a process pool. Folds
+use an expanding training window and the next `test_size` days as the
+validation block. Each candidate is compiled to the serving engine
+(CompiledForest) and timed on 1-row and 14-row batches, so the selected
+model is the most accurate one that meets the serving latency budget.
+
+The one-step daily model (FEATURE_COLS) is tuned by default; `--mode direct`
+tunes the direct multi-horizon model on its (target day, horizon) rows
+(DIRECT_FEATURE_COLS), sorted by target day so folds still split in time.
+"""
+import argparse
+import itertools
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sklearn.ensemble import RandomForestRegressor
+
+from app.services.ai_model.benchmark_engines import time_calls
+from app.services.ai_model.forest_engine import CompiledForest
+
+PARAM_GRID = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [6, 10, 14],
+    'min_samples_leaf': [1, 3],
+}
+
+N_FOLDS = 5
+FOLD_TEST_SIZE = 30
+MIN_TRAIN_SIZE = 120
+LATENCY_BATCH_SIZES = (1, 14)
+LATENCY_REPEATS = 200
+
+
+def expand_grid(grid: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """All combinations of a parameter grid, in a stable order"""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def rolling_origin_folds(
+    n_rows: int,
+    n_folds: int = N_FOLDS,
+    test_size: int = FOLD_TEST_SIZE,
+    min_train_size: int = MIN_TRAIN_SIZE
+) -> List[Tuple[int, int]]:
+    """
+    Expanding-window folds as (train_end, test_end) row indices
+
+    Fold k trains on rows [0, train_end) and validates on [train_end, test_end);
+    the last fold ends at the last row.
+    """
+    first_train_end = n_rows - n_folds * test_size
+    if first_train_end < min_train_size:
+        raise ValueError(
+            f"{n_rows} rows are too few for {n_folds} folds of {test_size} "
+            f"with at least {min_train_size} training rows"
+        )
+    return [
+        (first_train_end + k * test_size, first_train_end + (k + 1) * test_size)
+        for k in range(n_folds)
+    ]
+
+
+def _fit_fold(
+    params: Dict[str, Any],
+    X: np.ndarray,
+    y: np.ndarray,
+    fold: Tuple[int, int],
+    keep_compiled: bool
+) -> Dict[str, Any]:
+    """Fit one candidate on one fold and score it (runs in a worker process)"""
+    train_end, test_end = fold
+    model = RandomForestRegressor(random_state=42, n_jobs=1, **params)
+
+    started = time.perf_counter()
+    model.fit(X[:train_end], y[:train_end])
+    fit_seconds = time.perf_counter() - started
+
+    errors = model.predict(X[train_end:test_end]) - y[train_end:test_end]
+    result = {
+        'mae': float(np.abs(errors).mean()),
+        'mse': float((errors ** 2).mean()),
+        'fit_seconds': fit_seconds
+    }
+
+    if keep_compiled:
+        # Serving-engine form of the last fold's model, timed once the pool is idle
+        result['compiled'] = CompiledForest.from_sklearn(model)
+
+    return result
+
+
+def measure_latency(compiled: CompiledForest, X: np.ndarray) -> Dict[str, float]:
+    """p50/p99 serving latency (ms) of a compiled forest per batch size"""
+    latency = {}
+    for n_rows in LATENCY_BATCH_SIZES:
+        batch = X[-n_rows:]
+        stats = time_calls(lambda: compiled.predict_with_std(batch), LATENCY_REPEATS)
+        latency[f'latency_{n_rows}_p50_ms'] = stats['p50']
+        latency[f'latency_{n_rows}_p99_ms'] = stats['p99']
+    return latency
+
+
+def cross_validate(
+    X: np.ndarray,
+    y: np.ndarray,
+    candidates: Sequence[Dict[str, Any]],
+    folds: Sequence[Tuple[int, int]],
+    max_workers: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Score every candidate on every fold across a process pool
+
+    Returns:
+        one row per candidate with its parameters, mean MAE/RMSE over folds,
+        mean fit time and serving latency
+    """
+    tasks = [
+        (c, f, params, fold, f == len(folds) - 1)
+        for c, params in enumerate(candidates)
+        for f, fold in enumerate(folds)
+    ]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(_fit_fold, params, X, y, fold, keep_compiled)
+            for _, _, params, fold, keep_compiled in tasks
+        ]
+        results = [future.result() for future in futures]
+
+    rows = []
+    for c, params in enumerate(candidates):
+        fold_results = [r for (task_c, *_), r in zip(tasks, results) if task_c == c]
+        row = dict(params)
+        row['mae'] = float(np.mean([r['mae'] for r in fold_results]))
+        row['rmse'] = float(np.sqrt(np.mean([r['mse'] for r in fold_results])))
+        row['mae_std'] = float(np.std([r['mae'] for r in fold_results]))
+        row['fit_seconds'] = float(np.mean([r['fit_seconds'] for r in fold_results]))
+        # Timed here, after the pool has shut down, so concurrent fits do not
+        # inflate the latency of the last fold's model
+        compiled = fold_results[-1]['compiled']
+        row.update(measure_latency(compiled, X))
+        row['model_bytes'] = compiled.nbytes
+        rows.append(row)
+
+    return pd.DataFrame(rows).sort_values('mae').reset_index(drop=True)
+
+
+def select_candidate(
+    results: pd.DataFrame,
+    latency_budget_ms: Optional[float] = None,
+    latency_column: str = 'latency_1_p99_ms'
+) -> Dict[str, Any]:
+    """
+    Most accurate candidate whose latency fits the budget
+
+    Falls back to the fastest candidate when none fits.
+    """
+    eligible = results
+    if latency_budget_ms is not None:
+        eligible = results[results[latency_column] <= latency_budget_ms]
+        if eligible.empty:
+            print(f"⚠️  No candidate meets {latency_budget_ms} ms; selecting the fastest")
+            eligible = results.nsmallest(1, latency_column)
+    return eligible.sort_values('mae').iloc[0].to_dict()
+
+
+def candidate_params(row: Dict[str, Any], grid: Dict[str, Sequence[Any]] = PARAM_GRID) -> Dict[str, Any]:
+    """RandomForestRegressor keyword arguments from a result row"""
+    return {name: type(grid[name][0])(row[name]) for name in grid}
+
+
+def main():
+    """Main execution function"""
+    from app.services.ai_model.data_cache import DataCache
+    from app.services.ai_model.train_model import (
+        DIRECT_FEATURE_COLS,
+        DIRECT_HORIZONS,
+        FEATURE_COLS,
+        build_direct_frame,
+        load_modeling_data
+    )
+
+    parser = argparse.ArgumentParser(description="Cross-validate and tune the patient load forecaster")
+    parser.add_argument("--mode", choices=["recursive", "direct"], default="recursive",
+                        help="one-step daily model used recursively (default) or direct multi-horizon model")
+    parser.add_argument("--horizons", type=int, default=DIRECT_HORIZONS,
+                        help="forecast horizon in days for --mode direct")
+    parser.add_argument("--folds", type=int, default=N_FOLDS, help="number of rolling-origin folds")
+    parser.add_argument("--test-size", type=int, default=FOLD_TEST_SIZE, help="validation days per fold")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--latency-budget-ms", type=float, default=None,
+                        help="p99 single-row inference budget for the selected model")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("TUNING PATIENT LOAD PREDICTION MODEL")
+    print("=" * 70)
+
+    df_model = load_modeling_data(DataCache())
+    if args.mode == "direct":
+        # One row per (target day, horizon); folds are sized in days x horizons
+        df_model = build_direct_frame(df_model, args.horizons).sort_values("date", kind="stable")
+        feature_cols, rows_per_day = DIRECT_FEATURE_COLS, args.horizons
+    else:
+        feature_cols, rows_per_day = FEATURE_COLS, 1
+    print(f"\nTuning the {args.mode} model on {len(feature_cols)} features: {', '.join(feature_cols)}")
+    X = df_model[feature_cols].to_numpy(dtype=np.float64)
+    y = df_model["patients"].to_numpy(dtype=np.float64)
+
+    candidates = expand_grid(PARAM_GRID)
+    folds = rolling_origin_folds(
+        len(df_model), args.folds, args.test_size * rows_per_day, MIN_TRAIN_SIZE * rows_per_day
+    )
+    print(f"\n{len(candidates)} candidates x {len(folds)} folds = {len(candidates) * len(folds)} fits")
+
+    started = time.perf_counter()
+    results = cross_validate(X, y, candidates, folds, args.workers)
+    print(f"✓ Cross-validation finished in {time.perf_counter() - started:.1f}s\n")
+
+    with pd.option_context('display.width', 160, 'display.max_columns', 20):
+        print(results[
+            list(PARAM_GRID) + ['mae', 'rmse', 'fit_seconds', 'latency_1_p99_ms', 'latency_14_p99_ms']
+        ].round(3).to_string(index=False))
+
+    best = select_candidate(results, args.latency_budget_ms)
+    print(f"\nSelected: {candidate_params(best)}")
+    print(f"  CV MAE {best['mae']:.2f}, RMSE {best['rmse']:.2f}, "
+          f"p99 latency {best['latency_1_p99_ms']:.3f} ms (1 row), {best['latency_14_p99_ms']:.3f} ms (14 rows)")
+    print("\nTrain and publish it with:")
+    params = candidate_params(best)
+    mode = f"--mode direct --horizons {args.horizons} " if args.mode == "direct" else ""
+    print(f"  python -m app.services.ai_model.train_model {mode}" + " ".join(
+        f"--{name.replace('_', '-')} {value}" for name, value in params.items()
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+In-Memory Bed Availability Index
+
+Keeps every bed's department, room, features and status in memory so
+admissions never scan the beds collection:
+
+    available beds    ordered sets per (department, feature set) and per
+                      (department, room); allocation pops one in O(1)
+    counts            beds per department and status, updated on every
+                      write, so /beds/stats reads counters
+
+Features come from Bed.features: keys set to true plus string values,
+lower-cased ({"ventilator": true, "type": "ICU"} gives icu and ventilator).
+A request for some features is served from the matching group with the
+fewest extra features, so plain admissions do not take ventilator beds. The
+groups checked depend on the distinct feature combinations in use, not on
+the number of beds.
+
+The routers update the index on every bed write. It is rebuilt from MongoDB
+at startup and every rebuild interval, which catches writes made by other
+workers. Allocation reserves a bed under a lock. The caller then confirms it
+with a conditional MongoDB update, so two workers never hand out the same bed.
+Statuses are written lower case; the conditional updates match any case so
+beds stored before that still allocate and release.
+"""
+import asyncio
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+AVAILABLE = "available"
+OCCUPIED = "occupied"
+STATUSES = (AVAILABLE, OCCUPIED, "maintenance")
+
+BED_FIELDS = {'department': 1, 'room_number': 1, 'features': 1, 'status': 1}
+
+
+def normalize_status(status: Any) -> str:
+    """Status as stored by the bed routers (lower case, e.g. "Available" gives available)"""
+    return str(status).strip().lower()
+
+
+def status_filter(status: str) -> Dict[str, str]:
+    """MongoDB condition matching a status in any case, for beds written before normalization"""
+    return {'$regex': f"^\\s*{status}\\s*$", '$options': 'i'}
+
+
+def bed_features(features: Optional[Dict[str, Any]]) -> frozenset:
+    """Feature names of a Bed.features dict"""
+    names = set()
+    for key, value in (features or {}).items():
+        if value is True:
+            names.add(str(key).lower())
+        elif isinstance(value, str) and value:
+            names.add(value.lower())
+        elif isinstance(value, (list, tuple)):
+            names.update(str(item).lower() for item in value)
+    return frozenset(names)
+
+
+class _Entry:
+    __slots__ = ("department", "room", "features", "status")
+
+    def __init__(self, department: str, room: str, features: frozenset, status: str):
+        self.department = department
+        self.room = room
+        self.features = features
+        self.status = status
+
+
+class BedIndex:
+    """Bed availability by department, room and feature with O(1) allocate and release"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+        self.rebuilds = 0
+
+    def _reset(self):
+        self._beds: Dict[str, _Entry] = {}
+        # Available bed ids as insertion-ordered dicts (ordered sets)
+        self._available: Dict[Tuple[str, frozenset], Dict[str, None]] = {}
+        self._rooms: Dict[Tuple[str, str], Dict[str, None]] = {}
+        # Feature sets seen per department
+        self._groups: Dict[str, Set[frozenset]] = {}
+        self._counts: Dict[str, Counter] = {}
+
+    def __len__(self) -> int:
+        return len(self._beds)
+
+    def _add(self, bed_id: str, entry: _Entry):
+        self._beds[bed_id] = entry
+        self._counts.setdefault(entry.department, Counter())[entry.status] += 1
+        self._groups.setdefault(entry.department, set()).add(entry.features)
+        if entry.status == AVAILABLE:
+            self._available.setdefault((entry.department, entry.features), {})[bed_id] = None
+            self._rooms.setdefault((entry.department, entry.room), {})[bed_id] = None
+
+    def _discard(self, bed_id: str) -> Optional[_Entry]:
+        entry = self._beds.pop(bed_id, None)
+        if entry is None:
+            return None
+        self._counts[entry.department][entry.status] -= 1
+        if entry.status == AVAILABLE:
+            self._available[(entry.department, entry.features)].pop(bed_id, None)
+            self._rooms[(entry.department, entry.room)].pop(bed_id, None)
+        return entry
+
+    def _set_status(self, bed_id: str, entry: _Entry, status: str):
+        self._discard(bed_id)
+        entry.status = status
+        self._add(bed_id, entry)
+
+    @staticmethod
+    def _entry(bed: Dict[str, Any]) -> _Entry:
+        return _Entry(
+            str(bed.get('department')),
+            str(bed.get('room_number')),
+            bed_features(bed.get('features')),
+            normalize_status(bed.get('status', AVAILABLE))
+        )
+
+    def upsert(self, bed: Dict[str, Any]):
+        """Add or replace a bed from its MongoDB document"""
+        bed_id = str(bed['_id'])
+        entry = self._entry(bed)
+        with self._lock:
+            self._discard(bed_id)
+            self._add(bed_id, entry)
+
+    def remove(self, bed_id: str) -> bool:
+        with self._lock:
+            return self._discard(str(bed_id)) is not None
+
+    def replace(self, beds: Iterable[Dict[str, Any]]) -> int:
+        """Swap in a full copy of the collection"""
+        entries = [(str(bed['_id']), self._entry(bed)) for bed in beds]
+        with self._lock:
+            self._reset()
+            for bed_id, entry in entries:
+                self._add(bed_id, entry)
+            self.rebuilds += 1
+            return len(self._beds)
+
+    async def rebuild(self, database) -> int:
+        """Reload every bed from the beds collection"""
+        beds = await database.beds.find({}, BED_FIELDS).to_list(length=None)
+        return self.replace(beds)
+
+    def _candidates(self, department: Optional[str], features: frozenset) -> List[Tuple[str, frozenset]]:
+        departments = [department] if department is not None else list(self._groups)
+        return [
+            (dept, group)
+            for dept in departments
+            for group in self._groups.get(dept, ())
+            if features <= group and self._available.get((dept, group))
+        ]
+
+    def allocate(
+        self,
+        department: Optional[str] = None,
+        features: Sequence[str] = (),
+        room: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Reserve an available bed and mark it occupied; returns its id or None
+
+        Args:
+            department: department to allocate in (default: any)
+            features: features the bed must have (e.g. icu, ventilator)
+            room: room to allocate in (needs a department)
+        """
+        wanted = frozenset(feature.lower() for feature in features)
+        with self._lock:
+            if room is not None:
+                beds = self._rooms.get((department, room), {})
+                bed_id = next((i for i in beds if wanted <= self._beds[i].features), None)
+            else:
+                candidates = self._candidates(department, wanted)
+                if not candidates:
+                    return None
+                # Fewest extra features first, keeping special equipment free;
+                # popitem takes the newest entry in O(1) without scanning removed slots
+                bed_id, _ = self._available[min(candidates, key=lambda key: len(key[1]))].popitem()
+            if bed_id is None:
+                return None
+            self._set_status(bed_id, self._beds[bed_id], OCCUPIED)
+            return bed_id
+
+    def release(self, bed_id: str) -> bool:
+        """Mark a bed available again (e.g. undoing an allocation that failed to persist)"""
+        with self._lock:
+            entry = self._beds.get(str(bed_id))
+            if entry is None:
+                return False
+            self._set_status(str(bed_id), entry, AVAILABLE)
+            return True
+
+    def available(self, department: Optional[str] = None, features: Sequence[str] = ()) -> int:
+        """Available beds with all the given features"""
+        wanted = frozenset(feature.lower() for feature in features)
+        with self._lock:
+            return sum(len(self._available[key]) for key in self._candidates(department, wanted))
+
+    def _available_features(self, department: str) -> Dict[str, int]:
+        counts = Counter()
+        for group in self._groups[department]:
+            available = len(self._available.get((department, group), ()))
+            for feature in group:
+                counts[feature] += available
+        return {feature: count for feature, count in sorted(counts.items())}
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Beds per department and status, and available beds per feature"""
+        with self._lock:
+            return [
+                {
+                    'name': department,
+                    'total': sum(counts.values()),
+                    'occupied': counts[OCCUPIED],
+                    'available': counts[AVAILABLE],
+                    'available_features': self._available_features(department)
+                }
+                for department, counts in sorted(self._counts.items())
+                if sum(counts.values())
+            ]
+
+
+async def rebuild_loop(get_db, index: BedIndex, interval_seconds: float):
+    """Periodically reload the index so writes from other workers show up"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await index.rebuild(get_db())
+        except Exception as e:
+            print(f"⚠️ Bed index rebuild failed: {e}")